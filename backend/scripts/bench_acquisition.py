@@ -0,0 +1,103 @@
+"""Scheduled sampling of many sensors with a simulated read latency: the
+AcquisitionScheduler (deadlines spread over the interval) against reading every
+sensor at once on each tick with the same worker pool. Reports reads per
+second, lateness behind the deadline and missed deadlines.
+
+    python scripts/bench_acquisition.py [sensors] [interval] [read_ms] [seconds]
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sim_device_control.drivers.acquisition import (  # noqa: E402
+    AcquisitionScheduler,
+    percentile_summary,
+)
+
+WORKERS = 8
+BATCH_SIZE = 50
+
+
+def main():
+    sensors = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    read_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 5.0
+    uuids = [f"sensor-{i}" for i in range(sensors)]
+
+    def read(uuid, command):
+        time.sleep(read_ms / 1e3)
+        return 21.0
+
+    scheduler = AcquisitionScheduler(
+        read, lambda command, values: None, WORKERS, BATCH_SIZE
+    )
+    scheduler.start()
+    for uuid in uuids:
+        scheduler.schedule(uuid, "read_temperature", interval)
+    time.sleep(seconds)
+    scheduler.stop()
+    spread = scheduler.stats()
+
+    # Every sensor due at the same instant on each tick
+    lateness = []
+    lock = threading.Lock()
+    reads = 0
+
+    def read_batch(batch, deadline):
+        nonlocal reads
+        for uuid in batch:
+            late = time.monotonic() - deadline
+            read(uuid, "read_temperature")
+            with lock:
+                lateness.append(max(0.0, late))
+                reads += 1
+
+    missed = 0
+    with ThreadPoolExecutor(WORKERS) as executor:
+        start = time.monotonic()
+        tick = start
+        pending = []
+        while tick < start + seconds:
+            time.sleep(max(0.0, tick - time.monotonic()))
+            if any(not future.done() for future in pending):
+                # The previous tick has not finished, its sensors miss this one
+                missed += sensors
+                tick += interval
+                continue
+            pending = [
+                executor.submit(read_batch, uuids[i : i + BATCH_SIZE], tick)
+                for i in range(0, sensors, BATCH_SIZE)
+            ]
+            tick += interval
+    aligned = percentile_summary(lateness)
+
+    print(
+        f"{sensors} sensors every {interval:g} s, {read_ms:g} ms per read, "
+        f"{WORKERS} workers, {seconds:g} s"
+    )
+    print(
+        f"{'':<9} {'reads/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'missed':>8}"
+    )
+    for label, samples, late, missed_count in [
+        ("spread", spread["samples"], spread["lateness_ms"], spread["missed"]),
+        (
+            "aligned",
+            reads,
+            {k: v * 1e3 for k, v in aligned.items()},
+            missed,
+        ),
+    ]:
+        print(
+            f"{label:<9} {samples / seconds:>9.0f} {late['p50']:>8.1f} "
+            f"{late['p99']:>8.1f} {late['max']:>8.1f} {missed_count:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
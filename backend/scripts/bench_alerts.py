@@ -0,0 +1,104 @@
+"""Alert rule evaluation: a threshold, a rate of change and a z-score rule over
+every temperature sensor, evaluated by AlertEngine in batches against the same
+rules checked one reading at a time in plain Python.
+
+    python scripts/bench_alerts.py [sensors] [seconds]
+"""
+
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+from sim_device_control.drivers.alerts import AlertEngine  # noqa: E402
+from sim_device_control.schemas import AlertRule  # noqa: E402
+
+RULES = [
+    AlertRule(name="hot", quantity="temperature", kind="threshold", high=30.0),
+    AlertRule(name="jump", quantity="temperature", kind="rate", limit=5.0),
+    AlertRule(name="odd", quantity="temperature", kind="zscore", limit=4.0),
+]
+
+
+class PerReading:
+    # The same rules and the same running statistics, one reading at a time
+    def __init__(self):
+        self.last = {}
+        self.stats = {}
+        self.active = set()
+
+    def check(self, uuid, timestamp, value):
+        alerts = 0
+        previous = self.last.get(uuid)
+        mean, var, count = self.stats.get(uuid, (0.0, 0.0, 0))
+        for rule in RULES:
+            if rule.kind == "threshold":
+                matched = value > rule.high
+            elif rule.kind == "rate":
+                matched = (
+                    previous is not None
+                    and timestamp > previous[0]
+                    and abs((value - previous[1]) / (timestamp - previous[0]))
+                    > rule.limit
+                )
+            else:
+                std = math.sqrt(var)
+                matched = (
+                    count >= rule.min_samples
+                    and std > 0
+                    and abs(value - mean) / std > rule.limit
+                )
+            key = (rule.name, uuid)
+            if matched != (key in self.active):
+                alerts += 1
+                if matched:
+                    self.active.add(key)
+                else:
+                    self.active.discard(key)
+        alpha = max(1 / (count + 1), 2 / (RULES[2].window + 1))
+        delta = value - mean
+        self.stats[uuid] = (
+            mean + alpha * delta,
+            (1 - alpha) * (var + alpha * delta * delta),
+            count + 1,
+        )
+        self.last[uuid] = (timestamp, value)
+        return alerts
+
+
+def main():
+    sensors = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    uuids = [f"sensor-{i}" for i in range(sensors)]
+    rng = np.random.default_rng(0)
+    # One reading per sensor per second, with rare spikes
+    values = rng.normal(21.0, 1.0, (seconds, sensors))
+    values[rng.random((seconds, sensors)) < 1e-3] += 15.0
+
+    engine = AlertEngine(RULES)
+    raised = 0
+    start = time.perf_counter()
+    for second in range(seconds):
+        engine.submit("temperature", uuids, [float(second)] * sensors, values[second])
+        raised += len(engine.flush())
+    batched = time.perf_counter() - start
+
+    checker = PerReading()
+    looped_alerts = 0
+    start = time.perf_counter()
+    for second in range(seconds):
+        for uuid, value in zip(uuids, values[second].tolist()):
+            looped_alerts += checker.check(uuid, float(second), value)
+    looped = time.perf_counter() - start
+
+    readings = sensors * seconds
+    print(f"{sensors} sensors x {seconds} s, {len(RULES)} rules")
+    print(f"batched     {readings / batched:>12.0f} readings/s   {raised} alerts")
+    print(f"per reading {readings / looped:>12.0f} readings/s   {looped_alerts} alerts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Per-request CPU time of the hot read endpoints with the previous audit record
+construction (inspect.stack() and a DNS lookup per record) against the current
+one (action bound at route registration, host identity cached).
+
+    python scripts/bench_audit.py [requests]
+"""
+
+import inspect
+import os
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ["SIM_DEVICE_CONTROL_DISABLE_MQTT"] = "1"
+os.environ["SIM_DEVICE_CONTROL_DISABLE_MANAGER"] = "1"
+os.environ["DEVICE_STATE_WRITE_BEHIND"] = "false"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sim_device_control import app as app_module  # noqa: E402
+from sim_device_control.drivers import db as db_driver  # noqa: E402
+from sim_device_control.drivers.device_manager import DeviceManager  # noqa: E402
+from sim_device_control.schemas import Base, LogRecord  # noqa: E402
+
+ENDPOINTS = [
+    ("/devices/temperature_sensor/read_temperature", "bench-temperature"),
+    ("/devices/get_status", "bench-temperature"),
+    ("/devices/dc_motor/get_speed", "bench-motor"),
+]
+
+
+def legacy_add_record(db, logged_device_uuid="", description="", action=""):
+    record = LogRecord(
+        uuid=uuid.uuid4(),
+        user=f"{socket.gethostname()}-{socket.gethostbyname(socket.gethostname())}",
+        device_uuid=logged_device_uuid,
+        action=inspect.stack()[1].function,
+        description=description,
+        timestamp=datetime.now(),
+    )
+    db_driver.add_log(db, record)
+
+
+def setup():
+    # A file database, so background writers get their own connections
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(
+        f"sqlite+pysqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    db_driver.SessionLocal = sessionmaker(autoflush=False, bind=engine)
+    manager = DeviceManager(enable_mqtt=False)
+    app_module.app.dependency_overrides[app_module.get_device_manager] = lambda: manager
+    client = TestClient(app_module.app)
+    for device_uuid, device_type in (
+        ("bench-temperature", "temperature_sensor"),
+        ("bench-motor", "dc_motor"),
+    ):
+        client.post(
+            "/devices/",
+            json={
+                "uuid": device_uuid,
+                "type": device_type,
+                "name": device_uuid,
+                "status": "simulated",
+                "description": "",
+                "version": "1.0.0",
+            },
+        )
+    return client, manager
+
+
+def measure(client, path, device_uuid, requests):
+    params = {"device_uuid": device_uuid}
+    for _ in range(20):
+        client.get(path, params=params)
+    start = time.process_time()
+    for _ in range(requests):
+        client.get(path, params=params)
+    return (time.process_time() - start) / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = 5
+    client, manager = setup()
+    variants = {"before": legacy_add_record, "after": app_module.add_record}
+
+    print(f"{'endpoint':<48}{'before':>12}{'after':>12}")
+    for path, device_uuid in ENDPOINTS:
+        # Alternate the variants and keep the best round of each to limit drift
+        best = {name: float("inf") for name in variants}
+        for _ in range(rounds):
+            for name, add_record in variants.items():
+                app_module.add_record = add_record
+                cpu = measure(client, path, device_uuid, requests)
+                best[name] = min(best[name], cpu)
+        print(
+            f"{path:<48}{best['before'] * 1e3:>9.3f} ms{best['after'] * 1e3:>9.3f} ms"
+        )
+    app_module.add_record = variants["after"]
+    manager.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Per-call overhead of the table-driven drivers against the previous
+per-class implementation (kwargs scanning and topic f-strings on every call).
+
+    python scripts/bench_drivers.py [calls]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sim_device_control.drivers.stepper_motor import StepperMotorDriver  # noqa: E402
+
+
+class NullSession:
+    def send_command_and_wait(
+        self, cmd_topic, reply_topic, command, parameter, timeout
+    ):
+        return {"response": "1.0"}
+
+
+class LegacyStepperRead:
+    # Read path of the previous StepperMotorDriver, kept for comparison
+    def __init__(self, uuid):
+        self.uuid = uuid
+
+    def _read_data(self, **kwargs):
+        mqtt_session = None
+        mqtt_command = ""
+        if "mqtt_session" in kwargs:
+            mqtt_session = kwargs["mqtt_session"]
+        if "speed" in kwargs:
+            mqtt_command = "get_speed"
+        if "direction" in kwargs:
+            mqtt_command = "get_direction"
+        if "acceleration" in kwargs:
+            mqtt_command = "get_acceleration"
+        if "location" in kwargs:
+            mqtt_command = "get_location"
+        if mqtt_session:
+            json_response = mqtt_session.send_command_and_wait(
+                cmd_topic=f"sim-device-control/{self.uuid}/command",
+                reply_topic=f"sim-device-control/{self.uuid}/response",
+                command=mqtt_command,
+                parameter="",
+                timeout=5,
+            )
+            return json_response["response"]
+
+    def get_location(self, mqtt_session=None):
+        return float(self._read_data(location=True, mqtt_session=mqtt_session))
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    session = NullSession()
+    legacy = LegacyStepperRead("stepper-1")
+    driver = StepperMotorDriver("stepper-1")
+
+    for label, func in [
+        ("legacy", lambda: legacy.get_location(session)),
+        ("table-driven", lambda: driver.get_location(session)),
+    ]:
+        best = min(timeit.repeat(func, number=calls, repeat=5))
+        print(f"{label:>14}: {best / calls * 1e9:8.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
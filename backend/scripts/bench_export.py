@@ -0,0 +1,100 @@
+"""Peak memory and time to first byte of the streaming log exports against
+loading every row and serializing one JSON array (the previous /logs/).
+
+    python scripts/bench_export.py [rows ...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sim_device_control import log_export  # noqa: E402
+from sim_device_control.drivers import db as db_driver  # noqa: E402
+from sim_device_control.schemas import Base, LogRecord  # noqa: E402
+
+
+def populate(session, start, count):
+    base_time = datetime(2025, 1, 1)
+    logs = [
+        LogRecord.model_construct(
+            uuid=uuid.uuid4(),
+            user="bench",
+            device_uuid=f"device-{i % 1000}",
+            action="read_temperature",
+            description="Read temperature: 21.5",
+            timestamp=base_time + timedelta(milliseconds=10 * i),
+            status="ok",
+            duration_ms=1.25,
+            parameters=None,
+        )
+        for i in range(start, start + count)
+    ]
+    for offset in range(0, len(logs), 10_000):
+        db_driver.add_logs(session, logs[offset : offset + 10_000], rollups=False)
+
+
+def unpaged_json():
+    with db_driver.session_scope() as db:
+        records = [
+            LogRecord.model_validate(log, from_attributes=True)
+            for log in db_driver.get_logs(db)
+        ]
+        yield json.dumps(
+            [record.model_dump(mode="json") for record in records]
+        ).encode()
+
+
+def measure(stream_factory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in stream_factory():
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first * 1e3, total * 1e3, peak / 2**20, size / 2**20
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 300_000]
+    path = os.path.join(tempfile.mkdtemp(), "bench_export.db")
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db_driver.SessionLocal = sessionmaker(bind=engine)
+    session = db_driver.SessionLocal()
+
+    exports = {
+        "json array": unpaged_json,
+        "ndjson": log_export.export_ndjson,
+        "csv.gz": log_export.export_csv_gzip,
+    }
+    print(
+        f"{'rows':>8} {'export':<12}{'ttfb ms':>10}{'total ms':>10}"
+        f"{'peak MiB':>10}{'out MiB':>10}"
+    )
+    rows = 0
+    for size in sorted(sizes):
+        populate(session, rows, size - rows)
+        rows = size
+        for name, factory in exports.items():
+            ttfb, total, peak, out = measure(factory)
+            print(
+                f"{rows:>8} {name:<12}{ttfb:>10.1f}{total:>10.1f}{peak:>10.1f}{out:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Cost of simulating a large fleet in-process: bulk registration, one
+vectorized simulation step and a single command round trip.
+
+    python scripts/bench_fleet.py [devices_per_type] [steps]
+"""
+
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sim_device_control.drivers.fleet_sim import KINDS, FleetSimulator  # noqa: E402
+from sim_device_control.drivers.stepper_motor import StepperMotorDriver  # noqa: E402
+
+
+def main():
+    per_type = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    simulator = FleetSimulator(seed=0)
+    start = time.perf_counter()
+    uuids = {kind: simulator.add_many(kind, per_type) for kind in KINDS}
+    added = time.perf_counter() - start
+
+    stepper = StepperMotorDriver(uuids["stepper_motor"][0])
+    stepper.set_speed(100.0, simulator)
+    stepper.set_acceleration(50.0, simulator)
+    stepper.move_absolute(1000, simulator)
+
+    step = timeit.timeit(lambda: simulator.step(0.1), number=steps) / steps
+    command = timeit.timeit(lambda: stepper.get_location(simulator), number=10_000)
+
+    print(f"devices        {len(simulator):>10}")
+    print(f"register       {added * 1e3:>10.2f} ms")
+    print(
+        f"step           {step * 1e3:>10.2f} ms ({step / len(simulator) * 1e9:.1f} ns/device)"
+    )
+    print(f"command        {command / 10_000 * 1e6:>10.2f} us")
+    print(f"stepper moved  {stepper.get_location(simulator):>10.1f} steps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""On-disk size of log_records in the previous layout (uuid, user, device and
+action as strings, repeated in every index) against the compact layout (binary
+uuids, dictionary ids), with the same rows and the same query indexes. Rows and
+indexes are measured separately through SQLite's dbstat table.
+
+    python scripts/bench_log_size.py [rows ...]
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sim_device_control.drivers import db as db_driver  # noqa: E402
+from sim_device_control.schemas import Base, LogRecord  # noqa: E402
+
+ACTIONS = ["read_temperature", "read_pressure", "set_speed", "move_to", "get_status"]
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE log_records (uuid VARCHAR(225) PRIMARY KEY, "
+    "user VARCHAR(255) NOT NULL, device_uuid VARCHAR(225), "
+    "action VARCHAR(255) NOT NULL, description VARCHAR(1024), timestamp DATETIME, "
+    "status VARCHAR(20), duration_ms FLOAT, parameters VARCHAR(1024), log_day DATE)",
+    "CREATE INDEX ix_ts_uuid ON log_records (timestamp, uuid)",
+    "CREATE INDEX ix_device_ts ON log_records (device_uuid, timestamp)",
+    "CREATE INDEX ix_device_action_ts ON log_records (device_uuid, action, timestamp)",
+    "CREATE INDEX ix_action_ts ON log_records (action, timestamp)",
+    "CREATE INDEX ix_user_ts ON log_records (user, timestamp)",
+    "CREATE INDEX ix_log_day ON log_records (log_day)",
+]
+
+
+def make_logs(count):
+    base_time = datetime(2025, 1, 1)
+    return [
+        LogRecord.model_construct(
+            uuid=uuid.uuid4(),
+            user="admin@example.com",
+            # Device uuids as the app generates them
+            device_uuid=str(uuid.UUID(int=i % 1000)),
+            action=ACTIONS[i % len(ACTIONS)],
+            description=f"{ACTIONS[i % len(ACTIONS)]}: {i % 997}",
+            timestamp=base_time + timedelta(milliseconds=10 * i),
+            status="ok",
+            duration_ms=1.25,
+            parameters=None,
+        )
+        for i in range(count)
+    ]
+
+
+def sizes(engine):
+    # Bytes of the table itself (rows and primary key) and of its other indexes
+    with engine.connect() as connection:
+        pages = connection.execute(
+            text("SELECT name, sum(pgsize) FROM dbstat GROUP BY name")
+        ).all()
+    rows = sum(size for name, size in pages if name == "log_records")
+    indexes = sum(
+        size
+        for name, size in pages
+        if name.startswith("ix_") or name == "sqlite_autoindex_log_records_1"
+    )
+    return rows, indexes
+
+
+def legacy_size(directory, logs):
+    path = os.path.join(directory, "legacy.db")
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+        rows = [
+            {
+                "uuid": str(log.uuid),
+                "user": log.user,
+                "device_uuid": log.device_uuid,
+                "action": log.action,
+                "description": log.description,
+                "timestamp": log.timestamp,
+                "status": log.status,
+                "duration_ms": log.duration_ms,
+                "log_day": log.timestamp.date(),
+            }
+            for log in logs
+        ]
+        connection.execute(
+            text(
+                "INSERT INTO log_records (uuid, user, device_uuid, action, "
+                "description, timestamp, status, duration_ms, log_day) VALUES "
+                "(:uuid, :user, :device_uuid, :action, :description, :timestamp, "
+                ":status, :duration_ms, :log_day)"
+            ),
+            rows,
+        )
+    result = sizes(engine)
+    engine.dispose()
+    return result
+
+
+def compact_size(directory, logs):
+    path = os.path.join(directory, "compact.db")
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    tables = [
+        Base.metadata.tables[name]
+        for name in ("log_actions", "log_users", "log_devices", "log_records")
+    ]
+    Base.metadata.create_all(bind=engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    for offset in range(0, len(logs), 10_000):
+        db_driver.add_logs(session, logs[offset : offset + 10_000], rollups=False)
+    session.close()
+    db_driver.clear_log_dictionaries()
+    result = sizes(engine)
+    engine.dispose()
+    return result
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(
+        f"{'rows':>10} {'legacy rows':>12} {'compact rows':>13} "
+        f"{'legacy idx':>11} {'compact idx':>12}   (bytes per record)"
+    )
+    for count in counts:
+        directory = tempfile.mkdtemp()
+        logs = make_logs(count)
+        legacy_rows, legacy_indexes = legacy_size(directory, logs)
+        compact_rows, compact_indexes = compact_size(directory, logs)
+        print(
+            f"{count:>10} {legacy_rows / count:>12.1f} {compact_rows / count:>13.1f} "
+            f"{legacy_indexes / count:>11.1f} {compact_indexes / count:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
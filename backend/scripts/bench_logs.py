@@ -0,0 +1,119 @@
+"""Log query cost as log_records grows: the previous unpaged listing against
+keyset pages (first page, a page 50 pages deep, a device's page, a time
+window page, one device's records for one action and a description search).
+
+    python scripts/bench_logs.py [rows ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sim_device_control.drivers import db as db_driver  # noqa: E402
+from sim_device_control.schemas import Base, LogRecord  # noqa: E402
+
+PAGE = 100
+ACTIONS = [
+    "read_temperature",
+    "read_pressure",
+    "set_speed",
+    "move_to",
+    "get_status",
+]
+# The unpaged listing is only timed up to this many rows
+FULL_LISTING_MAX = 100_000
+
+
+def populate(session, start, count, base_time):
+    logs = [
+        LogRecord.model_construct(
+            uuid=uuid.uuid4(),
+            user="bench",
+            device_uuid=f"device-{i % 1000}",
+            action=ACTIONS[i % len(ACTIONS)],
+            description=f"{ACTIONS[i % len(ACTIONS)]}: {i % 997}",
+            timestamp=base_time + timedelta(milliseconds=10 * i),
+            status=None,
+            duration_ms=None,
+            parameters=None,
+        )
+        for i in range(start, start + count)
+    ]
+    for offset in range(0, len(logs), 10_000):
+        db_driver.add_logs(session, logs[offset : offset + 10_000], rollups=False)
+
+
+def timed(function, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def deep_page(session):
+    cursor = None
+    for _ in range(50):
+        _, cursor = db_driver.get_logs_page(session, PAGE, cursor)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    path = os.path.join(tempfile.mkdtemp(), "bench_logs.db")
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    base_time = datetime(2025, 1, 1)
+
+    print(
+        f"{'rows':>10}{'unpaged':>12}{'page 1':>10}{'page 50':>10}"
+        f"{'device':>10}{'window':>10}{'action':>10}{'search':>10}   (ms)"
+    )
+    rows = 0
+    for size in sorted(sizes):
+        populate(session, rows, size - rows, base_time)
+        rows = size
+        middle = base_time + timedelta(milliseconds=5 * rows)
+        unpaged = (
+            f"{timed(lambda: db_driver.get_logs(session), repeat=1):>12.1f}"
+            if rows <= FULL_LISTING_MAX
+            else f"{'-':>12}"
+        )
+        first = timed(lambda: db_driver.get_logs_page(session, PAGE))
+        deep = timed(lambda: deep_page(session), repeat=1) / 50
+        device = timed(
+            lambda: db_driver.get_logs_page(session, PAGE, device_uuid="device-7")
+        )
+        window = timed(
+            lambda middle=middle: db_driver.get_logs_page(
+                session,
+                PAGE,
+                start_time=middle,
+                end_time=middle + timedelta(minutes=5),
+            )
+        )
+        action = timed(
+            lambda: db_driver.get_logs_page(
+                session, PAGE, device_uuid="device-7", action="set_speed"
+            )
+        )
+        search = timed(
+            lambda: db_driver.get_logs_page(session, PAGE, description="move_to: 99")
+        )
+        print(
+            f"{rows:>10}{unpaged}{first:>10.2f}{deep:>10.2f}{device:>10.2f}"
+            f"{window:>10.2f}{action:>10.2f}{search:>10.2f}"
+        )
+        session.expunge_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Memory and speed of keeping a long history of readings in memory: Python
+lists of (timestamp, value) tuples and plain float64 arrays against
+ReadingChunk, both exact and rounded to 2 decimals. Readings come about once a
+second with a few ms of jitter, as a 2-decimal random walk. Reports bytes per
+reading, encode and decode throughput, and a one-hour range query over a day.
+
+    python scripts/bench_reading_chunks.py [readings] [chunk_size]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+from sim_device_control.drivers.reading_chunks import (  # noqa: E402
+    ChunkedSeries,
+    ReadingChunk,
+)
+
+
+def encode(timestamps, values, chunk_size, precision):
+    return [
+        ReadingChunk(
+            timestamps[i : i + chunk_size], values[i : i + chunk_size], precision
+        )
+        for i in range(0, len(timestamps), chunk_size)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 86_400
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    rng = np.random.default_rng(0)
+    timestamps = 1.7e9 + np.arange(count) + np.round(rng.normal(0, 0.002, count), 3)
+    smooth = 21.0 + np.cumsum(rng.normal(0, 0.05, count))
+    values = np.round(smooth, 2)
+
+    tracemalloc.start()
+    tuples = list(zip(timestamps.tolist(), values.tolist()))
+    python_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tuples
+
+    print(f"{count} readings, {chunk_size} per chunk")
+    print(f"{'':<22} {'B/reading':>10} {'encode/s':>12} {'decode/s':>12}")
+    print(f"{'python tuples':<22} {python_bytes / count:>10.1f}")
+    print(f"{'float64 arrays':<22} {16.0:>10.1f}")
+    for label, series, precision in [
+        ("chunks, 2 decimals", values, None),
+        ("chunks, full floats", smooth, None),
+        ("chunks, precision=2", smooth, 2),
+    ]:
+        start = time.perf_counter()
+        chunks = encode(timestamps, series, chunk_size, precision)
+        encoded = time.perf_counter() - start
+        start = time.perf_counter()
+        for chunk in chunks:
+            chunk.decode()
+        decoded = time.perf_counter() - start
+        nbytes = sum(chunk.nbytes() for chunk in chunks)
+        print(
+            f"{label:<22} {nbytes / count:>10.2f} {count / encoded:>12.0f} "
+            f"{count / decoded:>12.0f}"
+        )
+
+    # One hour out of the whole history, decoding only the chunks it overlaps
+    history = ChunkedSeries(chunk_size)
+    for timestamp, value in zip(timestamps.tolist(), values.tolist()):
+        history.append(timestamp, value)
+    start_time = float(timestamps[count // 2])
+    runs = 100
+    start = time.perf_counter()
+    for _ in range(runs):
+        hour = history.range(start_time, start_time + 3600)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f"range of {len(hour[0])} readings: {elapsed * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
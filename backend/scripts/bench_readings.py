@@ -0,0 +1,95 @@
+"""Sensor reading history: bulk ingest rate through SensorHistory with and
+without the minute/hour/day rollups, and one sensor's readings as downsampled
+buckets, loaded raw, grouped from sensor_readings and merged from the rollups.
+
+    python scripts/bench_readings.py [readings ...]
+"""
+
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sim_device_control.config import settings  # noqa: E402
+from sim_device_control.drivers import db as db_driver  # noqa: E402
+from sim_device_control.drivers.sensor_history import SensorHistory  # noqa: E402
+from sim_device_control.schemas import (  # noqa: E402
+    Base,
+    DatabaseSensorReading,
+    SensorReading,
+)
+
+SENSORS = 100
+INTERVAL = 10
+POINTS = 300
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(
+        f"{'readings':>10} {'ingest/s':>10} {'+rollups':>10} {'raw ms':>8} "
+        f"{'raw rows':>9} {'buckets ms':>11} {'rollup ms':>10} {'buckets':>8}"
+    )
+    for count in sizes:
+        # One reading per sensor every INTERVAL seconds
+        start = datetime(2025, 1, 1)
+        readings = [
+            SensorReading.model_construct(
+                device_uuid=f"sensor-{i % SENSORS}",
+                quantity="temperature",
+                timestamp=start + timedelta(seconds=i // SENSORS * INTERVAL),
+                value=20.0 + (i % 97) / 10,
+            )
+            for i in range(count)
+        ]
+        rates = []
+        for rollups in (False, True):
+            path = os.path.join(tempfile.mkdtemp(), "bench_readings.db")
+            engine = create_engine(f"sqlite+pysqlite:///{path}")
+            Base.metadata.create_all(bind=engine)
+            db_driver.SessionLocal = sessionmaker(bind=engine)
+            settings.sensor_rollups = rollups
+            history = SensorHistory(max_queue_size=count, batch_size=1000)
+            began = time.perf_counter()
+            history.submit(readings)
+            history.flush_all()
+            rates.append(count / (time.perf_counter() - began))
+
+        end = start + timedelta(seconds=count // SENSORS * INTERVAL)
+        span = (end - start).total_seconds()
+        bucket_seconds = max(60, math.ceil(span / POINTS / 60) * 60)
+        with db_driver.session_scope() as db:
+            began = time.perf_counter()
+            raw = (
+                db.query(DatabaseSensorReading)
+                .filter(
+                    DatabaseSensorReading.device_uuid == "sensor-0",
+                    DatabaseSensorReading.timestamp >= start,
+                    DatabaseSensorReading.timestamp < end,
+                )
+                .order_by(DatabaseSensorReading.timestamp)
+                .all()
+            )
+            raw_ms = (time.perf_counter() - began) * 1e3
+            timings = []
+            for source in ("raw", "rollup"):
+                began = time.perf_counter()
+                buckets = db_driver.get_sensor_reading_buckets(
+                    db, "sensor-0", start, end, bucket_seconds, "temperature", source
+                )
+                timings.append((time.perf_counter() - began) * 1e3)
+        print(
+            f"{count:>10} {rates[0]:>10.0f} {rates[1]:>10.0f} {raw_ms:>8.1f} "
+            f"{len(raw):>9} {timings[0]:>11.1f} {timings[1]:>10.1f} {len(buckets):>8}"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
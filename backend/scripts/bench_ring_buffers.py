@@ -0,0 +1,111 @@
+"""Recent readings of 10k sensors held in memory: NumPy ring buffers against a
+deque of (timestamp, value) tuples per sensor. Memory, append cost, and
+min/max/mean/std/percentile stats for one sensor, pooled over every sensor of
+the quantity and per sensor.
+
+    python scripts/bench_ring_buffers.py [sensors] [capacity]
+"""
+
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+from sim_device_control.drivers.reading_buffers import SensorBuffers  # noqa: E402
+
+PERCENTILES = [50, 90, 99]
+WINDOW = 300.0
+
+
+def timed(function, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def deque_stats(values):
+    ordered = sorted(values)
+    quantiles = statistics.quantiles(ordered, n=100, method="inclusive")
+    return (
+        min(ordered),
+        max(ordered),
+        statistics.fmean(ordered),
+        statistics.pstdev(ordered),
+        [quantiles[p - 1] for p in PERCENTILES],
+    )
+
+
+def main():
+    sensors = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    uuids = [f"sensor-{i}" for i in range(sensors)]
+    rng = np.random.default_rng(0)
+    # One reading per sensor per second, the buffers end up full
+    values = rng.normal(21.0, 2.0, (capacity, sensors))
+    now = float(capacity)
+
+    tracemalloc.start()
+    deques = {uuid: deque(maxlen=capacity) for uuid in uuids}
+    for second in range(capacity):
+        row = values[second].tolist()
+        for uuid, value in zip(uuids, row):
+            deques[uuid].append((float(second), value))
+    deque_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    buffers = SensorBuffers(capacity)
+    timestamps = np.zeros(sensors)
+    start = time.perf_counter()
+    for second in range(capacity):
+        timestamps.fill(second)
+        buffers.append_many("temperature", uuids, timestamps, values[second])
+    batched = (time.perf_counter() - start) / (capacity * sensors) * 1e9
+    start = time.perf_counter()
+    for uuid, value in zip(uuids, values[0].tolist()):
+        buffers.append(uuid, "temperature", now, value)
+    single = (time.perf_counter() - start) / sensors * 1e9
+
+    since = now - WINDOW
+
+    def deque_one():
+        deque_stats([v for t, v in deques[uuids[0]] if t >= since])
+
+    def deque_pooled():
+        deque_stats([v for d in deques.values() for t, v in d if t >= since])
+
+    def deque_per_sensor():
+        for d in deques.values():
+            deque_stats([v for t, v in d if t >= since])
+
+    def ring_one():
+        buffers.stats("temperature", uuids[0], WINDOW, PERCENTILES, now=now)
+
+    def ring_pooled():
+        buffers.stats("temperature", None, WINDOW, PERCENTILES, now=now)
+
+    def ring_per_sensor():
+        buffers.stats("temperature", None, WINDOW, PERCENTILES, True, now=now)
+
+    print(f"{sensors} sensors x {capacity} readings, stats over the last {WINDOW:g} s")
+    print(
+        f"memory MiB      deque {deque_bytes / 2**20:>9.1f}   ring {buffers.nbytes() / 2**20:>9.1f}"
+    )
+    print(f"append ns/rdg   single {single:>8.0f}   batched {batched:>6.0f}")
+    for label, slow, fast in [
+        ("one sensor ms", deque_one, ring_one),
+        ("pooled ms", deque_pooled, ring_pooled),
+        ("per sensor ms", deque_per_sensor, ring_per_sensor),
+    ]:
+        print(f"{label:<15} deque {timed(slow):>9.2f}   ring {timed(fast):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Import time and memory of the device manager with lazily loaded drivers,
+compared to importing every driver module up front like the old static map did.
+
+    python scripts/bench_startup.py [runs]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+ALL_TYPES = [
+    "temperature_sensor",
+    "pressure_sensor",
+    "humidity_sensor",
+    "dc_motor",
+    "stepper_motor",
+]
+
+PROBE = """
+import json, os, time, tracemalloc
+os.environ["SIM_DEVICE_CONTROL_DISABLE_MANAGER"] = "1"
+start = time.perf_counter()
+from sim_device_control.drivers import device_manager
+from sim_device_control.drivers.registry import driver_registry
+base = time.perf_counter() - start
+tracemalloc.start()
+start = time.perf_counter()
+for type_name in {types!r}:
+    driver_registry.get(type_name)
+drivers = time.perf_counter() - start
+print(json.dumps({{
+    "base": base,
+    "drivers": drivers,
+    "driver_bytes": tracemalloc.get_traced_memory()[1],
+}}))
+"""
+
+
+def probe(types, runs):
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(types=types)],
+            env={**os.environ, "PYTHONPATH": SRC},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: min(r[key] for r in results) for key in results[0]}
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    scenarios = [
+        ("eager (all types)", ALL_TYPES),
+        ("lazy, no devices", []),
+        ("lazy, 1 type used", ["temperature_sensor"]),
+        ("lazy, 2 types used", ["temperature_sensor", "dc_motor"]),
+    ]
+    for label, types in scenarios:
+        result = probe(types, runs)
+        print(
+            f"{label:>20}: manager import {result['base'] * 1000:7.1f} ms, "
+            f"drivers {result['drivers'] * 1000:6.2f} ms / "
+            f"{result['driver_bytes'] / 1024:7.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Synthetic device fleet load generator.
+
+Emulates many sim devices in one process (FleetEmulator) and drives them
+through the backend's MqttDriver and device drivers, reporting how fast the
+fleet is registered and the command throughput/latency the backend achieves.
+Runs against an in-process broker stand-in by default, or a real broker:
+
+    python scripts/loadgen.py --devices 2000 --duration 10 --workers 16
+    python scripts/loadgen.py --broker localhost:1883
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import paho.mqtt.client as mqtt  # noqa: E402
+from sim_device_control.drivers.fleet_emulator import FleetEmulator  # noqa: E402
+from sim_device_control.drivers.fleet_sim import KINDS, FleetSimulator  # noqa: E402
+from sim_device_control.drivers.local_broker import LocalBroker  # noqa: E402
+from sim_device_control.drivers.mqtt import MqttDriver  # noqa: E402
+from sim_device_control.drivers.registry import driver_registry  # noqa: E402
+
+# One representative read per device type
+READS = {
+    "temperature_sensor": "read_temperature",
+    "pressure_sensor": "read_pressure",
+    "humidity_sensor": "read_humidity",
+    "dc_motor": "get_speed",
+    "stepper_motor": "get_location",
+}
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--broker", help="host:port of a real broker")
+    args = parser.parse_args()
+
+    broker = None
+    if args.broker:
+        host, _, port = args.broker.partition(":")
+        port = int(port or 1883)
+        backend = MqttDriver(host, port)
+        fleet_client = mqtt.Client()
+        fleet_client.connect(host, port)
+    else:
+        host, port = "local", 1883
+        broker = LocalBroker()
+        broker.start()
+        backend = MqttDriver(host, port, client=broker.client())
+        fleet_client = broker.client()
+
+    backend.connect()
+    backend.start()
+
+    fleet = FleetEmulator(fleet_client, FleetSimulator(seed=args.seed))
+    per_type, extra = divmod(args.devices, len(KINDS))
+    for index, kind in enumerate(KINDS):
+        fleet.add_many(kind, per_type + (1 if index < extra else 0))
+    fleet.simulator.start()
+
+    start = time.perf_counter()
+    fleet.start()
+    while len(backend.devices) < args.devices:
+        if time.perf_counter() - start > args.timeout:
+            print(f"only {len(backend.devices)} of {args.devices} devices connected")
+            break
+        time.sleep(0.01)
+    connected = time.perf_counter() - start
+
+    with backend._device_lock:
+        devices = [
+            (device_id, driver_registry.get(info["type"])(device_id), info["type"])
+            for device_id, info in backend.devices.items()
+        ]
+    for _, driver, _ in devices:
+        driver.timeout = args.timeout
+
+    latencies = []
+    failures = []
+    deadline = time.perf_counter() + args.duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local_latencies = []
+        local_failures = 0
+        while time.perf_counter() < deadline:
+            _, driver, device_type = rng.choice(devices)
+            sent = time.perf_counter()
+            try:
+                driver.execute(READS[device_type], mqtt_session=backend)
+                local_latencies.append(time.perf_counter() - sent)
+            except (TimeoutError, ValueError):
+                local_failures += 1
+        latencies.extend(local_latencies)
+        failures.append(local_failures)
+
+    threads = [
+        threading.Thread(target=worker, args=(args.seed + i,))
+        for i in range(args.workers)
+    ]
+    run_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - run_start
+
+    fleet.stop()
+    fleet.simulator.stop()
+    backend.stop()
+    if broker is not None:
+        broker.stop()
+
+    latencies.sort()
+    print(f"broker         {'local stand-in' if broker else args.broker}")
+    print(f"devices        {len(devices):>10}")
+    print(f"connected in   {connected * 1e3:>10.1f} ms")
+    print(f"commands       {len(latencies):>10} ({sum(failures)} failed)")
+    print(f"throughput     {len(latencies) / elapsed:>10.0f} commands/s")
+    if latencies:
+        print(f"latency mean   {statistics.mean(latencies) * 1e3:>10.3f} ms")
+        for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            print(
+                f"latency {label}    {percentile(latencies, fraction) * 1e3:>10.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
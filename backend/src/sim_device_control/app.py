@@ -1,13 +1,38 @@
-from fastapi import FastAPI, HTTPException, Depends
-from typing import List
-from datetime import datetime
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+import math
 import uuid
-import socket
-import inspect
-from .schemas import SimDevice, DeviceType, LogRecord, MotorDirection
+from .audit import AuditedRoute, current_audit, host_identity
+from .config import settings
+from .schemas import (
+    SimDevice,
+    DeviceType,
+    AcquisitionStats,
+    Alert,
+    AlertRule,
+    DeviceGroup,
+    GroupCommandResult,
+    LogAggregate,
+    LogDailyCount,
+    LogRecord,
+    LogRetentionStats,
+    LogSinkStats,
+    MotorDirection,
+    SensorReading,
+    SensorReadingBucket,
+    SensorStats,
+)
 from .drivers.db import get_db
 from .drivers import db as db_driver
 from .drivers.device_manager import get_device_manager
+from .drivers.log_retention import get_log_retention
+from .drivers.log_sink import get_log_sink
+from .drivers.log_tail import get_log_tail, log_tail_events
+from .drivers.sensor_history import READING_QUANTITIES, get_sensor_history
+from .log_export import EXPORT_FORMATS, export_csv_gzip, export_ndjson
 
 tags_metadata = [
     {
@@ -34,6 +59,14 @@ tags_metadata = [
         "name": "Humidity Sensor Operations",
         "description": "Operations specific to humidity sensors.",
     },
+    {
+        "name": "Sensor History",
+        "description": "Recorded sensor readings over time.",
+    },
+    {
+        "name": "Alerts",
+        "description": "Threshold, rate of change and anomaly rules on readings.",
+    },
     {
         "name": "DC Motor Operations",
         "description": "Operations specific to DC motors.",
@@ -42,27 +75,57 @@ tags_metadata = [
         "name": "Stepper Motor Operations",
         "description": "Operations specific to stepper motors.",
     },
+    {
+        "name": "Device Groups",
+        "description": "Group and tag devices, and command whole groups at once.",
+    },
     {
         "name": "Log Management",
         "description": "Operations for adding and viewing logs.",
     },
 ]
 
-app = FastAPI(title="Simulated Device Controller API", openapi_tags=tags_metadata)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_log_retention().start()
+    if settings.sensor_history:
+        get_sensor_history().start()
+    yield
+    get_log_retention().stop()
+    if settings.sensor_history:
+        get_sensor_history().stop()
+    # Write out queued audit records before the process exits
+    get_log_sink().stop()
+
+
+app = FastAPI(
+    title="Simulated Device Controller API",
+    openapi_tags=tags_metadata,
+    lifespan=lifespan,
+)
+# Must be set before any route is registered
+app.router.route_class = AuditedRoute
 
 
 def add_record(db, logged_device_uuid: str = "", description: str = ""):
+    # Within a request this only describes it, the request is logged once when
+    # it ends (see audit.AuditedRoute)
+    context = current_audit()
+    if context is not None:
+        context.note(logged_device_uuid, description)
+        return
     try:
         record = LogRecord(
             uuid=uuid.uuid4(),
-            user=f"{socket.gethostname()}-{socket.gethostbyname(socket.gethostname())}",
+            user=host_identity(),
             device_uuid=logged_device_uuid,
-            action=inspect.stack()[1].function,
+            action="",
             description=description,
             timestamp=datetime.now(),
         )
         # db.add_log(record)
-        db_driver.add_log(db, record)
+        get_log_sink().submit(record, db)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -94,10 +157,10 @@ def health_check():
 
 
 @app.get("/devices/", response_model=List[SimDevice], tags=["General Device Control"])
-def list_devices(db=Depends(get_db)):
+def list_devices(db=Depends(get_db), manager=Depends(get_device_manager)):
     add_record(db, description="Listed all devices")
     # return db.get_devices()
-    return db_driver.get_devices(db)
+    return manager.get_devices(db)
 
 
 @app.post("/devices/", response_model=SimDevice, tags=["General Device Control"])
@@ -105,8 +168,7 @@ def create_device(
     device: SimDevice, db=Depends(get_db), manager=Depends(get_device_manager)
 ):
     try:
-        add_record(db, description=f"Attempting to create device {device.uuid}")
-        manager.add_device(device)
+        manager.add_device(device, db=db)
         # db.add_device(device)
         # db_driver.add_device(db, device)
     except ValueError as e:
@@ -121,10 +183,16 @@ def create_device(
     response_model=List[SimDevice],
     tags=["General Device Control"],
 )
-def get_devices_by_type(device_type: DeviceType, db=Depends(get_db)):
-    add_record(db, description=f"Attempting to get devices by type {device_type}")
+def get_devices_by_type(
+    device_type: str, db=Depends(get_db), manager=Depends(get_device_manager)
+):
     # matching_devices = [d for d in db.get_devices() if d.type == device_type]
-    matching_devices = [d for d in db_driver.get_devices(db) if d.type == device_type]
+    # Plugin device types are plain strings, built-in ones DeviceType members
+    matching_devices = [
+        d
+        for d in manager.get_devices(db)
+        if getattr(d.type, "value", d.type) == device_type
+    ]
     add_record(
         db, description=f"Found {len(matching_devices)} devices of type {device_type}"
     )
@@ -143,7 +211,6 @@ def update_device_description(
     manager=Depends(get_device_manager),
 ):
     try:
-        add_record(db, description=f"Attempting to update device {device_uuid}")
         # devices = db.get_devices()
         # devices = db_driver.get_devices(db)
         # for device in devices:
@@ -155,10 +222,19 @@ def update_device_description(
         #         return device
         # raise ValueError("Device not found")
         manager.update_description(device_uuid, new_description, db)
-        device = db_driver.get_device_by_uuid(db, device_uuid)
+        device = manager.get_device(device_uuid, db)
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Updated device {device_uuid}",
+        )
         return device
     except ValueError as e:
-        add_record(db, description=f"Failed to update device {device_uuid}: {str(e)}")
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Failed to update device {device_uuid}: {str(e)}",
+        )
         raise HTTPException(status_code=404, detail=str(e))
 
 
@@ -174,7 +250,6 @@ def update_device_name(
     manager=Depends(get_device_manager),
 ):
     try:
-        add_record(db, description=f"Attempting to update device {device_uuid}")
         # devices = db.get_devices()
         # devices = db_driver.get_devices(db)
         # for device in devices:
@@ -186,10 +261,19 @@ def update_device_name(
         #         return device
         # raise ValueError("Device not found")
         manager.update_name(device_uuid, new_name, db)
-        device = db_driver.get_device_by_uuid(db, device_uuid)
+        device = manager.get_device(device_uuid, db)
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Updated device {device_uuid}",
+        )
         return device
     except ValueError as e:
-        add_record(db, description=f"Failed to update device {device_uuid}: {str(e)}")
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Failed to update device {device_uuid}: {str(e)}",
+        )
         raise HTTPException(status_code=404, detail=str(e))
 
 
@@ -214,8 +298,7 @@ def delete_device(
     device_uuid: str, db=Depends(get_db), manager=Depends(get_device_manager)
 ):
     try:
-        add_record(db, description=f"Attempting to delete device {device_uuid}")
-        manager.remove_device(device_uuid)
+        manager.remove_device(device_uuid, db)
         # db.delete_device(device_uuid)
         # db_driver.delete_device(db, device_uuid)
     except ValueError as e:
@@ -236,7 +319,6 @@ def get_device_status(
     device_uuid: str, db=Depends(get_db), manager=Depends(get_device_manager)
 ):
     try:
-        add_record(db, logged_device_uuid=device_uuid, description="Getting status")
         device_status = manager.get_status(device_uuid, db)
         add_record(
             db, logged_device_uuid=device_uuid, description=f"Status: {device_status}"
@@ -256,7 +338,6 @@ def get_device_version(
     device_uuid: str, db=Depends(get_db), manager=Depends(get_device_manager)
 ):
     try:
-        add_record(db, logged_device_uuid=device_uuid, description="Getting version")
         device_version = manager.get_version(device_uuid, db)
         add_record(
             db, logged_device_uuid=device_uuid, description=f"Version: {device_version}"
@@ -286,11 +367,6 @@ def read_temperature(
 ):
     match_device_type(db, device_uuid, DeviceType.TEMPERATURE_SENSOR)
     try:
-        add_record(
-            db,
-            logged_device_uuid=device_uuid,
-            description="Reading temperature from sensor",
-        )
         temperature = manager.read_temperature(device_uuid)
         add_record(
             db,
@@ -322,11 +398,6 @@ def read_pressure(
 ):
     match_device_type(db, device_uuid, DeviceType.PRESSURE_SENSOR)
     try:
-        add_record(
-            db,
-            logged_device_uuid=device_uuid,
-            description="Reading pressure from sensor",
-        )
         pressure = manager.read_pressure(device_uuid)
         add_record(
             db, logged_device_uuid=device_uuid, description=f"Read pressure: {pressure}"
@@ -356,11 +427,6 @@ def read_humidity(
 ):
     match_device_type(db, device_uuid, DeviceType.HUMIDITY_SENSOR)
     try:
-        add_record(
-            db,
-            logged_device_uuid=device_uuid,
-            description=f"Reading humidity from sensor",
-        )
         humidity = manager.read_humidity(device_uuid)
         add_record(
             db, logged_device_uuid=device_uuid, description=f"Read humidity: {humidity}"
@@ -375,6 +441,223 @@ def read_humidity(
         raise HTTPException(status_code=404, detail=str(e))
 
 
+# endregion
+
+# region sensor history operations
+
+
+@app.get(
+    "/devices/readings",
+    response_model=List[SensorReadingBucket],
+    tags=["Sensor History"],
+)
+def get_sensor_readings(
+    device_uuid: str,
+    quantity: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    bucket_seconds: Optional[int] = Query(None, ge=1),
+    points: int = Query(500, ge=1, le=10000),
+    source: str = "auto",
+    db=Depends(get_db),
+):
+    # Average, min and max per bucket over the range (the last hour by default);
+    # without bucket_seconds the range is split into at most `points` buckets.
+    # source=auto reads the rollups whenever the bucket width allows it.
+    if quantity is not None and quantity not in READING_QUANTITIES.values():
+        raise HTTPException(status_code=400, detail=f"Unknown quantity: {quantity}")
+    end_time = end_time or datetime.now()
+    start_time = start_time or end_time - timedelta(hours=1)
+    if start_time >= end_time:
+        raise HTTPException(
+            status_code=400, detail="start_time must be before end_time"
+        )
+    if bucket_seconds is None:
+        span = (end_time - start_time).total_seconds()
+        bucket_seconds = max(1, math.ceil(span / points))
+        # Rounded up to whole minutes once that many points would not fit
+        # anyway, so the rollups can answer
+        if bucket_seconds > 60:
+            bucket_seconds = math.ceil(bucket_seconds / 60) * 60
+    if source not in ("auto", "raw", "rollup"):
+        raise HTTPException(status_code=400, detail=f"Unknown source: {source}")
+    if source == "auto":
+        rollups = settings.sensor_rollups and db_driver.rollup_period(bucket_seconds)
+        source = "rollup" if rollups else "raw"
+    try:
+        return db_driver.get_sensor_reading_buckets(
+            db, device_uuid, start_time, end_time, bucket_seconds, quantity, source
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get(
+    "/devices/readings/stats",
+    response_model=List[SensorStats],
+    tags=["Sensor History"],
+)
+def get_sensor_reading_stats(
+    quantity: str,
+    device_uuid: Optional[str] = None,
+    window: Optional[float] = Query(None, gt=0),
+    percentiles: List[float] = Query([50, 90, 99]),
+    per_device: bool = False,
+    manager=Depends(get_device_manager),
+):
+    # Over the readings of the last `window` seconds held in memory, for one
+    # device, pooled over all sensors of the quantity, or per_device for each
+    if quantity not in READING_QUANTITIES.values():
+        raise HTTPException(status_code=400, detail=f"Unknown quantity: {quantity}")
+    if manager.reading_buffers is None:
+        raise HTTPException(status_code=404, detail="Sensor buffers are disabled")
+    try:
+        return manager.reading_buffers.stats(
+            quantity, device_uuid, window, percentiles, per_device
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get(
+    "/devices/readings/points",
+    response_model=List[SensorReading],
+    tags=["Sensor History"],
+)
+def get_sensor_reading_points(
+    device_uuid: str,
+    quantity: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    manager=Depends(get_device_manager),
+):
+    # Every reading in the range held in the in-memory archive, decoded from the
+    # compressed chunks that overlap it
+    if quantity not in READING_QUANTITIES.values():
+        raise HTTPException(status_code=400, detail=f"Unknown quantity: {quantity}")
+    if manager.reading_archive is None:
+        raise HTTPException(status_code=404, detail="Reading archive is disabled")
+    timestamps, values = manager.reading_archive.range(
+        device_uuid,
+        quantity,
+        start_time.timestamp() if start_time else None,
+        end_time.timestamp() if end_time else None,
+    )
+    return [
+        SensorReading(
+            device_uuid=device_uuid,
+            quantity=quantity,
+            timestamp=datetime.fromtimestamp(timestamp),
+            value=value,
+        )
+        for timestamp, value in zip(timestamps.tolist(), values.tolist())
+    ]
+
+
+# endregion
+
+# region scheduled sampling
+
+
+@app.get(
+    "/devices/acquisition", response_model=AcquisitionStats, tags=["Sensor History"]
+)
+def get_acquisition_stats(manager=Depends(get_device_manager)):
+    if manager.acquisition is None:
+        raise HTTPException(status_code=404, detail="Scheduled sampling is disabled")
+    return manager.acquisition.stats()
+
+
+@app.put("/devices/acquisition/{device_uuid}", tags=["Sensor History"], status_code=204)
+def set_sampling_interval(
+    device_uuid: str,
+    interval: float = Query(..., ge=0),
+    db=Depends(get_db),
+    manager=Depends(get_device_manager),
+):
+    # Seconds between scheduled reads of the sensor, 0 stops sampling it; not
+    # kept across restarts (see ACQUISITION_INTERVALS)
+    if manager.acquisition is None:
+        raise HTTPException(status_code=404, detail="Scheduled sampling is disabled")
+    try:
+        manager.set_sampling_interval(device_uuid, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    add_record(db, device_uuid, f"Set sampling interval to {interval} s")
+
+
+# endregion
+
+# region alerts
+
+
+def _alert_engine(manager):
+    if manager.alerts is None:
+        raise HTTPException(status_code=404, detail="Alerts are disabled")
+    return manager.alerts
+
+
+@app.get("/devices/alerts/rules", response_model=List[AlertRule], tags=["Alerts"])
+def list_alert_rules(manager=Depends(get_device_manager)):
+    return _alert_engine(manager).rules()
+
+
+@app.put("/devices/alerts/rules", response_model=AlertRule, tags=["Alerts"])
+def set_alert_rule(
+    rule: AlertRule, db=Depends(get_db), manager=Depends(get_device_manager)
+):
+    # Adds the rule, or replaces the rule of the same name
+    if rule.quantity not in READING_QUANTITIES.values():
+        raise HTTPException(
+            status_code=400, detail=f"Unknown quantity: {rule.quantity}"
+        )
+    try:
+        _alert_engine(manager).set_rule(rule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    add_record(db, rule.device_uuid or "", f"Set alert rule {rule.name}")
+    return rule
+
+
+@app.delete("/devices/alerts/rules/{name}", tags=["Alerts"], status_code=204)
+def delete_alert_rule(
+    name: str, db=Depends(get_db), manager=Depends(get_device_manager)
+):
+    if not _alert_engine(manager).remove_rule(name):
+        raise HTTPException(status_code=404, detail=f"Alert rule not found: {name}")
+    add_record(db, description=f"Deleted alert rule {name}")
+
+
+@app.get("/devices/alerts", response_model=List[Alert], tags=["Alerts"])
+def list_alerts(
+    device_uuid: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    manager=Depends(get_device_manager),
+):
+    # The most recent alerts first, after evaluating the readings still queued
+    return _alert_engine(manager).get_recent(device_uuid, limit)
+
+
+@app.get("/devices/alerts/stream", tags=["Alerts"])
+async def stream_alerts(
+    request: Request,
+    device_uuid: Optional[str] = None,
+    quantity: Optional[str] = None,
+    manager=Depends(get_device_manager),
+):
+    # Server-Sent Events stream of alerts as they are raised
+    feed = _alert_engine(manager).feed
+    try:
+        subscription = feed.subscribe(device_uuid, quantity)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return StreamingResponse(
+        log_tail_events(feed, subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
 # endregion
 
 # region dc motor operations
@@ -388,9 +671,6 @@ def get_dc_motor_speed(
 ):
     match_device_type(db, device_uuid, DeviceType.DC_MOTOR)
     try:
-        add_record(
-            db, logged_device_uuid=device_uuid, description=f"Reading dc motor speed"
-        )
         speed = manager.get_dc_motor_speed(device_uuid)
         add_record(
             db,
@@ -417,11 +697,6 @@ def get_dc_motor_direction(
 ):
     match_device_type(db, device_uuid, DeviceType.DC_MOTOR)
     try:
-        add_record(
-            db,
-            logged_device_uuid=device_uuid,
-            description=f"Reading dc motor direction",
-        )
         direction = manager.get_dc_motor_direction(device_uuid)
         add_record(
             db,
@@ -503,11 +778,6 @@ def get_stepper_motor_speed(
 ):
     match_device_type(db, device_uuid, DeviceType.STEPPER_MOTOR)
     try:
-        add_record(
-            db,
-            logged_device_uuid=device_uuid,
-            description=f"Reading stepper motor speed",
-        )
         speed = manager.get_stepper_motor_speed(device_uuid)
         add_record(
             db,
@@ -534,11 +804,6 @@ def get_stepper_motor_direction(
 ):
     match_device_type(db, device_uuid, DeviceType.STEPPER_MOTOR)
     try:
-        add_record(
-            db,
-            logged_device_uuid=device_uuid,
-            description=f"Reading stepper motor direction",
-        )
         direction = manager.get_stepper_motor_direction(device_uuid)
         add_record(
             db,
@@ -565,11 +830,6 @@ def get_stepper_motor_acceleration(
 ):
     match_device_type(db, device_uuid, DeviceType.STEPPER_MOTOR)
     try:
-        add_record(
-            db,
-            logged_device_uuid=device_uuid,
-            description=f"Reading stepper motor acceleration",
-        )
         acceleration = manager.get_stepper_motor_acceleration(device_uuid)
         add_record(
             db,
@@ -596,11 +856,6 @@ def get_stepper_motor_location(
 ):
     match_device_type(db, device_uuid, DeviceType.STEPPER_MOTOR)
     try:
-        add_record(
-            db,
-            logged_device_uuid=device_uuid,
-            description=f"Reading stepper motor location",
-        )
         location = manager.get_stepper_motor_location(device_uuid)
         add_record(
             db,
@@ -759,26 +1014,362 @@ def set_stepper_motor_relative_location(
 
 # endregion
 
+# endregion
+
+# region device group operations
+
+
+@app.get("/groups/", response_model=List[DeviceGroup], tags=["Device Groups"])
+def list_groups(db=Depends(get_db)):
+    add_record(db, description="Listed all device groups")
+    return db_driver.get_groups(db)
+
+
+@app.post("/groups/", response_model=DeviceGroup, tags=["Device Groups"])
+def create_group(
+    group: DeviceGroup, db=Depends(get_db), manager=Depends(get_device_manager)
+):
+    try:
+        created = manager.create_group(group, db)
+    except ValueError as e:
+        add_record(db, description=f"Failed to create group {group.name}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    add_record(db, description=f"Successfully created group {group.name}")
+    return created
+
+
+@app.get("/groups/{group_name}", response_model=DeviceGroup, tags=["Device Groups"])
+def get_group(group_name: str, db=Depends(get_db)):
+    try:
+        add_record(db, description=f"Getting group {group_name}")
+        return db_driver.get_group(db, group_name)
+    except ValueError as e:
+        add_record(db, description=f"Failed to get group {group_name}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.delete("/groups/{group_name}", tags=["Device Groups"], status_code=204)
+def delete_group(
+    group_name: str, db=Depends(get_db), manager=Depends(get_device_manager)
+):
+    try:
+        manager.delete_group(group_name, db)
+    except ValueError as e:
+        add_record(db, description=f"Failed to delete group {group_name}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    add_record(db, description=f"Successfully deleted group {group_name}")
+
+
+@app.put(
+    "/groups/{group_name}/add_device/{device_uuid}",
+    response_model=DeviceGroup,
+    tags=["Device Groups"],
+)
+def add_group_device(
+    group_name: str,
+    device_uuid: str,
+    db=Depends(get_db),
+    manager=Depends(get_device_manager),
+):
+    try:
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Adding device to group {group_name}",
+        )
+        manager.add_group_member(group_name, device_uuid, db)
+        return db_driver.get_group(db, group_name)
+    except ValueError as e:
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Failed to add device to group {group_name}: {str(e)}",
+        )
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.put(
+    "/groups/{group_name}/remove_device/{device_uuid}",
+    response_model=DeviceGroup,
+    tags=["Device Groups"],
+)
+def remove_group_device(
+    group_name: str,
+    device_uuid: str,
+    db=Depends(get_db),
+    manager=Depends(get_device_manager),
+):
+    try:
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Removing device from group {group_name}",
+        )
+        manager.remove_group_member(group_name, device_uuid, db)
+        return db_driver.get_group(db, group_name)
+    except ValueError as e:
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Failed to remove device from group {group_name}: {str(e)}",
+        )
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.post(
+    "/groups/{group_name}/command",
+    response_model=GroupCommandResult,
+    tags=["Device Groups"],
+)
+def send_group_command(
+    group_name: str,
+    command: str,
+    parameter: str = "",
+    db=Depends(get_db),
+    manager=Depends(get_device_manager),
+):
+    try:
+        result = manager.send_group_command(group_name, command, parameter, db)
+    except ValueError as e:
+        add_record(db, description=f"Failed to command group {group_name}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    add_record(
+        db,
+        description=f"Group {group_name} answered {command}: "
+        f"{len(result.responses)} replies, {len(result.missing)} missing",
+    )
+    return result
+
+
+@app.get(
+    "/devices/tags/{device_uuid}", response_model=List[str], tags=["Device Groups"]
+)
+def get_device_tags(device_uuid: str, db=Depends(get_db)):
+    add_record(db, logged_device_uuid=device_uuid, description="Listed device tags")
+    return db_driver.get_device_tags(db, device_uuid)
+
+
+@app.put("/devices/add_tag/{device_uuid}", tags=["Device Groups"], status_code=204)
+def add_device_tag(device_uuid: str, tag: str, db=Depends(get_db)):
+    try:
+        add_record(db, logged_device_uuid=device_uuid, description=f"Adding tag {tag}")
+        db_driver.add_tag(db, device_uuid, tag)
+    except ValueError as e:
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Failed to add tag {tag}: {str(e)}",
+        )
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.put("/devices/remove_tag/{device_uuid}", tags=["Device Groups"], status_code=204)
+def remove_device_tag(device_uuid: str, tag: str, db=Depends(get_db)):
+    try:
+        add_record(
+            db, logged_device_uuid=device_uuid, description=f"Removing tag {tag}"
+        )
+        db_driver.remove_tag(db, device_uuid, tag)
+    except ValueError as e:
+        add_record(
+            db,
+            logged_device_uuid=device_uuid,
+            description=f"Failed to remove tag {tag}: {str(e)}",
+        )
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/devices/tag/{tag}", response_model=List[SimDevice], tags=["Device Groups"])
+def get_devices_by_tag(
+    tag: str, db=Depends(get_db), manager=Depends(get_device_manager)
+):
+    add_record(db, description=f"Listed devices tagged {tag}")
+    return [
+        manager.state_writer.apply(device)
+        for device in db_driver.get_devices_by_tag(db, tag)
+    ]
+
+
 # endregion
 
 # region logging operations
 
 
+# Log listings are paged, the cursor for the next page is in X-Next-Cursor
+LOG_PAGE_SIZE = 100
+LOG_PAGE_SIZE_MAX = 1000
+
+
+def _logs_page(response: Response, db, limit: int, cursor, **filters):
+    try:
+        logs, next_cursor = db_driver.get_logs_page(db, limit, cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return logs
+
+
 @app.get("/logs/", response_model=List[LogRecord], tags=["Log Management"])
-def list_logs(db=Depends(get_db)):
-    add_record(db, description="Listed all log records")
+def list_logs(
+    response: Response,
+    limit: int = Query(LOG_PAGE_SIZE, ge=1, le=LOG_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+    user: Optional[str] = None,
+    description: Optional[str] = None,
+    db=Depends(get_db),
+):
+    add_record(db, description="Listed log records")
     # return db.get_log()
-    return db_driver.get_logs(db)
+    return _logs_page(
+        response,
+        db,
+        limit,
+        cursor,
+        device_uuid=device_uuid,
+        action=action,
+        user=user,
+        description=description,
+    )
 
 
 @app.get("/logs/filtered", response_model=List[LogRecord], tags=["Log Management"])
 def list_logs_by_time(
+    response: Response,
     start_time: datetime = "YYYY-MM-DDThh:mm:ss",
     end_time: datetime = "YYYY-MM-DDThh:mm:ss",
+    limit: int = Query(LOG_PAGE_SIZE, ge=1, le=LOG_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+    user: Optional[str] = None,
+    description: Optional[str] = None,
     db=Depends(get_db),
 ):
     add_record(db, description=f"Listed log records from {start_time} to {end_time}")
-    return db_driver.get_logs_by_time(db, start_time, end_time)
+    return _logs_page(
+        response,
+        db,
+        limit,
+        cursor,
+        start_time=start_time,
+        end_time=end_time,
+        device_uuid=device_uuid,
+        action=action,
+        user=user,
+        description=description,
+    )
+
+
+@app.get("/logs/export", tags=["Log Management"])
+def export_logs(
+    export_format: str = Query("ndjson", alias="format"),
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+    user: Optional[str] = None,
+    description: Optional[str] = None,
+    db=Depends(get_db),
+):
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"Unsupported export format: {export_format}"
+        )
+    add_record(db, description=f"Exported log records as {export_format}")
+    exporter = export_ndjson if export_format == "ndjson" else export_csv_gzip
+    media_type, filename = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        exporter(
+            start_time=start_time,
+            end_time=end_time,
+            device_uuid=device_uuid,
+            action=action,
+            user=user,
+            description=description,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/logs/tail", tags=["Log Management"])
+async def tail_logs(
+    request: Request,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+):
+    # Server-Sent Events stream of new audit records, served from memory
+    tail = get_log_tail()
+    try:
+        subscription = tail.subscribe(device_uuid, action)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return StreamingResponse(
+        log_tail_events(tail, subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/logs/stats", response_model=LogSinkStats, tags=["Log Management"])
+def get_log_stats():
+    return get_log_sink().stats()
+
+
+@app.get("/logs/aggregate", response_model=List[LogAggregate], tags=["Log Management"])
+def aggregate_logs(
+    bucket: str = "hour",
+    group_by: List[str] = Query([]),
+    source: str = "raw",
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+    db=Depends(get_db),
+):
+    # source=rollup reads the hourly rollups instead of scanning log_records
+    if source not in ("raw", "rollup"):
+        raise HTTPException(status_code=400, detail=f"Unknown source: {source}")
+    aggregate = (
+        db_driver.aggregate_logs if source == "raw" else db_driver.aggregate_log_rollups
+    )
+    try:
+        return aggregate(
+            db,
+            bucket,
+            group_by,
+            start_time=start_time,
+            end_time=end_time,
+            device_uuid=device_uuid,
+            action=action,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/logs/daily", response_model=List[LogDailyCount], tags=["Log Management"])
+def list_daily_log_counts(
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    db=Depends(get_db),
+):
+    return [
+        LogDailyCount(
+            day=summary.day,
+            records=summary.records,
+            errors=summary.errors,
+            purged=summary.purged_at is not None,
+        )
+        for summary in db_driver.get_log_daily_counts(db, start_day, end_day)
+    ]
+
+
+@app.get("/logs/retention", response_model=LogRetentionStats, tags=["Log Management"])
+def get_log_retention_stats():
+    return get_log_retention().stats()
 
 
 @app.post("/logs/", response_model=LogRecord, tags=["Log Management"])
@@ -786,7 +1377,7 @@ def create_entry(action: str, description: str, db=Depends(get_db)):
     try:
         record = LogRecord(
             uuid=uuid.uuid4(),
-            user=f"{socket.gethostname()}-{socket.gethostbyname(socket.gethostname())}",
+            user=host_identity(),
             device_uuid="",
             action=action,
             description=description,
@@ -794,6 +1385,7 @@ def create_entry(action: str, description: str, db=Depends(get_db)):
         )
         # db.add_log(record)
         db_driver.add_log(db, record)
+        get_log_tail().publish(record)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     return record
@@ -0,0 +1,176 @@
+import json
+import random
+import re
+import socket
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Optional, Tuple
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from .config import settings
+from .schemas import LogRecord
+from .drivers.log_sink import get_log_sink
+
+
+@lru_cache(maxsize=None)
+def host_identity() -> str:
+    # Resolved once per process instead of a DNS lookup for every record
+    hostname = socket.gethostname()
+    try:
+        address = socket.gethostbyname(hostname)
+    except OSError:
+        address = "unknown"
+    return f"{hostname}-{address}"
+
+
+class AuditContext:
+    # Collects what a request did and is written as a single log record when the
+    # request ends, together with its outcome and duration
+    def __init__(self, action: str, parameters: str = "", device_uuid: str = ""):
+        self.action = action
+        self.parameters = parameters
+        self.device_uuid = device_uuid
+        self.description = ""
+        self.error = None
+        self.used = False
+        self.timestamp = datetime.now()
+        self._start = time.perf_counter()
+
+    def note(self, device_uuid: str = "", description: str = ""):
+        self.used = True
+        if device_uuid:
+            self.device_uuid = device_uuid
+        if description:
+            self.description = description
+
+    def to_record(self, status: str) -> LogRecord:
+        return LogRecord(
+            uuid=uuid.uuid4(),
+            user=host_identity(),
+            device_uuid=self.device_uuid,
+            action=self.action,
+            description=self.description,
+            timestamp=self.timestamp,
+            status=status,
+            duration_ms=round((time.perf_counter() - self._start) * 1000, 3),
+            parameters=self.parameters,
+            error=self.error,
+        )
+
+
+# Requests with other methods change state and are always logged
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+_SAMPLED = re.compile(r"sampled\(\s*([0-9.]+)\s*\)")
+
+
+def parse_audit_policy(policy: str) -> Tuple[str, float]:
+    # Returns the policy kind and the share of requests it logs
+    policy = policy.strip().lower()
+    if policy == "all":
+        return "all", 1.0
+    if policy == "failures-only":
+        return "failures-only", 0.0
+    if policy == "off":
+        return "off", 0.0
+    match = _SAMPLED.fullmatch(policy)
+    if match:
+        rate = float(match.group(1))
+        if 0.0 <= rate <= 1.0:
+            return "sampled", rate
+    raise ValueError(f"Invalid audit policy: {policy}")
+
+
+@lru_cache(maxsize=None)
+def audit_policy(action: str) -> Tuple[str, float]:
+    policy = settings.audit_policies.get(action)
+    if policy is None:
+        policy = next(
+            (
+                policy
+                for pattern, policy in settings.audit_policies.items()
+                if fnmatchcase(action, pattern)
+            ),
+            settings.audit_default_policy,
+        )
+    return parse_audit_policy(policy)
+
+
+def should_record(policy: Tuple[str, float], status: str) -> bool:
+    kind, rate = policy
+    if kind == "all":
+        return True
+    if kind == "sampled":
+        # Failures are always kept, successes with the given probability
+        return status == "error" or random.random() < rate
+    if kind == "failures-only":
+        return status == "error"
+    return False
+
+
+_current_audit: ContextVar[Optional[AuditContext]] = ContextVar(
+    "audit_context", default=None
+)
+
+
+def current_audit() -> Optional[AuditContext]:
+    return _current_audit.get()
+
+
+def _parameters(request) -> str:
+    parameters = {**request.path_params, **request.query_params}
+    return json.dumps(parameters, sort_keys=True) if parameters else ""
+
+
+async def _emit(record: LogRecord):
+    sink = get_log_sink()
+    # Inserting, or waiting for room in a full queue, stays off the event loop
+    if sink.blocks():
+        await run_in_threadpool(sink.submit, record)
+    else:
+        sink.submit(record)
+
+
+class AuditedRoute(APIRoute):
+    # Binds the endpoint's name as the audit action when the route is registered
+    # and gives each request an AuditContext. Requests whose endpoint recorded
+    # something, and every failed request, are logged once after the response
+    # is built, as far as the endpoint's audit policy allows.
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        action = self.endpoint.__name__
+        mutating = bool(self.methods - READ_METHODS)
+        # A misconfigured policy fails at startup rather than on first request
+        audit_policy(action)
+
+        async def audited_handler(request):
+            context = AuditContext(
+                action,
+                _parameters(request),
+                request.path_params.get("device_uuid")
+                or request.query_params.get("device_uuid", ""),
+            )
+            token = _current_audit.set(context)
+            status = "error"
+            try:
+                response = await handler(request)
+                if response.status_code < 400:
+                    status = "ok"
+                return response
+            except Exception as e:
+                context.error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                _current_audit.reset(token)
+                if (context.used or status == "error") and (
+                    mutating or should_record(audit_policy(action), status)
+                ):
+                    try:
+                        await _emit(context.to_record(status))
+                    except Exception as e:
+                        print(f"Failed to record {action}: {e}")
+
+        return audited_handler
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 
@@ -15,8 +16,95 @@ class Settings(BaseSettings):
     database_host: str = "db"
     database_port: int = 3306
     database_name: str = "sim_device_control"
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    # Device rows are written behind in coalesced batches; disable to write through
+    device_state_write_behind: bool = True
+    device_state_flush_interval: float = 1.0
+    device_state_flush_max_pending: int = 256
+    # Audit records are queued and bulk inserted by a writer thread ("batched"),
+    # inserted inside the request ("direct") or written to a local journal and
+    # shipped from there ("journal"). A full queue blocks the request, or drops
+    # the oldest/newest record depending on audit_log_overflow.
+    audit_log_sink: str = "batched"
+    audit_log_queue_size: int = 10000
+    audit_log_batch_size: int = 500
+    audit_log_flush_interval: float = 0.5
+    audit_log_overflow: str = "block"
+    # "journal" sink: records are appended to segment files in this directory,
+    # fsynced every audit_journal_fsync_interval seconds, and shipped from there
+    audit_journal_dir: str = "audit-journal"
+    audit_journal_segment_bytes: int = 16 * 1024 * 1024
+    audit_journal_fsync_interval: float = 0.2
+    # Which requests are logged: "all", "failures-only", "sampled(<rate>)" or
+    # "off", per endpoint name (or fnmatch pattern such as "read_*") in
+    # audit_policies, audit_default_policy otherwise. Requests that change
+    # something (anything but GET) are always logged.
+    audit_default_policy: str = "all"
+    audit_policies: Dict[str, str] = {}
+    # Log records older than log_retention_days are purged a day at a time by a
+    # background job (archived as gzip CSV to log_archive_dir first, when set).
+    # Purging is opt-in: 0 keeps every record.
+    log_retention_days: int = 0
+    log_retention_interval: float = 3600.0
+    log_archive_dir: Optional[str] = None
+    # MySQL: search log descriptions by word through a FULLTEXT index instead of
+    # a substring scan
+    log_fulltext_search: bool = False
+    # Keep hourly per device/action/outcome rollups of log records up to date on
+    # insert, for GET /logs/aggregate?source=rollup
+    log_rollups: bool = True
+    # GET /logs/tail: live subscribers allowed at once, and records buffered per
+    # subscriber before the oldest are dropped
+    log_tail_max_subscribers: int = 100
+    log_tail_buffer: int = 1000
+    # Numeric sensor readings are kept in sensor_readings, queued and bulk
+    # inserted by a writer thread (the oldest are dropped when the queue is full)
+    sensor_history: bool = True
+    sensor_history_queue_size: int = 100000
+    sensor_history_batch_size: int = 1000
+    sensor_history_flush_interval: float = 1.0
+    # Keep per minute/hour/day rollups of the readings up to date on insert, for
+    # GET /devices/readings?source=rollup
+    sensor_rollups: bool = True
+    # Most recent readings kept in memory per sensor for GET
+    # /devices/readings/stats (NumPy ring buffers); 0 turns them off
+    sensor_buffer_capacity: int = 600
+    # Readings of the last sensor_archive_hours kept in memory as compressed
+    # chunks of sensor_archive_chunk_size readings, for GET
+    # /devices/readings/points; 0 turns the archive off. Values are kept exactly
+    # unless sensor_archive_precision rounds them to that many decimals.
+    sensor_archive_hours: float = 24.0
+    sensor_archive_chunk_size: int = 1024
+    sensor_archive_precision: Optional[int] = None
+    # Alert rules (AlertRule fields, as a JSON list) evaluated on every reading;
+    # readings are queued and evaluated in batches every alert_interval seconds
+    alerts: bool = True
+    alert_rules: List[Dict[str, Any]] = []
+    alert_interval: float = 0.1
+    alert_queue_size: int = 100000
+    # Recent alerts kept for GET /devices/alerts, and GET /devices/alerts/stream
+    # subscribers and their buffers
+    alert_history: int = 1000
+    alert_max_subscribers: int = 100
+    alert_buffer: int = 1000
+    # Sample every sensor every acquisition_interval seconds, or at the interval
+    # set for its uuid or device type (e.g. "temperature_sensor") in
+    # acquisition_intervals; 0 leaves a sensor out. Reads run on
+    # acquisition_workers threads, acquisition_batch_size sensors per batch.
+    acquisition: bool = False
+    acquisition_interval: float = 10.0
+    acquisition_intervals: Dict[str, float] = {}
+    acquisition_workers: int = 4
+    acquisition_batch_size: int = 50
     mqtt_broker: str = "mqtt-broker"
     mqtt_port: int = 1883
+    # Seconds to wait for a device to reply to a command
+    mqtt_command_timeout: float = 5.0
+    # Without MQTT, answer device commands from the in-process fleet simulator
+    fleet_simulation: bool = False
+    fleet_simulation_seed: Optional[int] = None
+    fleet_simulation_tick: float = 0.1
 
 
 settings = Settings()
@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Sensor reads the scheduler can sample, looked up on a driver in this order
+SENSOR_READS = ("read_temperature", "read_pressure", "read_humidity")
+
+
+def sensor_read(driver) -> Optional[str]:
+    for command in SENSOR_READS:
+        if hasattr(driver, command):
+            return command
+    return None
+
+
+def percentile_summary(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[last // 2],
+        "p99": ordered[last * 99 // 100],
+        "max": ordered[last],
+    }
+
+
+class SampledSensor:
+    def __init__(self, uuid: str, command: str, interval: float, due: float):
+        self.uuid = uuid
+        self.command = command
+        self.interval = interval
+        self.due = due
+        self.in_flight = False
+        self.samples = 0
+        self.missed = 0
+        self.failures = 0
+
+
+class AcquisitionScheduler:
+    # Samples every sensor at its own interval. Deadlines sit in a heap served by
+    # one timer thread; the reads due together are grouped per command, split into
+    # batches of batch_size and run on a small worker pool (each read is a
+    # blocking MQTT round trip), and each batch's values reach the sink at once.
+    #
+    # A sensor's first deadline is offset into its interval by a hash of its uuid,
+    # so sensors sharing a rate are spread over the interval instead of all coming
+    # due at the same instant. Later deadlines advance by whole intervals from the
+    # previous deadline, not from when the read happened, so lateness never
+    # accumulates; a deadline that passes while the sensor's previous read is
+    # still running, or that the timer only reaches after the next one, is
+    # skipped and counted as missed.
+    def __init__(
+        self,
+        read: Callable[[str, str], float],
+        sink: Callable[[str, Dict[str, float]], None],
+        workers: int = 4,
+        batch_size: int = 50,
+        batch_window: float = 0.01,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.read = read
+        self.sink = sink
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.clock = clock
+
+        self._sensors: Dict[str, SampledSensor] = {}
+        self._heap: List = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._executor = None
+
+        # Seconds between a deadline and the start of its read, and read times
+        self.lateness: Deque[float] = deque(maxlen=10000)
+        self.read_times: Deque[float] = deque(maxlen=10000)
+        self.samples = 0
+        self.missed = 0
+        self.failures = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="acquisition"
+            )
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                delay = self._heap[0][0] - self.clock() if self._heap else None
+                if delay is None or delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                batches = self._pop_due(self.clock())
+            for command, reads in batches:
+                try:
+                    self._executor.submit(self._read_batch, command, reads)
+                except RuntimeError:
+                    # Shutting down
+                    return
+
+    # region schedule
+
+    def schedule(self, uuid: str, command: str, interval: float):
+        # A new interval starts a new phase; 0 or less stops sampling the sensor
+        with self._cond:
+            if interval <= 0:
+                self._sensors.pop(uuid, None)
+                return
+            phase = zlib.crc32(uuid.encode()) / 2**32 * interval
+            sensor = self._sensors.get(uuid)
+            if sensor is None:
+                sensor = self._sensors[uuid] = SampledSensor(uuid, command, interval, 0)
+            sensor.command = command
+            sensor.interval = interval
+            sensor.due = self.clock() + phase
+            heapq.heappush(self._heap, (sensor.due, next(self._order), sensor))
+            self._cond.notify()
+
+    def remove(self, uuid: str):
+        with self._cond:
+            self._sensors.pop(uuid, None)
+
+    def _pop_due(self, now: float) -> List:
+        # Reads due by now (or within batch_window of it), grouped per command in
+        # batches; stale heap entries of removed or rescheduled sensors are skipped
+        due: Dict[str, List[Tuple[str, float]]] = {}
+        while self._heap and self._heap[0][0] <= now + self.batch_window:
+            deadline, _, sensor = heapq.heappop(self._heap)
+            if self._sensors.get(sensor.uuid) is not sensor or deadline != sensor.due:
+                continue
+            if sensor.in_flight:
+                sensor.missed += 1
+                self.missed += 1
+            else:
+                sensor.in_flight = True
+                due.setdefault(sensor.command, []).append((sensor.uuid, deadline))
+            skipped = max(0, int((now - deadline) // sensor.interval))
+            sensor.missed += skipped
+            self.missed += skipped
+            sensor.due = deadline + (skipped + 1) * sensor.interval
+            heapq.heappush(self._heap, (sensor.due, next(self._order), sensor))
+        return [
+            (command, reads[i : i + self.batch_size])
+            for command, reads in due.items()
+            for i in range(0, len(reads), self.batch_size)
+        ]
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        # Reads everything due by `now` in the calling thread
+        with self._cond:
+            batches = self._pop_due(self.clock() if now is None else now)
+        return sum(self._read_batch(command, reads, now) for command, reads in batches)
+
+    # endregion
+
+    def _read_batch(
+        self, command: str, reads: List[Tuple[str, float]], now: Optional[float] = None
+    ) -> int:
+        # Lateness is taken when each read starts, so it includes the time spent
+        # waiting for a free worker
+        values: Dict[str, float] = {}
+        for uuid, deadline in reads:
+            late = max(0.0, (self.clock() if now is None else now) - deadline)
+            started = time.perf_counter()
+            try:
+                values[uuid] = float(self.read(uuid, command))
+            except Exception as e:
+                print(f"Failed to sample {uuid}: {e}")
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._cond:
+                    self.lateness.append(late)
+                    self.read_times.append(elapsed)
+                    sensor = self._sensors.get(uuid)
+                    if sensor is not None:
+                        sensor.in_flight = False
+                        if uuid in values:
+                            sensor.samples += 1
+                        else:
+                            sensor.failures += 1
+                    if uuid in values:
+                        self.samples += 1
+                    else:
+                        self.failures += 1
+        if values:
+            try:
+                self.sink(command, values)
+            except Exception as e:
+                print(f"Failed to record sampled readings: {e}")
+        return len(values)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            lateness = percentile_summary(self.lateness)
+            read_times = percentile_summary(self.read_times)
+            return {
+                "sensors": len(self._sensors),
+                "samples": self.samples,
+                "missed": self.missed,
+                "failures": self.failures,
+                "lateness_ms": {k: v * 1e3 for k, v in lateness.items()},
+                "read_ms": {k: v * 1e3 for k, v in read_times.items()},
+                "schedule": [
+                    {
+                        "device_uuid": sensor.uuid,
+                        "command": sensor.command,
+                        "interval": sensor.interval,
+                        "samples": sensor.samples,
+                        "missed": sensor.missed,
+                        "failures": sensor.failures,
+                    }
+                    for sensor in self._sensors.values()
+                ],
+            }
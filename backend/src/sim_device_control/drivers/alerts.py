@@ -0,0 +1,402 @@
+import asyncio
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..schemas import Alert, AlertRule
+from .log_tail import LogSubscription, LogTail
+
+ALERT_KINDS = ("threshold", "rate", "zscore")
+
+
+def check_rule(rule: AlertRule):
+    if rule.kind not in ALERT_KINDS:
+        raise ValueError(f"Unknown alert kind: {rule.kind}")
+    if rule.kind == "threshold" and rule.low is None and rule.high is None:
+        raise ValueError("A threshold rule needs low, high or both")
+    if rule.kind != "threshold" and (rule.limit is None or rule.limit <= 0):
+        raise ValueError(f"A {rule.kind} rule needs a positive limit")
+    if rule.window < 1 or rule.min_samples < 1:
+        raise ValueError("window and min_samples must be at least 1")
+
+
+def _grow(array: np.ndarray, rows: int, fill) -> np.ndarray:
+    return np.concatenate([array, np.full(rows - len(array), fill, array.dtype)])
+
+
+class QuantityState:
+    # What the rules remember of the devices reporting one quantity, one row per
+    # device: the previous reading (rate rules) and, per rule, whether it is
+    # firing and the exponentially weighted mean and variance (z-score rules)
+    def __init__(self, rows: int = 64):
+        self.index: Dict[str, int] = {}
+        self.uuids: List[str] = []
+        self.last_time = np.full(rows, np.nan)
+        self.last_value = np.full(rows, np.nan)
+        self.rules: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def rows(self, uuids: Sequence[str]) -> np.ndarray:
+        rows = []
+        for uuid_ in uuids:
+            row = self.index.get(uuid_)
+            if row is None:
+                row = self.index[uuid_] = len(self.uuids)
+                self.uuids.append(uuid_)
+            rows.append(row)
+        size = len(self.last_time)
+        if len(self.uuids) > size:
+            while size < len(self.uuids):
+                size *= 2
+            self.last_time = _grow(self.last_time, size, np.nan)
+            self.last_value = _grow(self.last_value, size, np.nan)
+            for state in self.rules.values():
+                for key, array in state.items():
+                    state[key] = _grow(array, size, 0)
+        return np.array(rows, dtype=np.int64)
+
+    def rule_state(self, name: str) -> Dict[str, np.ndarray]:
+        state = self.rules.get(name)
+        if state is None:
+            size = len(self.last_time)
+            state = self.rules[name] = {
+                "active": np.zeros(size, dtype=bool),
+                "mean": np.zeros(size),
+                "var": np.zeros(size),
+                "count": np.zeros(size, dtype=np.int64),
+            }
+        return state
+
+    def reset(self, uuid_: str):
+        row = self.index.get(uuid_)
+        if row is None:
+            return
+        self.last_time[row] = np.nan
+        self.last_value[row] = np.nan
+        for state in self.rules.values():
+            for array in state.values():
+                array[row] = 0
+
+
+class AlertSubscription(LogSubscription):
+    # Alerts for one live client, optionally only of one device and/or quantity
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        device_uuid: Optional[str] = None,
+        quantity: Optional[str] = None,
+        max_buffer: int = 1000,
+    ):
+        super().__init__(loop, device_uuid, None, max_buffer)
+        self.quantity = quantity
+
+    def matches(self, alert: Alert) -> bool:
+        return (self.device_uuid is None or alert.device_uuid == self.device_uuid) and (
+            self.quantity is None or alert.quantity == self.quantity
+        )
+
+
+class AlertFeed(LogTail):
+    # The live tail fan-out (see log_tail), carrying alerts
+    def subscribe(
+        self, device_uuid: Optional[str] = None, quantity: Optional[str] = None
+    ) -> AlertSubscription:
+        subscription = AlertSubscription(
+            asyncio.get_running_loop(), device_uuid, quantity, self.max_buffer
+        )
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise ValueError("Too many live alert subscribers")
+            self._subscribers.append(subscription)
+        return subscription
+
+
+class AlertEngine:
+    # Evaluates the alert rules against readings in batches: readings are queued
+    # as they arrive and a worker thread evaluates everything queued every
+    # `interval` seconds, with one vectorized pass per quantity and rule over all
+    # devices. An alert is raised when a rule starts matching a device and again
+    # when it stops, not for every matching reading.
+    def __init__(
+        self,
+        rules: Sequence[AlertRule] = (),
+        interval: float = 0.1,
+        max_queue_size: int = 100000,
+        history: int = 1000,
+        feed: Optional[AlertFeed] = None,
+    ):
+        self.interval = interval
+        self.max_queue_size = max_queue_size
+        self.feed = feed or AlertFeed()
+        self.recent: Deque[Alert] = deque(maxlen=history)
+
+        self._rules: Dict[str, AlertRule] = {}
+        self._states: Dict[str, QuantityState] = {}
+        self._queue: Deque[Tuple] = deque()
+        self._queued = 0
+        self._lock = threading.Lock()
+        self._eval_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.evaluated = 0
+        self.raised = 0
+        self.dropped = 0
+
+        for rule in rules:
+            self.set_rule(rule)
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Failed to evaluate alert rules: {e}")
+
+    # region rules
+
+    def rules(self) -> List[AlertRule]:
+        with self._eval_lock:
+            return list(self._rules.values())
+
+    def set_rule(self, rule: AlertRule):
+        # A replaced rule starts over, without state from its previous version
+        check_rule(rule)
+        with self._eval_lock:
+            self._rules[rule.name] = rule
+            for state in self._states.values():
+                state.rules.pop(rule.name, None)
+
+    def remove_rule(self, name: str) -> bool:
+        with self._eval_lock:
+            if self._rules.pop(name, None) is None:
+                return False
+            for state in self._states.values():
+                state.rules.pop(name, None)
+            return True
+
+    def remove_device(self, device_uuid: str):
+        with self._eval_lock:
+            for state in self._states.values():
+                state.reset(device_uuid)
+
+    # endregion
+
+    # region readings
+
+    def record(self, device_uuid: str, quantity: str, timestamp: float, value: float):
+        self.submit(quantity, [device_uuid], [timestamp], [value])
+
+    def submit(
+        self,
+        quantity: str,
+        uuids: Sequence[str],
+        timestamps: Sequence[float],
+        values: Sequence[float],
+    ):
+        # Queued as submitted, a group command's replies stay one batch
+        if not self._rules or not len(uuids):
+            return
+        batch = (
+            quantity,
+            list(uuids),
+            np.asarray(timestamps, dtype=float),
+            np.asarray(values, dtype=float),
+        )
+        with self._lock:
+            self._queue.append(batch)
+            self._queued += len(uuids)
+            # Whole batches are dropped, the oldest first
+            while self._queued > self.max_queue_size and len(self._queue) > 1:
+                dropped = len(self._queue.popleft()[1])
+                self._queued -= dropped
+                self.dropped += dropped
+
+    def flush(self) -> List[Alert]:
+        # Evaluates everything queued so far, in arrival order per device
+        with self._eval_lock:
+            with self._lock:
+                pending = list(self._queue)
+                self._queue.clear()
+                evaluated, self._queued = self._queued, 0
+            batches: Dict[str, List[Tuple]] = {}
+            for batch in pending:
+                batches.setdefault(batch[0], []).append(batch[1:])
+            alerts = []
+            for quantity, parts in batches.items():
+                alerts += self._evaluate(
+                    quantity,
+                    [uuid_ for part in parts for uuid_ in part[0]],
+                    np.concatenate([part[1] for part in parts]),
+                    np.concatenate([part[2] for part in parts]),
+                )
+            self.evaluated += evaluated
+            self.raised += len(alerts)
+            self.recent.extend(alerts)
+        for alert in alerts:
+            self.feed.publish(alert)
+        return alerts
+
+    def get_recent(
+        self, device_uuid: Optional[str] = None, limit: int = 100
+    ) -> List[Alert]:
+        self.flush()
+        with self._eval_lock:
+            alerts = [
+                alert
+                for alert in reversed(self.recent)
+                if device_uuid is None or alert.device_uuid == device_uuid
+            ]
+        return alerts[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": self._queued,
+                "evaluated": self.evaluated,
+                "raised": self.raised,
+                "dropped": self.dropped,
+            }
+
+    # endregion
+
+    # region evaluation
+
+    def _evaluate(
+        self,
+        quantity: str,
+        uuids: Sequence[str],
+        timestamps: np.ndarray,
+        values: np.ndarray,
+    ) -> List[Alert]:
+        rules = [rule for rule in self._rules.values() if rule.quantity == quantity]
+        if not rules:
+            return []
+        state = self._states.get(quantity)
+        if state is None:
+            state = self._states[quantity] = QuantityState()
+        rows = state.rows(uuids)
+        # Readings of the same device within a batch depend on each other, they
+        # are evaluated in rounds holding at most one reading per device
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        counts = np.diff(np.r_[starts, len(rows)])
+        rank = np.empty(len(rows), dtype=np.int64)
+        rank[order] = np.arange(len(rows)) - np.repeat(starts, counts)
+        alerts = []
+        for round_ in range(int(rank.max()) + 1):
+            selected = np.flatnonzero(rank == round_)
+            alerts += self._evaluate_round(
+                state,
+                rules,
+                quantity,
+                rows[selected],
+                timestamps[selected],
+                values[selected],
+            )
+        return alerts
+
+    def _evaluate_round(
+        self,
+        state: QuantityState,
+        rules: List[AlertRule],
+        quantity: str,
+        rows: np.ndarray,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+    ) -> List[Alert]:
+        # NaN where there is no earlier reading to compare against
+        elapsed = timestamps - state.last_time[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(
+                elapsed > 0, (values - state.last_value[rows]) / elapsed, np.nan
+            )
+        alerts = []
+        for rule in rules:
+            if rule.device_uuid is None:
+                applies = np.ones(len(rows), dtype=bool)
+            elif rule.device_uuid in state.index:
+                applies = rows == state.index[rule.device_uuid]
+            else:
+                continue
+            rule_state = state.rule_state(rule.name)
+            if rule.kind == "threshold":
+                scores = None
+                matched = np.zeros(len(rows), dtype=bool)
+                if rule.low is not None:
+                    matched |= values < rule.low
+                if rule.high is not None:
+                    matched |= values > rule.high
+            elif rule.kind == "rate":
+                scores = rates
+                matched = np.abs(rates) > rule.limit
+            else:
+                scores = self._zscores(rule, rule_state, rows, values, applies)
+                matched = np.abs(scores) > rule.limit
+            active = rule_state["active"][rows]
+            changed = np.flatnonzero(applies & (matched != active))
+            rule_state["active"][rows[applies]] = matched[applies]
+            for i in changed:
+                alerts.append(
+                    Alert.model_construct(
+                        uuid=uuid.uuid4(),
+                        rule=rule.name,
+                        kind=rule.kind,
+                        state="firing" if matched[i] else "resolved",
+                        device_uuid=state.uuids[rows[i]],
+                        quantity=quantity,
+                        timestamp=datetime.fromtimestamp(timestamps[i]),
+                        value=float(values[i]),
+                        score=None if scores is None else float(scores[i]),
+                    )
+                )
+        state.last_time[rows] = timestamps
+        state.last_value[rows] = values
+        return alerts
+
+    def _zscores(
+        self,
+        rule: AlertRule,
+        rule_state: Dict[str, np.ndarray],
+        rows: np.ndarray,
+        values: np.ndarray,
+        applies: np.ndarray,
+    ) -> np.ndarray:
+        # Each reading is scored against the mean and variance of the readings
+        # before it, then folded into them with weight 2 / (window + 1). Until
+        # there are `window` readings the weight is 1 / count, the plain running
+        # mean and variance, so early readings are not over-weighted.
+        mean = rule_state["mean"][rows]
+        var = rule_state["var"][rows]
+        count = rule_state["count"][rows]
+        std = np.sqrt(var)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(
+                (count >= rule.min_samples) & (std > 0), (values - mean) / std, np.nan
+            )
+        alpha = np.maximum(1 / (count + 1), 2 / (rule.window + 1))
+        delta = values - mean
+        updated = rows[applies]
+        rule_state["mean"][updated] = (mean + alpha * delta)[applies]
+        rule_state["var"][updated] = ((1 - alpha) * (var + alpha * delta * delta))[
+            applies
+        ]
+        rule_state["count"][updated] += 1
+        return scores
+
+    # endregion
@@ -0,0 +1,148 @@
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from ...config import settings
+from .base_sensor import BaseSensorDriver
+from .base_controller import BaseControllerDriver
+
+
+class DeviceCommand(NamedTuple):
+    # MQTT command sent to the device
+    command: str
+    # Driver attribute mirroring the value locally (and answering reads without MQTT)
+    attribute: Optional[str] = None
+    # Converts a reply (reads) or a command parameter string (writes) to a value
+    parse: Optional[Callable[[Any], Any]] = None
+    # Converts a written value to the MQTT parameter string
+    format: Callable[[Any], str] = str
+    # Produces a read value when MQTT is disabled and there is no attribute
+    simulate: Optional[Callable[[Any], Any]] = None
+    # Updates local state on writes, defaults to setting `attribute`
+    apply: Optional[Callable[[Any, Any], None]] = None
+    # Raises ValueError for values the device would reject
+    validate: Optional[Callable[[Any], None]] = None
+
+
+class CommandDriver:
+    # Generic driver engine, device types only declare their command tables
+    reads: Dict[str, DeviceCommand] = {}
+    writes: Dict[str, DeviceCommand] = {}
+    state: Dict[str, Any] = {}
+    simulated_name: str = "Simulated Device"
+    simulated_description: str = "A simulated device for testing purposes."
+
+    common_reads: Dict[str, DeviceCommand] = {
+        "status": DeviceCommand("get_status", simulate=lambda driver: "Simulation"),
+        "version": DeviceCommand("get_version", simulate=lambda driver: "1.0.0"),
+        "name": DeviceCommand(
+            "get_name", simulate=lambda driver: driver.simulated_name
+        ),
+        "description": DeviceCommand(
+            "get_description", simulate=lambda driver: driver.simulated_description
+        ),
+    }
+    common_writes: Dict[str, DeviceCommand] = {
+        "name": DeviceCommand("set_name"),
+        "description": DeviceCommand("set_description"),
+    }
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Command lookups are built once per device type rather than per call
+        cls._read_table = {**CommandDriver.common_reads, **cls.reads}
+        cls._write_table = {**CommandDriver.common_writes, **cls.writes}
+        cls._commands = {
+            **{spec.command: (False, spec) for spec in cls._read_table.values()},
+            **{spec.command: (True, spec) for spec in cls._write_table.values()},
+        }
+
+    def __init__(self, uuid: str):
+        self.uuid = uuid
+        self.cmd_topic = f"sim-device-control/{uuid}/command"
+        self.reply_topic = f"sim-device-control/{uuid}/response"
+        self.timeout = settings.mqtt_command_timeout
+        for attribute, value in self.state.items():
+            setattr(self, attribute, value)
+
+    def _send(self, command: str, parameter: str, mqtt_session):
+        json_response = mqtt_session.send_command_and_wait(
+            cmd_topic=self.cmd_topic,
+            reply_topic=self.reply_topic,
+            command=command,
+            parameter=parameter,
+            timeout=self.timeout,
+        )
+        return json_response["response"]
+
+    def _read_spec(self, spec: DeviceCommand, mqtt_session=None):
+        if mqtt_session:
+            value = self._send(spec.command, "", mqtt_session)
+        elif spec.simulate is not None:
+            value = spec.simulate(self)
+        else:
+            value = getattr(self, spec.attribute)
+        if spec.parse is not None:
+            value = spec.parse(value)
+        if spec.attribute is not None:
+            setattr(self, spec.attribute, value)
+        return value
+
+    def _write_spec(self, spec: DeviceCommand, value, mqtt_session=None):
+        if spec.validate is not None:
+            spec.validate(value)
+        if spec.apply is not None:
+            spec.apply(self, value)
+        elif spec.attribute is not None:
+            setattr(self, spec.attribute, value)
+        if mqtt_session:
+            return self._send(spec.command, spec.format(value), mqtt_session)
+        return value
+
+    def _read_data(self, quantity: str, mqtt_session=None):
+        try:
+            spec = self._read_table[quantity]
+        except KeyError:
+            raise ValueError(f"Unsupported read: {quantity}")
+        return self._read_spec(spec, mqtt_session)
+
+    def _write_data(self, quantity: str, value, mqtt_session=None):
+        try:
+            spec = self._write_table[quantity]
+        except KeyError:
+            raise ValueError(f"Unsupported write: {quantity}")
+        return self._write_spec(spec, value, mqtt_session)
+
+    def execute(self, command: str, parameter: str = "", mqtt_session=None):
+        # Runs a raw MQTT command name, parsing the parameter like the device would
+        try:
+            is_write, spec = self._commands[command]
+        except KeyError:
+            raise ValueError(f"Invalid command: {command}")
+        if not is_write:
+            return self._read_spec(spec, mqtt_session)
+        value = spec.parse(parameter) if spec.parse is not None else parameter
+        return self._write_spec(spec, value, mqtt_session)
+
+    def _get_status(self, mqtt_session=None):
+        return self._read_data("status", mqtt_session)
+
+    def _get_version(self, mqtt_session=None):
+        return self._read_data("version", mqtt_session)
+
+    def _get_name(self, mqtt_session=None):
+        return self._read_data("name", mqtt_session)
+
+    def _get_description(self, mqtt_session=None):
+        return self._read_data("description", mqtt_session)
+
+    def _update_name(self, new_name: str, mqtt_session=None):
+        return self._write_data("name", new_name, mqtt_session)
+
+    def _update_description(self, new_description: str, mqtt_session=None):
+        return self._write_data("description", new_description, mqtt_session)
+
+
+class SensorCommandDriver(CommandDriver, BaseSensorDriver):
+    pass
+
+
+class ControllerCommandDriver(CommandDriver, BaseSensorDriver, BaseControllerDriver):
+    pass
@@ -0,0 +1,144 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class BatchWriter:
+    # Takes writes off the request path: items are queued in memory and a writer
+    # thread hands them to `write` in batches, once batch_size items are queued
+    # or flush_interval seconds have passed. When the queue is full, "block"
+    # waits up to block_timeout for room, "drop_oldest" and "drop_newest"
+    # discard. A batch that fails goes back in front of newer items.
+    def __init__(
+        self,
+        write: Callable[[List[Any]], Any],
+        name: str,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        overflow: str = "block",
+        block_timeout: float = 5.0,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown {name} overflow policy: {overflow}")
+        self.write = write
+        self.name = name
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self._queue: Deque[Any] = deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # Whatever is still queued is written before shutdown
+        self.flush_all()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                while self.flush() >= self.batch_size:
+                    pass
+            except Exception as e:
+                print(f"Failed to write {self.name}: {e}")
+
+    def enqueue(self, items: List[Any]) -> int:
+        # Returns how many of the items were queued
+        accepted = 0
+        with self._lock:
+            if self.overflow == "drop_oldest":
+                self._queue.extend(items)
+                overflow = max(0, len(self._queue) - self.max_queue_size)
+                for _ in range(overflow):
+                    self._queue.popleft()
+                self.dropped += overflow
+                accepted = len(items)
+            else:
+                for item in items:
+                    if len(self._queue) >= self.max_queue_size:
+                        if self.overflow == "drop_newest":
+                            self.dropped += 1
+                            continue
+                        if not self._not_full.wait_for(
+                            lambda: len(self._queue) < self.max_queue_size,
+                            self.block_timeout,
+                        ):
+                            raise ValueError(f"Queue of {self.name} is full")
+                    self._queue.append(item)
+                    accepted += 1
+            depth = len(self._queue)
+        if depth >= self.batch_size:
+            self._wake.set()
+        return accepted
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                count = min(len(self._queue), self.batch_size)
+                batch: List[Any] = [self._queue.popleft() for _ in range(count)]
+                self._not_full.notify_all()
+            if not batch:
+                return 0
+            try:
+                self.write(batch)
+            except Exception:
+                # Put the batch back in front of newer items, as far as it fits
+                with self._lock:
+                    self.failed_batches += 1
+                    room = self.max_queue_size - len(self._queue)
+                    self.dropped += max(0, len(batch) - room)
+                    self._queue.extendleft(reversed(batch[: max(0, room)]))
+                raise
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+            return len(batch)
+
+    def flush_all(self) -> int:
+        written = 0
+        while True:
+            count = self.flush()
+            if not count:
+                return written
+            written += count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": len(self._queue),
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+            }
@@ -1,9 +1,53 @@
-from typing import List, Any
-from datetime import datetime
-from sqlalchemy import create_engine, desc
+import base64
+import math
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from uuid import UUID
+from pydantic import ValidationError
+from sqlalchemy import (
+    Enum,
+    Integer,
+    MetaData,
+    Table,
+    and_,
+    case,
+    cast,
+    create_engine,
+    desc,
+    false,
+    func,
+    insert,
+    inspect,
+    or_,
+    select,
+    text,
+)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session
 from ..config import settings
-from ..schemas import Base, DatabaseDevice, DatabaseLogRecord, SimDevice
+from ..schemas import (
+    Base,
+    DatabaseDevice,
+    DatabaseDeviceGroup,
+    DatabaseDeviceGroupMember,
+    DatabaseDeviceTag,
+    DatabaseLogAction,
+    DatabaseLogDailyCount,
+    DatabaseLogDevice,
+    DatabaseLogRecord,
+    DatabaseLogRollup,
+    DatabaseLogUser,
+    DatabaseReadingRollup,
+    DatabaseSensorReading,
+    DeviceGroup,
+    LogRecord,
+    SensorReading,
+    SimDevice,
+)
 
 # region Real DB
 
@@ -21,16 +65,176 @@ def _create_engine():
         f"{settings.database_port}/"
         f"{settings.database_name}",
         pool_pre_ping=True,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
         echo=True,
     )
 
 
+def _migrate(bind):
+    # create_all only creates missing tables, columns added to existing tables
+    # later on are added here (as nullable, so existing rows stay valid)
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {table.name} "
+                        f"ADD COLUMN {column.name} {column_type} NULL"
+                    )
+                )
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(connection)
+
+
+def _widen_device_type(bind):
+    # devices.type used to be an ENUM of the built-in types (MySQL, PostgreSQL),
+    # which rejects plugin device types; it is turned into the VARCHAR it is now
+    inspector = inspect(bind)
+    if "devices" not in inspector.get_table_names():
+        return
+    columns = {column["name"]: column for column in inspector.get_columns("devices")}
+    if not isinstance(columns["type"]["type"], Enum):
+        return
+    with bind.begin() as connection:
+        if bind.dialect.name == "postgresql":
+            connection.execute(
+                text(
+                    "ALTER TABLE devices ALTER COLUMN type TYPE VARCHAR(50) "
+                    "USING type::text"
+                )
+            )
+        else:
+            connection.execute(
+                text("ALTER TABLE devices MODIFY COLUMN type VARCHAR(50) NOT NULL")
+            )
+    print("Changed devices.type from an enum to VARCHAR(50)")
+
+
+# MySQL only: word search on log descriptions through a FULLTEXT index
+LOG_FULLTEXT_INDEX = "ft_log_records_description"
+
+
+def _fulltext_enabled(bind) -> bool:
+    return settings.log_fulltext_search and bind.dialect.name == "mysql"
+
+
+def _create_fulltext_index(bind):
+    if not _fulltext_enabled(bind):
+        return
+    indexes = {index["name"] for index in inspect(bind).get_indexes("log_records")}
+    if LOG_FULLTEXT_INDEX not in indexes:
+        with bind.begin() as connection:
+            connection.execute(
+                text(
+                    f"ALTER TABLE log_records "
+                    f"ADD FULLTEXT INDEX {LOG_FULLTEXT_INDEX} (description)"
+                )
+            )
+
+
+# log_records from before the compact schema (string uuid, user, device and
+# action columns) is renamed to this at startup and copied into the new table
+LEGACY_LOG_TABLE = "log_records_legacy"
+
+
+def _set_aside_legacy_logs(bind) -> bool:
+    inspector = inspect(bind)
+    if "log_records" not in inspector.get_table_names():
+        return False
+    columns = {column["name"] for column in inspector.get_columns("log_records")}
+    if "action_id" in columns:
+        return False
+    with bind.begin() as connection:
+        legacy = Table("log_records", MetaData(), autoload_with=connection)
+        # Index names are global on SQLite and PostgreSQL, the new table reuses them
+        for index in legacy.indexes:
+            index.drop(connection)
+        connection.execute(
+            text(f"ALTER TABLE log_records RENAME TO {LEGACY_LOG_TABLE}")
+        )
+    return True
+
+
+def _copy_legacy_logs(db: Session, batch_size: int = 1000) -> int:
+    # Batches in uuid order, each committed on its own; records already copied
+    # are skipped, so an interrupted copy continues on the next start
+    legacy = Table(LEGACY_LOG_TABLE, MetaData(), autoload_with=db.get_bind())
+    copied = 0
+    last = None
+    while True:
+        query = select(legacy).order_by(legacy.c.uuid).limit(batch_size)
+        if last is not None:
+            query = query.where(legacy.c.uuid > last)
+        rows = db.execute(query).mappings().all()
+        if not rows:
+            break
+        last = rows[-1]["uuid"]
+        logs = []
+        for row in rows:
+            try:
+                logs.append(
+                    LogRecord(
+                        uuid=row["uuid"],
+                        user=row["user"],
+                        device_uuid=row["device_uuid"] or "",
+                        action=row["action"],
+                        description=row["description"] or "",
+                        timestamp=row["timestamp"],
+                        status=row.get("status"),
+                        duration_ms=row.get("duration_ms"),
+                        parameters=row.get("parameters"),
+                    )
+                )
+            except ValidationError as e:
+                print(f"Skipping unreadable legacy log record {row['uuid']}: {e}")
+        copied += add_logs(db, logs, skip_existing=True, rollups=False)
+    legacy.drop(db.get_bind())
+    print(f"Copied {copied} log records into the compact log table")
+    return copied
+
+
 def init_engine():
     global engine, SessionLocal
     if engine is None or SessionLocal is None:
         engine = _create_engine()
+        existing_tables = set(inspect(engine).get_table_names())
+        legacy_logs = (
+            _set_aside_legacy_logs(engine) or LEGACY_LOG_TABLE in existing_tables
+        )
         Base.metadata.create_all(bind=engine)
+        _migrate(engine)
+        _widen_device_type(engine)
+        _create_fulltext_index(engine)
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        if legacy_logs:
+            with session_scope() as db:
+                _copy_legacy_logs(db)
+        # Rollups start out from the records written before they existed
+        if settings.log_rollups and (
+            legacy_logs
+            or "log_records" in existing_tables
+            and DatabaseLogRollup.__tablename__ not in existing_tables
+        ):
+            with session_scope() as db:
+                rebuild_log_rollups(db)
+        if (
+            settings.sensor_rollups
+            and "sensor_readings" in existing_tables
+            and DatabaseReadingRollup.__tablename__ not in existing_tables
+        ):
+            with session_scope() as db:
+                rebuild_reading_rollups(db)
     return engine
 
 
@@ -73,39 +277,462 @@ def update_device(db: Session, uuid: str, updated_device: SimDevice):
     return db_device
 
 
+def update_device_fields(db: Session, updates: Dict[str, Dict[str, Any]]) -> int:
+    # Applies column updates for many devices as plain UPDATEs in one transaction,
+    # without loading the rows first
+    updated = 0
+    for uuid, fields in updates.items():
+        if fields:
+            updated += (
+                db.query(DatabaseDevice)
+                .filter(DatabaseDevice.uuid == uuid)
+                .update(fields, synchronize_session=False)
+            )
+    db.commit()
+    return updated
+
+
 def delete_device(db: Session, uuid: str):
     db_device = get_device_by_uuid(db, uuid)
     db.delete(db_device)
     db.commit()
 
 
+# endregion
+
+# region Group table operations
+
+
+def _to_device_group(db: Session, db_group: DatabaseDeviceGroup) -> DeviceGroup:
+    return DeviceGroup(
+        name=db_group.name,
+        description=db_group.description or "",
+        device_uuids=get_group_members(db, db_group.name),
+    )
+
+
+def add_group(db: Session, group: DeviceGroup) -> DeviceGroup:
+    if db.get(DatabaseDeviceGroup, group.name):
+        raise ValueError(f"Group {group.name} already exists")
+    db.add(DatabaseDeviceGroup(name=group.name, description=group.description))
+    for device_uuid in dict.fromkeys(group.device_uuids):
+        db.add(
+            DatabaseDeviceGroupMember(group_name=group.name, device_uuid=device_uuid)
+        )
+    db.commit()
+    return get_group(db, group.name)
+
+
+def get_groups(db: Session) -> List[DeviceGroup]:
+    return [
+        _to_device_group(db, db_group)
+        for db_group in db.query(DatabaseDeviceGroup).order_by(DatabaseDeviceGroup.name)
+    ]
+
+
+def get_group(db: Session, name: str) -> DeviceGroup:
+    db_group = db.get(DatabaseDeviceGroup, name)
+    if not db_group:
+        raise ValueError("Group not found")
+    return _to_device_group(db, db_group)
+
+
+def delete_group(db: Session, name: str):
+    db_group = db.get(DatabaseDeviceGroup, name)
+    if not db_group:
+        raise ValueError("Group not found")
+    db.query(DatabaseDeviceGroupMember).filter(
+        DatabaseDeviceGroupMember.group_name == name
+    ).delete(synchronize_session=False)
+    db.delete(db_group)
+    db.commit()
+
+
+def get_group_members(db: Session, name: str) -> List[str]:
+    rows = (
+        db.query(DatabaseDeviceGroupMember.device_uuid)
+        .filter(DatabaseDeviceGroupMember.group_name == name)
+        .order_by(DatabaseDeviceGroupMember.device_uuid)
+        .all()
+    )
+    return [row.device_uuid for row in rows]
+
+
+def get_device_groups(db: Session, device_uuid: str) -> List[str]:
+    rows = (
+        db.query(DatabaseDeviceGroupMember.group_name)
+        .filter(DatabaseDeviceGroupMember.device_uuid == device_uuid)
+        .all()
+    )
+    return [row.group_name for row in rows]
+
+
+def add_group_member(db: Session, name: str, device_uuid: str):
+    if not db.get(DatabaseDeviceGroup, name):
+        raise ValueError("Group not found")
+    if db.get(DatabaseDeviceGroupMember, (name, device_uuid)):
+        raise ValueError(f"Device {device_uuid} is already in group {name}")
+    db.add(DatabaseDeviceGroupMember(group_name=name, device_uuid=device_uuid))
+    db.commit()
+
+
+def remove_group_member(db: Session, name: str, device_uuid: str):
+    member = db.get(DatabaseDeviceGroupMember, (name, device_uuid))
+    if not member:
+        raise ValueError(f"Device {device_uuid} is not in group {name}")
+    db.delete(member)
+    db.commit()
+
+
+# endregion
+
+# region Tag table operations
+
+
+def add_tag(db: Session, device_uuid: str, tag: str):
+    get_device_by_uuid(db, device_uuid)
+    if not db.get(DatabaseDeviceTag, (device_uuid, tag)):
+        db.add(DatabaseDeviceTag(device_uuid=device_uuid, tag=tag))
+        db.commit()
+
+
+def remove_tag(db: Session, device_uuid: str, tag: str):
+    db_tag = db.get(DatabaseDeviceTag, (device_uuid, tag))
+    if not db_tag:
+        raise ValueError(f"Device {device_uuid} has no tag {tag}")
+    db.delete(db_tag)
+    db.commit()
+
+
+def get_device_tags(db: Session, device_uuid: str) -> List[str]:
+    rows = (
+        db.query(DatabaseDeviceTag.tag)
+        .filter(DatabaseDeviceTag.device_uuid == device_uuid)
+        .order_by(DatabaseDeviceTag.tag)
+        .all()
+    )
+    return [row.tag for row in rows]
+
+
+def get_devices_by_tag(db: Session, tag: str) -> List[DatabaseDevice]:
+    return (
+        db.query(DatabaseDevice)
+        .join(DatabaseDeviceTag, DatabaseDeviceTag.device_uuid == DatabaseDevice.uuid)
+        .filter(DatabaseDeviceTag.tag == tag)
+        .all()
+    )
+
+
+# endregion
+
+# region Log dictionaries
+
+
+class LogDictionary:
+    # Maps values repeated on every log record (actions, users, device uuids) to
+    # the integer ids stored in log_records. Entries are only ever added, so both
+    # directions are cached for the life of the process.
+    def __init__(self, model):
+        self.model = model
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, bind, column, values):
+        table = self.model.__table__
+        with bind.connect() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.name).where(column.in_(values))
+            ).all()
+        with self._lock:
+            for id, name in rows:
+                self._ids[name] = id
+                self._names[id] = name
+
+    def ids(self, bind, names: Iterable[str]) -> Dict[str, int]:
+        # Missing names are inserted, each in its own transaction so an entry is
+        # never cached for a write that is rolled back later
+        names = set(names)
+        missing = [name for name in names if name not in self._ids]
+        if missing:
+            table = self.model.__table__
+            self._load(bind, table.c.name, missing)
+            for name in missing:
+                if name in self._ids:
+                    continue
+                try:
+                    with bind.begin() as connection:
+                        connection.execute(insert(table).values(name=name))
+                except IntegrityError:
+                    # Added by another process in the meantime
+                    pass
+            missing = [name for name in missing if name not in self._ids]
+            if missing:
+                self._load(bind, table.c.name, missing)
+        return {name: self._ids[name] for name in names}
+
+    def lookup(self, bind, name: str) -> Optional[int]:
+        if name not in self._ids:
+            self._load(bind, self.model.__table__.c.name, [name])
+        return self._ids.get(name)
+
+    def names(self, bind, ids: Iterable[int]) -> Dict[int, str]:
+        ids = set(ids)
+        missing = [id for id in ids if id not in self._names]
+        if missing:
+            self._load(bind, self.model.__table__.c.id, missing)
+        return {id: self._names[id] for id in ids}
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._names.clear()
+
+
+LOG_ACTIONS = LogDictionary(DatabaseLogAction)
+LOG_USERS = LogDictionary(DatabaseLogUser)
+LOG_DEVICES = LogDictionary(DatabaseLogDevice)
+
+
+def clear_log_dictionaries():
+    for dictionary in (LOG_ACTIONS, LOG_USERS, LOG_DEVICES):
+        dictionary.clear()
+
+
+def _attach_names(db: Session, logs: List[DatabaseLogRecord]):
+    bind = db.get_bind()
+    users = LOG_USERS.names(bind, {log.user_id for log in logs})
+    devices = LOG_DEVICES.names(bind, {log.device_id for log in logs})
+    actions = LOG_ACTIONS.names(bind, {log.action_id for log in logs})
+    for log in logs:
+        log.user = users[log.user_id]
+        log.device_uuid = devices[log.device_id]
+        log.action = actions[log.action_id]
+    return logs
+
+
+def _name_filter(db: Session, column, dictionary: LogDictionary, name: str):
+    id = dictionary.lookup(db.get_bind(), name)
+    # A name that was never logged matches nothing
+    return column == id if id is not None else false()
+
+
 # endregion
 
 # region Log table operations
 
 
+def _log_rows(db: Session, logs: List[LogRecord]) -> List[Dict[str, Any]]:
+    bind = db.get_bind()
+    users = LOG_USERS.ids(bind, {log.user for log in logs})
+    devices = LOG_DEVICES.ids(bind, {log.device_uuid or "" for log in logs})
+    actions = LOG_ACTIONS.ids(bind, {log.action for log in logs})
+    return [
+        {
+            "uuid": str(log.uuid),
+            "user_id": users[log.user],
+            "device_id": devices[log.device_uuid or ""],
+            "action_id": actions[log.action],
+            "description": log.description,
+            "timestamp": log.timestamp,
+            "status": log.status,
+            "duration_ms": log.duration_ms,
+            "parameters": log.parameters,
+            "error": log.error[:1024] if log.error else None,
+            "log_day": log.timestamp.date() if log.timestamp else None,
+        }
+        for log in logs
+    ]
+
+
 def add_log(db: Session, log: DatabaseLogRecord):
-    db_log = DatabaseLogRecord(
-        uuid=str(log.uuid),
-        user=log.user,
-        device_uuid=log.device_uuid,
-        action=log.action,
-        description=log.description,
-        timestamp=log.timestamp,
-    )
+    db_log = DatabaseLogRecord(**_log_rows(db, [log])[0])
+    db_log.user = log.user
+    db_log.device_uuid = log.device_uuid or ""
+    db_log.action = log.action
     db.add(db_log)
+    if settings.log_rollups:
+        update_log_rollups(db, [log])
     db.commit()
     return db_log
 
 
+def add_logs(
+    db: Session,
+    logs: List[LogRecord],
+    skip_existing: bool = False,
+    rollups: bool = True,
+) -> int:
+    # Bulk insert of a batch of records in one transaction. With skip_existing,
+    # records whose uuid is already stored are left out (a batch shipped twice).
+    if skip_existing and logs:
+        stored = {
+            row.uuid
+            for row in db.query(DatabaseLogRecord.uuid).filter(
+                DatabaseLogRecord.uuid.in_([str(log.uuid) for log in logs])
+            )
+        }
+        logs = [log for log in logs if str(log.uuid) not in stored]
+    if not logs:
+        return 0
+    db.execute(insert(DatabaseLogRecord), _log_rows(db, logs))
+    if rollups and settings.log_rollups:
+        update_log_rollups(db, logs)
+    db.commit()
+    return len(logs)
+
+
 def get_logs(db: Session) -> List[DatabaseLogRecord]:
-    return db.query(DatabaseLogRecord).order_by(desc(DatabaseLogRecord.timestamp)).all()
+    return _attach_names(
+        db,
+        db.query(DatabaseLogRecord).order_by(desc(DatabaseLogRecord.timestamp)).all(),
+    )
+
+
+def _description_filter(db: Session, description: str):
+    # With the FULLTEXT index every word of the search must start a word of the
+    # description; otherwise it is a plain substring match
+    if _fulltext_enabled(db.get_bind()):
+        words = [re.sub(r"\W", "", word) for word in description.split()]
+        terms = " ".join(f"+{word}*" for word in words if word)
+        if terms:
+            return text(
+                "MATCH (log_records.description) AGAINST (:terms IN BOOLEAN MODE)"
+            ).bindparams(terms=terms)
+    return DatabaseLogRecord.description.contains(description, autoescape=True)
+
+
+def _filter_logs(
+    db: Session,
+    query,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+    user: Optional[str] = None,
+    description: Optional[str] = None,
+):
+    if device_uuid is not None:
+        query = query.filter(
+            _name_filter(db, DatabaseLogRecord.device_id, LOG_DEVICES, device_uuid)
+        )
+    if action is not None:
+        query = query.filter(
+            _name_filter(db, DatabaseLogRecord.action_id, LOG_ACTIONS, action)
+        )
+    if user is not None:
+        query = query.filter(
+            _name_filter(db, DatabaseLogRecord.user_id, LOG_USERS, user)
+        )
+    if description:
+        query = query.filter(_description_filter(db, description))
+    if start_time is not None:
+        query = query.filter(DatabaseLogRecord.timestamp >= start_time)
+    if end_time is not None:
+        query = query.filter(DatabaseLogRecord.timestamp <= end_time)
+    return query
+
+
+def encode_log_cursor(log: DatabaseLogRecord) -> str:
+    raw = f"{log.timestamp.isoformat()}|{log.uuid}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_log_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, uuid = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), str(UUID(uuid))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def get_logs_page(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+    user: Optional[str] = None,
+    description: Optional[str] = None,
+) -> Tuple[List[DatabaseLogRecord], Optional[str]]:
+    # Keyset pagination, newest first: each page continues strictly after the
+    # (timestamp, uuid) of the previous page's last row, so the cost of a page
+    # does not depend on how deep it is or how large the table has grown
+    query = _filter_logs(
+        db,
+        db.query(DatabaseLogRecord),
+        start_time,
+        end_time,
+        device_uuid,
+        action,
+        user,
+        description,
+    )
+    if cursor:
+        timestamp, uuid = decode_log_cursor(cursor)
+        query = query.filter(
+            or_(
+                DatabaseLogRecord.timestamp < timestamp,
+                and_(
+                    DatabaseLogRecord.timestamp == timestamp,
+                    DatabaseLogRecord.uuid < uuid,
+                ),
+            )
+        )
+    logs = (
+        query.order_by(desc(DatabaseLogRecord.timestamp), desc(DatabaseLogRecord.uuid))
+        .limit(limit + 1)
+        .all()
+    )
+    _attach_names(db, logs)
+    if len(logs) > limit:
+        return logs[:limit], encode_log_cursor(logs[limit - 1])
+    return logs, None
+
+
+def iter_logs(
+    db: Session,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+    user: Optional[str] = None,
+    description: Optional[str] = None,
+    batch_size: int = 1000,
+):
+    # Streams rows oldest first through a server-side cursor, batch_size rows are
+    # held in memory at a time
+    query = _filter_logs(
+        db,
+        db.query(DatabaseLogRecord),
+        start_time,
+        end_time,
+        device_uuid,
+        action,
+        user,
+        description,
+    )
+    rows = query.order_by(DatabaseLogRecord.timestamp, DatabaseLogRecord.uuid)
+    return _iter_named(db, rows.yield_per(batch_size), batch_size)
+
+
+def _iter_named(db: Session, rows, batch_size: int):
+    batch = []
+    for log in rows:
+        batch.append(log)
+        if len(batch) == batch_size:
+            yield from _attach_names(db, batch)
+            batch = []
+    yield from _attach_names(db, batch)
 
 
 def get_logs_by_time(
     db: Session, start_time: datetime, end_time: datetime
 ) -> List[DatabaseLogRecord]:
-    return (
+    logs = (
         db.query(DatabaseLogRecord)
         .filter(
             DatabaseLogRecord.timestamp >= start_time,
@@ -114,6 +741,641 @@ def get_logs_by_time(
         .order_by(desc(DatabaseLogRecord.timestamp))
         .all()
     )
+    return _attach_names(db, logs)
+
+
+# endregion
+
+# region Log aggregation
+
+LOG_BUCKETS = ("minute", "hour", "day")
+LOG_GROUP_COLUMNS = ("device_uuid", "action", "status")
+
+_BUCKET_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+
+
+def _time_bucket(db: Session, column, bucket: str):
+    if bucket not in LOG_BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return func.date_trunc(bucket, column)
+    if dialect == "mysql":
+        # DATE_FORMAT spells minutes %i
+        return func.date_format(column, _BUCKET_FORMATS[bucket].replace("%M", "%i"))
+    return func.strftime(_BUCKET_FORMATS[bucket], column)
+
+
+# log_records stores devices and actions as dictionary ids
+_LOG_ID_COLUMNS = {
+    "device_uuid": ("device_id", LOG_DEVICES),
+    "action": ("action_id", LOG_ACTIONS),
+}
+
+
+def _group_columns(model, group_by: List[str]):
+    for column in group_by:
+        if column not in LOG_GROUP_COLUMNS:
+            raise ValueError(f"Cannot group logs by {column}")
+    if model is DatabaseLogRecord:
+        return [
+            getattr(model, _LOG_ID_COLUMNS.get(column, (column,))[0])
+            for column in dict.fromkeys(group_by)
+        ]
+    return [getattr(model, column) for column in dict.fromkeys(group_by)]
+
+
+def _name_group_ids(db: Session, rows, group_by: List[str]) -> List[List[Any]]:
+    rows = [list(row) for row in rows]
+    for index, column in enumerate(dict.fromkeys(group_by), start=1):
+        if column in _LOG_ID_COLUMNS:
+            dictionary = _LOG_ID_COLUMNS[column][1]
+            names = dictionary.names(db.get_bind(), {row[index] for row in rows})
+            for row in rows:
+                row[index] = names[row[index]]
+    return rows
+
+
+def _aggregate_rows(rows, group_by: List[str]) -> List[Dict[str, Any]]:
+    aggregates = []
+    for row in rows:
+        bucket = row[0]
+        if isinstance(bucket, str):
+            bucket = datetime.fromisoformat(bucket)
+        aggregate = {"bucket": bucket}
+        for index, column in enumerate(dict.fromkeys(group_by), start=1):
+            # Rollups store a missing status as "" to keep it in the primary key
+            aggregate[column] = row[index] if row[index] != "" else None
+        records, duration_sum, duration_count, duration_max = row[-4:]
+        aggregate["records"] = records
+        aggregate["avg_duration_ms"] = (
+            duration_sum / duration_count if duration_count else None
+        )
+        aggregate["max_duration_ms"] = duration_max
+        aggregates.append(aggregate)
+    return aggregates
+
+
+def aggregate_logs(
+    db: Session,
+    bucket: str = "hour",
+    group_by: Optional[List[str]] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+    user: Optional[str] = None,
+    description: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    # Counts and request durations per time bucket (and per group column),
+    # computed with GROUP BY over the matching log records
+    group_by = group_by or []
+    time_bucket = _time_bucket(db, DatabaseLogRecord.timestamp, bucket)
+    columns = _group_columns(DatabaseLogRecord, group_by)
+    query = db.query(
+        time_bucket,
+        *columns,
+        func.count(),
+        func.sum(DatabaseLogRecord.duration_ms),
+        func.count(DatabaseLogRecord.duration_ms),
+        func.max(DatabaseLogRecord.duration_ms),
+    )
+    query = _filter_logs(
+        db, query, start_time, end_time, device_uuid, action, user, description
+    )
+    rows = query.group_by(time_bucket, *columns).all()
+    rows = _name_group_ids(db, rows, group_by)
+    # Ordered by name, as the rollups are, rather than by dictionary id
+    width = len(columns) + 1
+    rows.sort(key=lambda row: ["" if value is None else value for value in row[:width]])
+    return _aggregate_rows(rows, group_by)
+
+
+def aggregate_log_rollups(
+    db: Session,
+    bucket: str = "hour",
+    group_by: Optional[List[str]] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    device_uuid: Optional[str] = None,
+    action: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    # Same result as aggregate_logs, read from the hourly rollups: buckets are at
+    # least an hour and the time range applies to whole hours
+    if bucket == "minute":
+        raise ValueError("Rollups are hourly, use bucket=hour or bucket=day")
+    group_by = group_by or []
+    time_bucket = _time_bucket(db, DatabaseLogRollup.hour, bucket)
+    columns = _group_columns(DatabaseLogRollup, group_by)
+    query = db.query(
+        time_bucket,
+        *columns,
+        func.sum(DatabaseLogRollup.records),
+        func.sum(DatabaseLogRollup.duration_sum),
+        func.sum(DatabaseLogRollup.duration_count),
+        func.max(DatabaseLogRollup.duration_max),
+    )
+    if device_uuid is not None:
+        query = query.filter(DatabaseLogRollup.device_uuid == device_uuid)
+    if action is not None:
+        query = query.filter(DatabaseLogRollup.action == action)
+    if start_time is not None:
+        query = query.filter(
+            DatabaseLogRollup.hour
+            >= start_time.replace(minute=0, second=0, microsecond=0)
+        )
+    if end_time is not None:
+        query = query.filter(DatabaseLogRollup.hour <= end_time)
+    rows = query.group_by(time_bucket, *columns).order_by(time_bucket, *columns).all()
+    return _aggregate_rows(rows, group_by)
+
+
+def update_log_rollups(db: Session, logs: List[LogRecord]):
+    # Folds a batch of records into the hourly rollups in the caller's transaction:
+    # the batch is summed in memory, then one upsert adds it to the stored rows
+    summed: Dict[Tuple, Dict[str, Any]] = {}
+    for log in logs:
+        if log.timestamp is None:
+            continue
+        key = (
+            log.timestamp.replace(minute=0, second=0, microsecond=0),
+            log.device_uuid or "",
+            log.action,
+            log.status or "",
+        )
+        row = summed.get(key)
+        if row is None:
+            row = summed[key] = {
+                "hour": key[0],
+                "device_uuid": key[1],
+                "action": key[2],
+                "status": key[3],
+                "records": 0,
+                "duration_count": 0,
+                "duration_sum": 0.0,
+                "duration_max": None,
+            }
+        row["records"] += 1
+        if log.duration_ms is not None:
+            row["duration_count"] += 1
+            row["duration_sum"] += log.duration_ms
+            if row["duration_max"] is None or log.duration_ms > row["duration_max"]:
+                row["duration_max"] = log.duration_ms
+    if summed:
+        _upsert_log_rollups(db, list(summed.values()))
+
+
+def _upsert_log_rollups(db: Session, rows: List[Dict[str, Any]]):
+    table = DatabaseLogRollup
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(table)
+        new = statement.inserted
+        db.execute(
+            statement.on_duplicate_key_update(
+                records=table.records + new.records,
+                duration_count=table.duration_count + new.duration_count,
+                duration_sum=table.duration_sum + new.duration_sum,
+                duration_max=func.greatest(
+                    func.coalesce(table.duration_max, new.duration_max),
+                    func.coalesce(new.duration_max, table.duration_max),
+                ),
+            ),
+            rows,
+        )
+    elif dialect in ("sqlite", "postgresql"):
+        module = sqlite if dialect == "sqlite" else postgresql
+        statement = module.insert(table)
+        new = statement.excluded
+        # SQLite spells GREATEST as the two argument max()
+        greatest = func.max if dialect == "sqlite" else func.greatest
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["hour", "device_uuid", "action", "status"],
+                set_={
+                    "records": table.records + new.records,
+                    "duration_count": table.duration_count + new.duration_count,
+                    "duration_sum": table.duration_sum + new.duration_sum,
+                    "duration_max": greatest(
+                        func.coalesce(table.duration_max, new.duration_max),
+                        func.coalesce(new.duration_max, table.duration_max),
+                    ),
+                },
+            ),
+            rows,
+        )
+    else:
+        for row in rows:
+            key = (row["hour"], row["device_uuid"], row["action"], row["status"])
+            existing = db.get(table, key)
+            if existing is None:
+                db.add(table(**row))
+                continue
+            existing.records += row["records"]
+            existing.duration_count += row["duration_count"]
+            existing.duration_sum += row["duration_sum"]
+            if row["duration_max"] is not None and (
+                existing.duration_max is None
+                or row["duration_max"] > existing.duration_max
+            ):
+                existing.duration_max = row["duration_max"]
+
+
+def rebuild_log_rollups(db: Session) -> int:
+    # Recomputes every rollup from log_records, for tables that predate rollups
+    db.query(DatabaseLogRollup).delete(synchronize_session=False)
+    hour = _time_bucket(db, DatabaseLogRecord.timestamp, "hour")
+    status = func.coalesce(DatabaseLogRecord.status, "")
+    rows = (
+        db.query(
+            hour,
+            DatabaseLogRecord.device_id,
+            DatabaseLogRecord.action_id,
+            status,
+            func.count(),
+            func.count(DatabaseLogRecord.duration_ms),
+            func.coalesce(func.sum(DatabaseLogRecord.duration_ms), 0.0),
+            func.max(DatabaseLogRecord.duration_ms),
+        )
+        .filter(DatabaseLogRecord.timestamp.is_not(None))
+        .group_by(
+            hour, DatabaseLogRecord.device_id, DatabaseLogRecord.action_id, status
+        )
+        .all()
+    )
+    rows = _name_group_ids(db, rows, ["device_uuid", "action"])
+    for row in rows:
+        bucket = row[0]
+        db.add(
+            DatabaseLogRollup(
+                hour=datetime.fromisoformat(bucket)
+                if isinstance(bucket, str)
+                else bucket,
+                device_uuid=row[1],
+                action=row[2],
+                status=row[3],
+                records=row[4],
+                duration_count=row[5],
+                duration_sum=row[6],
+                duration_max=row[7],
+            )
+        )
+    db.commit()
+    return len(rows)
+
+
+# endregion
+
+# region Log retention
+
+
+def backfill_log_days(db: Session) -> int:
+    # Records written before log_day existed get their day bucket from the timestamp
+    updated = (
+        db.query(DatabaseLogRecord)
+        .filter(DatabaseLogRecord.log_day.is_(None))
+        .update(
+            {DatabaseLogRecord.log_day: func.date(DatabaseLogRecord.timestamp)},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return updated
+
+
+def summarize_log_days(db: Session, before: date) -> int:
+    # Counts records per closed day (before `before`). Days already summarized are
+    # not counted again, except the latest one which may have been summarized
+    # while records for it were still queued.
+    last = db.query(func.max(DatabaseLogDailyCount.day)).scalar()
+    query = db.query(
+        DatabaseLogRecord.log_day,
+        func.count(),
+        func.sum(case((DatabaseLogRecord.status == "error", 1), else_=0)),
+    ).filter(DatabaseLogRecord.log_day < before)
+    if last is not None:
+        query = query.filter(DatabaseLogRecord.log_day >= last)
+    rows = query.group_by(DatabaseLogRecord.log_day).all()
+    for day, records, errors in rows:
+        summary = db.get(DatabaseLogDailyCount, day)
+        if summary is None:
+            summary = DatabaseLogDailyCount(day=day)
+            db.add(summary)
+        summary.records = records
+        summary.errors = errors or 0
+    db.commit()
+    return len(rows)
+
+
+def get_log_days_before(db: Session, before: date) -> List[date]:
+    rows = (
+        db.query(DatabaseLogRecord.log_day)
+        .filter(DatabaseLogRecord.log_day < before)
+        .distinct()
+        .order_by(DatabaseLogRecord.log_day)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
+def purge_log_day(db: Session, day: date) -> int:
+    # One bulk DELETE on the log_day index per day, the day's summary is kept
+    deleted = (
+        db.query(DatabaseLogRecord)
+        .filter(DatabaseLogRecord.log_day == day)
+        .delete(synchronize_session=False)
+    )
+    summary = db.get(DatabaseLogDailyCount, day)
+    if summary is None:
+        summary = DatabaseLogDailyCount(day=day, records=deleted, errors=0)
+        db.add(summary)
+    summary.purged_at = datetime.now()
+    db.commit()
+    return deleted
+
+
+def get_log_daily_counts(
+    db: Session, start_day: Optional[date] = None, end_day: Optional[date] = None
+) -> List[DatabaseLogDailyCount]:
+    query = db.query(DatabaseLogDailyCount)
+    if start_day is not None:
+        query = query.filter(DatabaseLogDailyCount.day >= start_day)
+    if end_day is not None:
+        query = query.filter(DatabaseLogDailyCount.day <= end_day)
+    return query.order_by(DatabaseLogDailyCount.day).all()
+
+
+# endregion
+
+# region Sensor readings
+
+
+def add_sensor_readings(db: Session, readings: List[SensorReading]) -> int:
+    if not readings:
+        return 0
+    db.execute(
+        insert(DatabaseSensorReading),
+        [
+            {
+                "device_uuid": reading.device_uuid,
+                "quantity": reading.quantity,
+                "timestamp": reading.timestamp,
+                "value": reading.value,
+            }
+            for reading in readings
+        ],
+    )
+    if settings.sensor_rollups:
+        update_reading_rollups(db, readings)
+    db.commit()
+    return len(readings)
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Rollup periods in seconds, from the finest
+READING_ROLLUP_PERIODS = {"minute": 60, "hour": 3600, "day": 86400}
+
+
+def _bucket_index(db: Session, column, start_time: datetime, bucket_seconds: int):
+    # Whole buckets of bucket_seconds between start_time and the column, in SQL
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        seconds = func.timestampdiff(text("SECOND"), start_time, column)
+        return func.floor(seconds / bucket_seconds)
+    if dialect == "postgresql":
+        seconds = func.extract("epoch", column - start_time)
+        return func.floor(seconds / bucket_seconds)
+    # SQLite: whole seconds since the epoch, divided as integers
+    start = int((start_time - _EPOCH).total_seconds())
+    seconds = cast(func.strftime("%s", column), Integer) - start
+    return seconds // bucket_seconds
+
+
+def rollup_period(bucket_seconds: int) -> Optional[int]:
+    # The coarsest rollup period that evenly divides the bucket width, if any
+    periods = [p for p in READING_ROLLUP_PERIODS.values() if bucket_seconds % p == 0]
+    return max(periods) if periods else None
+
+
+def get_sensor_reading_buckets(
+    db: Session,
+    device_uuid: str,
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: int,
+    quantity: Optional[str] = None,
+    source: str = "raw",
+) -> List[Dict[str, Any]]:
+    # Downsampled range query: count, average, min, max and standard deviation
+    # per bucket, computed with GROUP BY so only one row per bucket leaves the
+    # database. Buckets are aligned to multiples of bucket_seconds, so they stay
+    # the same from one request to the next. source=rollup merges the stored
+    # rollups of the coarsest period dividing bucket_seconds instead of scanning
+    # sensor_readings; a rollup starting before end_time is counted whole.
+    # Without a quantity every quantity of the device (a stepper's speed and
+    # location) gets buckets of its own.
+    if bucket_seconds < 1:
+        raise ValueError("bucket_seconds must be at least 1")
+    if source not in ("raw", "rollup"):
+        raise ValueError(f"Unknown source: {source}")
+    start_time = start_time.replace(microsecond=0)
+    start_time -= timedelta(
+        seconds=int((start_time - _EPOCH).total_seconds()) % bucket_seconds
+    )
+    if source == "raw":
+        table = DatabaseSensorReading
+        index = _bucket_index(db, table.timestamp, start_time, bucket_seconds)
+        value = table.value
+        columns = [
+            func.count(),
+            func.sum(value),
+            func.sum(value * value),
+            func.min(value),
+            func.max(value),
+        ]
+        query = db.query(index, table.quantity, *columns).filter(
+            table.timestamp >= start_time, table.timestamp < end_time
+        )
+    else:
+        period = rollup_period(bucket_seconds)
+        if period is None:
+            raise ValueError(
+                "Rollups need bucket_seconds to be a multiple of "
+                f"{READING_ROLLUP_PERIODS['minute']}"
+            )
+        table = DatabaseReadingRollup
+        index = _bucket_index(db, table.bucket, start_time, bucket_seconds)
+        columns = [
+            func.sum(table.readings),
+            func.sum(table.value_sum),
+            func.sum(table.value_sumsq),
+            func.min(table.value_min),
+            func.max(table.value_max),
+        ]
+        query = db.query(index, table.quantity, *columns).filter(
+            table.period == period,
+            table.bucket >= start_time,
+            table.bucket < end_time,
+        )
+    query = query.filter(table.device_uuid == device_uuid)
+    if quantity is not None:
+        query = query.filter(table.quantity == quantity)
+    rows = query.group_by(index, table.quantity).order_by(index, table.quantity).all()
+    buckets = []
+    for row in rows:
+        count, total, squares = int(row[2]), row[3], row[4]
+        mean = total / count
+        buckets.append(
+            {
+                "bucket": start_time + timedelta(seconds=int(row[0]) * bucket_seconds),
+                "quantity": row[1],
+                "count": count,
+                "avg": mean,
+                "min": row[5],
+                "max": row[6],
+                "std": math.sqrt(max(0.0, squares / count - mean * mean)),
+            }
+        )
+    return buckets
+
+
+def update_reading_rollups(db: Session, readings: List[SensorReading]):
+    # Folds a batch of readings into the minute, hour and day rollups in the
+    # caller's transaction. The batch is summed in memory, then one upsert adds
+    # it to the stored rows; every total is additive, so readings arriving late
+    # or out of order simply land in the bucket of their own timestamp.
+    summed: Dict[Tuple, Dict[str, Any]] = {}
+    for reading in readings:
+        seconds = int((reading.timestamp - _EPOCH).total_seconds())
+        value = reading.value
+        for period in READING_ROLLUP_PERIODS.values():
+            key = (
+                period,
+                reading.device_uuid,
+                reading.quantity,
+                seconds - seconds % period,
+            )
+            row = summed.get(key)
+            if row is None:
+                summed[key] = {
+                    "period": period,
+                    "device_uuid": reading.device_uuid,
+                    "quantity": reading.quantity,
+                    "bucket": _EPOCH + timedelta(seconds=key[3]),
+                    "readings": 1,
+                    "value_sum": value,
+                    "value_sumsq": value * value,
+                    "value_min": value,
+                    "value_max": value,
+                }
+                continue
+            row["readings"] += 1
+            row["value_sum"] += value
+            row["value_sumsq"] += value * value
+            row["value_min"] = min(row["value_min"], value)
+            row["value_max"] = max(row["value_max"], value)
+    if summed:
+        _upsert_reading_rollups(db, list(summed.values()))
+
+
+def _upsert_reading_rollups(db: Session, rows: List[Dict[str, Any]]):
+    table = DatabaseReadingRollup
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(table)
+        new = statement.inserted
+        db.execute(
+            statement.on_duplicate_key_update(
+                readings=table.readings + new.readings,
+                value_sum=table.value_sum + new.value_sum,
+                value_sumsq=table.value_sumsq + new.value_sumsq,
+                value_min=func.least(table.value_min, new.value_min),
+                value_max=func.greatest(table.value_max, new.value_max),
+            ),
+            rows,
+        )
+    elif dialect in ("sqlite", "postgresql"):
+        module = sqlite if dialect == "sqlite" else postgresql
+        statement = module.insert(table)
+        new = statement.excluded
+        # SQLite spells LEAST and GREATEST as the two argument min() and max()
+        least = func.min if dialect == "sqlite" else func.least
+        greatest = func.max if dialect == "sqlite" else func.greatest
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["period", "device_uuid", "quantity", "bucket"],
+                set_={
+                    "readings": table.readings + new.readings,
+                    "value_sum": table.value_sum + new.value_sum,
+                    "value_sumsq": table.value_sumsq + new.value_sumsq,
+                    "value_min": least(table.value_min, new.value_min),
+                    "value_max": greatest(table.value_max, new.value_max),
+                },
+            ),
+            rows,
+        )
+    else:
+        for row in rows:
+            key = (row["period"], row["device_uuid"], row["quantity"], row["bucket"])
+            existing = db.get(table, key)
+            if existing is None:
+                db.add(table(**row))
+                continue
+            existing.readings += row["readings"]
+            existing.value_sum += row["value_sum"]
+            existing.value_sumsq += row["value_sumsq"]
+            existing.value_min = min(existing.value_min, row["value_min"])
+            existing.value_max = max(existing.value_max, row["value_max"])
+
+
+def rebuild_reading_rollups(db: Session) -> int:
+    # Recomputes every rollup from sensor_readings, for tables that predate them
+    db.query(DatabaseReadingRollup).delete(synchronize_session=False)
+    reading = DatabaseSensorReading
+    created = 0
+    for period in READING_ROLLUP_PERIODS.values():
+        index = _bucket_index(db, reading.timestamp, _EPOCH, period)
+        rows = (
+            db.query(
+                index,
+                reading.device_uuid,
+                reading.quantity,
+                func.count(),
+                func.sum(reading.value),
+                func.sum(reading.value * reading.value),
+                func.min(reading.value),
+                func.max(reading.value),
+            )
+            .group_by(index, reading.device_uuid, reading.quantity)
+            .all()
+        )
+        if not rows:
+            continue
+        db.execute(
+            insert(DatabaseReadingRollup),
+            [
+                {
+                    "period": period,
+                    "device_uuid": row[1],
+                    "quantity": row[2],
+                    "bucket": _EPOCH + timedelta(seconds=int(row[0]) * period),
+                    "readings": row[3],
+                    "value_sum": row[4],
+                    "value_sumsq": row[5],
+                    "value_min": row[6],
+                    "value_max": row[7],
+                }
+                for row in rows
+            ],
+        )
+        created += len(rows)
+    db.commit()
+    return created
 
 
 # endregion
@@ -190,8 +1452,9 @@ fake_db_session = FakeDBSession()
 # endregion
 
 
-def get_db():
-    # db = fake_db_session
+@contextmanager
+def session_scope():
+    # Short-lived session for work that is not tied to a request
     global SessionLocal
     if SessionLocal is None:
         init_engine()
@@ -200,3 +1463,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_db():
+    # db = fake_db_session
+    with session_scope() as db:
+        yield db
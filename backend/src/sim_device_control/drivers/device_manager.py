@@ -2,20 +2,34 @@ import os
 import sys
 import time
 import threading
-from typing import Any, Dict, List, Union, cast
-from fastapi import Depends
-from .db import get_db
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Union, cast
 from .mqtt import MqttDriver
+from .device_state import DeviceStateWriter
+from .acquisition import AcquisitionScheduler, sensor_read
+from .sensor_history import READING_QUANTITIES, get_sensor_history
 from . import db as db_driver
-from ..schemas import DeviceType, MotorDirection, SimDevice
+from ..schemas import (
+    AlertRule,
+    DeviceGroup,
+    GroupCommandResult,
+    MotorDirection,
+    SensorReading,
+    SimDevice,
+)
 from ..config import settings
 from .base.base_controller import BaseControllerDriver
 from .base.base_sensor import BaseSensorDriver
-from .temperature import TemperatureSensorDriver
-from .pressure import PressureSensorDriver
-from .humidity import HumiditySensorDriver
-from .dc_motor import DcMotorDriver
-from .stepper_motor import StepperMotorDriver
+from .registry import driver_registry
+
+# Driver modules are imported lazily by the registry, only for type checking here
+if TYPE_CHECKING:
+    from .temperature import TemperatureSensorDriver
+    from .pressure import PressureSensorDriver
+    from .humidity import HumiditySensorDriver
+    from .dc_motor import DcMotorDriver
+    from .stepper_motor import StepperMotorDriver
 
 
 DeviceDriverType = Union[BaseSensorDriver, BaseControllerDriver]
@@ -32,9 +46,62 @@ class DeviceManager:
         self.enable_mqtt = enable_mqtt
 
         self.mqtt_session = None
+        self.simulator = None
         monitor_connections = None
         self._stop_event = threading.Event()
         self._drivers_lock = threading.Lock()
+        self.state_writer = DeviceStateWriter(
+            write_behind=settings.device_state_write_behind,
+            flush_interval=settings.device_state_flush_interval,
+            max_pending=settings.device_state_flush_max_pending,
+        )
+        self.state_writer.start()
+        # Sensor readings are also kept as history (see sensor_history)
+        self.sensor_history = get_sensor_history() if settings.sensor_history else None
+        # and the most recent ones in fixed-size ring buffers per sensor
+        self.reading_buffers = None
+        if settings.sensor_buffer_capacity > 0:
+            # NumPy is only imported when the buffers are in use
+            from .reading_buffers import SensorBuffers
+
+            self.reading_buffers = SensorBuffers(settings.sensor_buffer_capacity)
+        # and a longer stretch of them compressed
+        self.reading_archive = None
+        if settings.sensor_archive_hours > 0:
+            from .reading_chunks import ReadingArchive
+
+            self.reading_archive = ReadingArchive(
+                chunk_size=settings.sensor_archive_chunk_size,
+                retention=settings.sensor_archive_hours * 3600,
+                precision=settings.sensor_archive_precision,
+            )
+        # and checked against the alert rules
+        self.alerts = None
+        if settings.alerts:
+            from .alerts import AlertEngine, AlertFeed
+
+            self.alerts = AlertEngine(
+                rules=[AlertRule(**rule) for rule in settings.alert_rules],
+                interval=settings.alert_interval,
+                max_queue_size=settings.alert_queue_size,
+                history=settings.alert_history,
+                feed=AlertFeed(
+                    max_subscribers=settings.alert_max_subscribers,
+                    max_buffer=settings.alert_buffer,
+                ),
+            )
+            self.alerts.start()
+        # Sensors are sampled on a schedule of their own, not only when a client
+        # reads them
+        self.acquisition = None
+        if settings.acquisition:
+            self.acquisition = AcquisitionScheduler(
+                read=self._sample,
+                sink=self.record_readings,
+                workers=settings.acquisition_workers,
+                batch_size=settings.acquisition_batch_size,
+            )
+            self.acquisition.start()
 
         if self.enable_mqtt:
             self.mqtt_session = MqttDriver(settings.mqtt_broker, settings.mqtt_port)
@@ -56,7 +123,7 @@ class DeviceManager:
                                 add_device(
                                     SimDevice(
                                         uuid=device_id,
-                                        type=DeviceType(device_info["type"]),
+                                        type=device_info["type"],
                                         name=device_info["name"],
                                         description=device_info["description"],
                                         status=device_info["status"],
@@ -66,6 +133,8 @@ class DeviceManager:
                                 print(
                                     f"Added device {device_id} of type {device_info['type']}"
                                 )
+                                with self._session() as db:
+                                    self.restore_group_subscriptions(device_id, db)
                             except Exception as e:
                                 print(f"Failed to add device {device_id}: {e}")
 
@@ -81,26 +150,51 @@ class DeviceManager:
 
                     known = current
 
+        elif settings.fleet_simulation:
+            # NumPy is only imported when the simulator is in use
+            from .fleet_sim import FleetSimulator
+
+            self.simulator = FleetSimulator(seed=settings.fleet_simulation_seed)
+            self.simulator.start(settings.fleet_simulation_tick)
+            self.mqtt_session = self.simulator
+
         self.drivers: List[DeviceDriverType] = []
-        db_gen = get_db()
-        self.db = next(db_gen)
         try:
-            devices_to_ping: List[SimDevice] = db_driver.get_devices(self.db)
+            # Startup probing: devices and their groups are read in one short
+            # session, every device is probed over MQTT with no session held,
+            # and the outcome is written in a second short session
+            with self._session() as db:
+                devices_to_ping: List[SimDevice] = db_driver.get_devices(db)
+                device_groups = {
+                    device.uuid: db_driver.get_device_groups(db, device.uuid)
+                    for device in devices_to_ping
+                }
+            statuses: Dict[str, str] = {}
+            offline: List[str] = []
             for device in devices_to_ping:
                 try:
                     self.add_device(device, use_db=False)
                     device_driver = self._get_device(device.uuid)
-                    status = device_driver._get_status(self.mqtt_session)
-                    device.status = status
-                    db_driver.update_device(self.db, device.uuid, device)
+                    statuses[device.uuid] = device_driver._get_status(self.mqtt_session)
                 except TimeoutError:
-                    self.remove_device(device.uuid)
-                    db_driver.delete_device(self.db, device.uuid)
+                    offline.append(device.uuid)
                     continue
                 except Exception as e:
                     print(f"Error adding device {device.uuid}: {e}")
+                    continue
+                for name in device_groups[device.uuid]:
+                    try:
+                        self._update_group_subscription(device.uuid, name, join=True)
+                    except TimeoutError:
+                        print(
+                            f"Device {device.uuid} did not confirm joining group {name}"
+                        )
+            with self._session() as db:
+                for uuid, status in statuses.items():
+                    self.state_writer.update(uuid, db, status=status)
+                for uuid in offline:
+                    self.remove_device(uuid, db)
         finally:
-            # db_gen.close()
             if self.enable_mqtt and monitor_connections is not None:
                 monitor_thread = threading.Thread(
                     target=monitor_connections,
@@ -111,34 +205,72 @@ class DeviceManager:
 
     def stop(self):
         self._stop_event.set()
+        if self.acquisition is not None:
+            self.acquisition.stop()
+        if self.simulator is not None:
+            self.simulator.stop()
+        if self.alerts is not None:
+            self.alerts.stop()
+        try:
+            self.state_writer.stop()
+        except Exception as e:
+            print(f"Failed to flush device state: {e}")
 
     # region internal methods
 
-    driver_map: Dict[DeviceType, type] = {
-        DeviceType.TEMPERATURE_SENSOR: TemperatureSensorDriver,
-        DeviceType.PRESSURE_SENSOR: PressureSensorDriver,
-        DeviceType.HUMIDITY_SENSOR: HumiditySensorDriver,
-        DeviceType.DC_MOTOR: DcMotorDriver,
-        DeviceType.STEPPER_MOTOR: StepperMotorDriver,
-    }
+    registry = driver_registry
+
+    @contextmanager
+    def _session(self, db=None):
+        # API calls hand in the request's session, background work (monitor thread,
+        # startup probing) borrows a short-lived one from the pool
+        if db is not None:
+            yield db
+        else:
+            with db_driver.session_scope() as session:
+                yield session
 
-    def add_device(self, device: SimDevice, use_db: bool = True):
+    def add_device(self, device: SimDevice, use_db: bool = True, db=None):
+        driver_class = self.registry.get(device.type)
         with self._drivers_lock:
             if device.uuid in [d.uuid for d in self.drivers]:
                 raise ValueError(f"Device {device.uuid} already exists")
+            driver = driver_class(device.uuid)
+            if self.simulator is not None:
+                self.simulator.add(
+                    device.uuid, device.type, device.name, device.description
+                )
+            self.drivers.append(driver)
+        if use_db:
             try:
-                driver_class = self.driver_map[device.type]
-            except KeyError:
-                raise ValueError(f"Unsupported device type: {device.type}")
-            self.drivers.append(driver_class(device.uuid))
-            if use_db:
-                db_driver.add_device(self.db, device)
-
-    def remove_device(self, uuid: str):
+                with self._session(db) as active_db:
+                    db_driver.add_device(active_db, device)
+            except Exception:
+                with self._drivers_lock:
+                    self.drivers.remove(driver)
+                if self.simulator is not None:
+                    self.simulator.remove(device.uuid)
+                raise
+        if self.acquisition is not None:
+            self._schedule_sampling(device.uuid, device.type)
+
+    def remove_device(self, uuid: str, db=None):
         with self._drivers_lock:
             device_to_delete = self._get_device(uuid)
             self.drivers.remove(device_to_delete)
-            db_driver.delete_device(self.db, device_to_delete.uuid)
+        if self.simulator is not None:
+            self.simulator.remove(uuid)
+        self.state_writer.discard(uuid)
+        if self.reading_buffers is not None:
+            self.reading_buffers.remove(uuid)
+        if self.reading_archive is not None:
+            self.reading_archive.remove(uuid)
+        if self.alerts is not None:
+            self.alerts.remove_device(uuid)
+        if self.acquisition is not None:
+            self.acquisition.remove(uuid)
+        with self._session(db) as active_db:
+            db_driver.delete_device(active_db, device_to_delete.uuid)
 
     def _get_device(self, uuid: str):
         for device in self.drivers:
@@ -149,6 +281,19 @@ class DeviceManager:
     def list_devices(self):
         return [device.uuid for device in self.drivers]
 
+    def get_device(self, uuid: str, db=None):
+        with self._session(db) as active_db:
+            return self.state_writer.apply(
+                db_driver.get_device_by_uuid(active_db, uuid)
+            )
+
+    def get_devices(self, db=None):
+        with self._session(db) as active_db:
+            return [
+                self.state_writer.apply(device)
+                for device in db_driver.get_devices(active_db)
+            ]
+
     # endregion
 
     # region device operations
@@ -156,83 +301,156 @@ class DeviceManager:
     # region all device types operations
 
     def get_status(self, uuid: str, db=None):
-        active_db = db or self.db
         device = self._get_device(uuid)
         status = device._get_status(self.mqtt_session)
-        db_device = db_driver.get_device_by_uuid(active_db, uuid)
-        db_device.status = status
-        db_driver.update_device(active_db, uuid, db_device)
+        self.state_writer.update(uuid, db, status=status)
         return status
 
     def get_version(self, uuid: str, db=None):
-        active_db = db or self.db
         device = self._get_device(uuid)
         version = device._get_version(self.mqtt_session)
-        db_device = db_driver.get_device_by_uuid(active_db, uuid)
-        db_device.version = version
-        db_driver.update_device(active_db, uuid, db_device)
+        self.state_writer.update(uuid, db, version=version)
         return version
 
     def update_name(self, uuid: str, new_name: str, db=None):
-        active_db = db or self.db
         device = self._get_device(uuid)
         device._update_name(new_name, self.mqtt_session)
-        db_device = db_driver.get_device_by_uuid(active_db, uuid)
-        db_device.name = new_name
-        db_driver.update_device(active_db, uuid, db_device)
+        self.state_writer.update(uuid, db, name=new_name)
         return new_name
 
     def update_description(self, uuid: str, new_description: str, db=None):
-        active_db = db or self.db
         device = self._get_device(uuid)
         device._update_description(new_description, self.mqtt_session)
-        db_device = db_driver.get_device_by_uuid(active_db, uuid)
-        db_device.description = new_description
-        db_driver.update_device(active_db, uuid, db_device)
+        self.state_writer.update(uuid, db, description=new_description)
         return new_description
 
     # endregion
 
+    # region sensor history
+
+    def _record_reading(self, uuid: str, command: str, value):
+        timestamp = datetime.now()
+        quantity = READING_QUANTITIES[command]
+        if self.sensor_history is not None:
+            self.sensor_history.record(uuid, quantity, float(value), timestamp)
+        if self.reading_buffers is not None:
+            self.reading_buffers.append(
+                uuid, quantity, timestamp.timestamp(), float(value)
+            )
+        if self.reading_archive is not None:
+            self.reading_archive.append(
+                uuid, quantity, timestamp.timestamp(), float(value)
+            )
+        if self.alerts is not None:
+            self.alerts.record(uuid, quantity, timestamp.timestamp(), float(value))
+
+    def record_readings(self, command: str, values: Dict[str, float]):
+        # A batch of readings of one command taken together (group commands,
+        # scheduled sampling), handed on as one batch everywhere
+        if not values:
+            return
+        timestamp = datetime.now()
+        quantity = READING_QUANTITIES[command]
+        uuids = list(values)
+        if self.sensor_history is not None:
+            self.sensor_history.submit(
+                [
+                    SensorReading(
+                        device_uuid=uuid,
+                        quantity=quantity,
+                        timestamp=timestamp,
+                        value=value,
+                    )
+                    for uuid, value in values.items()
+                ]
+            )
+        timestamps = [timestamp.timestamp()] * len(uuids)
+        if self.reading_buffers is not None:
+            self.reading_buffers.append_many(
+                quantity, uuids, timestamps, list(values.values())
+            )
+        if self.reading_archive is not None:
+            self.reading_archive.append_many(
+                quantity, uuids, timestamps, list(values.values())
+            )
+        if self.alerts is not None:
+            self.alerts.submit(quantity, uuids, timestamps, list(values.values()))
+
+    def _sample(self, uuid: str, command: str) -> float:
+        # A scheduled read, recorded in batches by the scheduler's sink
+        return getattr(self._get_device(uuid), command)(self.mqtt_session)
+
+    def _schedule_sampling(self, uuid: str, device_type):
+        command = sensor_read(self._get_device(uuid))
+        if command is None:
+            return
+        device_type = getattr(device_type, "value", device_type)
+        intervals = settings.acquisition_intervals
+        interval = intervals.get(uuid, intervals.get(device_type))
+        self.acquisition.schedule(
+            uuid,
+            command,
+            settings.acquisition_interval if interval is None else interval,
+        )
+
+    def set_sampling_interval(self, uuid: str, interval: float):
+        if self.acquisition is None:
+            raise ValueError("Scheduled sampling is disabled")
+        command = sensor_read(self._get_device(uuid))
+        if command is None:
+            raise ValueError(f"Device {uuid} is not a sensor")
+        self.acquisition.schedule(uuid, command, interval)
+
+    # endregion
+
     # region temperature sensor operations
 
     def read_temperature(self, uuid: str):
-        device = cast(TemperatureSensorDriver, self._get_device(uuid))
-        return device.read_temperature(self.mqtt_session)
+        device = cast("TemperatureSensorDriver", self._get_device(uuid))
+        temperature = device.read_temperature(self.mqtt_session)
+        self._record_reading(uuid, "read_temperature", temperature)
+        return temperature
 
     # endregion
 
     # region pressure sensor operations
 
     def read_pressure(self, uuid: str):
-        device = cast(PressureSensorDriver, self._get_device(uuid))
-        return device.read_pressure(self.mqtt_session)
+        device = cast("PressureSensorDriver", self._get_device(uuid))
+        pressure = device.read_pressure(self.mqtt_session)
+        self._record_reading(uuid, "read_pressure", pressure)
+        return pressure
 
     # endregion
 
     # region humidity sensor operations
 
     def read_humidity(self, uuid: str):
-        device = cast(HumiditySensorDriver, self._get_device(uuid))
-        return device.read_humidity(self.mqtt_session)
+        device = cast("HumiditySensorDriver", self._get_device(uuid))
+        humidity = device.read_humidity(self.mqtt_session)
+        self._record_reading(uuid, "read_humidity", humidity)
+        return humidity
 
     # endregion
 
     # region dc motor operations
 
     def get_dc_motor_speed(self, uuid: str):
-        device = cast(DcMotorDriver, self._get_device(uuid))
-        return device.get_speed(self.mqtt_session)
+        device = cast("DcMotorDriver", self._get_device(uuid))
+        speed = device.get_speed(self.mqtt_session)
+        self._record_reading(uuid, "get_speed", speed)
+        return speed
 
     def get_dc_motor_direction(self, uuid: str):
-        device = cast(DcMotorDriver, self._get_device(uuid))
+        device = cast("DcMotorDriver", self._get_device(uuid))
         return device.get_direction(self.mqtt_session)
 
     def set_dc_motor_speed(self, uuid: str, speed: float):
-        device = cast(DcMotorDriver, self._get_device(uuid))
+        device = cast("DcMotorDriver", self._get_device(uuid))
         device.set_speed(speed, self.mqtt_session)
 
     def set_dc_motor_direction(self, uuid: str, direction: MotorDirection):
-        device = cast(DcMotorDriver, self._get_device(uuid))
+        device = cast("DcMotorDriver", self._get_device(uuid))
         device.set_direction(direction, self.mqtt_session)
 
     # endregion
@@ -240,41 +458,164 @@ class DeviceManager:
     # region stepper motor operations
 
     def get_stepper_motor_speed(self, uuid: str):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
-        return device.get_speed(self.mqtt_session)
+        device = cast("StepperMotorDriver", self._get_device(uuid))
+        speed = device.get_speed(self.mqtt_session)
+        self._record_reading(uuid, "get_speed", speed)
+        return speed
 
     def get_stepper_motor_direction(self, uuid: str):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
+        device = cast("StepperMotorDriver", self._get_device(uuid))
         return device.get_direction(self.mqtt_session)
 
     def get_stepper_motor_acceleration(self, uuid: str):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
+        device = cast("StepperMotorDriver", self._get_device(uuid))
         return device.get_acceleration(self.mqtt_session)
 
     def get_stepper_motor_location(self, uuid: str):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
-        return device.get_location(self.mqtt_session)
+        device = cast("StepperMotorDriver", self._get_device(uuid))
+        location = device.get_location(self.mqtt_session)
+        self._record_reading(uuid, "get_location", location)
+        return location
 
     def set_stepper_motor_speed(self, uuid: str, speed: float):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
+        device = cast("StepperMotorDriver", self._get_device(uuid))
         device.set_speed(speed, self.mqtt_session)
 
     def set_stepper_motor_direction(self, uuid: str, direction: MotorDirection):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
+        device = cast("StepperMotorDriver", self._get_device(uuid))
         device.set_direction(direction, self.mqtt_session)
 
     def set_stepper_motor_acceleration(self, uuid: str, acceleration: float):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
+        device = cast("StepperMotorDriver", self._get_device(uuid))
         device.set_acceleration(acceleration, self.mqtt_session)
 
     def set_stepper_motor_absolute_location(self, uuid: str, location: int):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
+        device = cast("StepperMotorDriver", self._get_device(uuid))
         device.move_absolute(location, self.mqtt_session)
 
     def set_stepper_motor_relative_location(self, uuid: str, location: int):
-        device = cast(StepperMotorDriver, self._get_device(uuid))
+        device = cast("StepperMotorDriver", self._get_device(uuid))
         device.move_relative(location, self.mqtt_session)
 
+    # endregion
+
+    # region device group operations
+
+    @staticmethod
+    def group_topic(name: str):
+        return f"sim-device-control/group/{name}/command"
+
+    def _update_group_subscription(self, uuid: str, name: str, join: bool):
+        # Sim devices subscribe to group topics on request, so only connected
+        # devices need to be told about membership changes
+        if not self.mqtt_session or uuid not in self.list_devices():
+            return
+        self.mqtt_session.send_command_and_wait(
+            cmd_topic=f"sim-device-control/{uuid}/command",
+            reply_topic=f"sim-device-control/{uuid}/response",
+            command="join_group" if join else "leave_group",
+            parameter=name,
+            timeout=settings.mqtt_command_timeout,
+        )
+
+    def restore_group_subscriptions(self, uuid: str, db=None):
+        with self._session(db) as active_db:
+            names = db_driver.get_device_groups(active_db, uuid)
+        for name in names:
+            try:
+                self._update_group_subscription(uuid, name, join=True)
+            except TimeoutError:
+                print(f"Device {uuid} did not confirm joining group {name}")
+
+    def create_group(self, group: DeviceGroup, db=None):
+        with self._session(db) as active_db:
+            created = db_driver.add_group(active_db, group)
+        for uuid in created.device_uuids:
+            try:
+                self._update_group_subscription(uuid, created.name, join=True)
+            except TimeoutError:
+                print(f"Device {uuid} did not confirm joining group {created.name}")
+        return created
+
+    def add_group_member(self, name: str, uuid: str, db=None):
+        with self._session(db) as active_db:
+            db_driver.add_group_member(active_db, name, uuid)
+        # The membership stands, the device subscribes again when it reconnects
+        try:
+            self._update_group_subscription(uuid, name, join=True)
+        except TimeoutError:
+            print(f"Device {uuid} did not confirm joining group {name}")
+
+    def remove_group_member(self, name: str, uuid: str, db=None):
+        with self._session(db) as active_db:
+            db_driver.remove_group_member(active_db, name, uuid)
+        try:
+            self._update_group_subscription(uuid, name, join=False)
+        except TimeoutError:
+            print(f"Device {uuid} did not confirm leaving group {name}")
+
+    def delete_group(self, name: str, db=None):
+        with self._session(db) as active_db:
+            members = db_driver.get_group_members(active_db, name)
+            db_driver.delete_group(active_db, name)
+        for uuid in members:
+            try:
+                self._update_group_subscription(uuid, name, join=False)
+            except TimeoutError:
+                print(f"Device {uuid} did not confirm leaving group {name}")
+
+    def _record_group_readings(self, command: str, responses: Dict[str, str]):
+        # One batch for the whole group; replies that are errors are skipped
+        values = {}
+        for uuid, response in responses.items():
+            try:
+                values[uuid] = float(response)
+            except ValueError:
+                continue
+        self.record_readings(command, values)
+
+    def send_group_command(
+        self, name: str, command: str, parameter: str = "", db=None
+    ) -> GroupCommandResult:
+        with self._session(db) as active_db:
+            # Raises if the group does not exist
+            members = db_driver.get_group(active_db, name).device_uuids
+        connected = set(self.list_devices())
+        targets = [uuid for uuid in members if uuid in connected]
+
+        responses: Dict[str, str] = {}
+        if self.mqtt_session:
+            replies = self.mqtt_session.send_group_command_and_wait(
+                group_topic=self.group_topic(name),
+                reply_topics=[
+                    f"sim-device-control/{uuid}/response" for uuid in targets
+                ],
+                command=command,
+                parameter=parameter,
+                expected=targets,
+                timeout=settings.mqtt_command_timeout,
+            )
+            for uuid, reply in replies.items():
+                responses[uuid] = str(reply.get("response"))
+        else:
+            # Answer locally from each driver's command table
+            for uuid in targets:
+                try:
+                    result = self._get_device(uuid).execute(command, parameter)
+                    responses[uuid] = str(getattr(result, "value", result))
+                except ValueError as e:
+                    responses[uuid] = str(e)
+
+        if command in READING_QUANTITIES:
+            self._record_group_readings(command, responses)
+
+        return GroupCommandResult(
+            group=name,
+            command=command,
+            responses=responses,
+            missing=[uuid for uuid in members if uuid not in responses],
+        )
+
 
 # endregion
 
@@ -0,0 +1,108 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+from . import db as db_driver
+from ..schemas import SimDevice
+
+
+class DeviceStateWriter:
+    # Coalesces device row updates (status, version, name, description) in memory
+    # and flushes them in a single transaction on an interval or once enough rows
+    # are dirty. With write_behind disabled every update is written immediately.
+    def __init__(
+        self,
+        write_behind: bool = True,
+        flush_interval: float = 1.0,
+        max_pending: int = 256,
+    ):
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Rows taken by a running flush stay visible to readers until committed
+        self._in_flight: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.write_behind and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Failed to flush device state: {e}")
+
+    @contextmanager
+    def _session(self, db=None):
+        if db is not None:
+            yield db
+        else:
+            with db_driver.session_scope() as session:
+                yield session
+
+    def update(self, uuid: str, db=None, **fields):
+        if not self.write_behind:
+            with self._session(db) as active_db:
+                db_driver.update_device_fields(active_db, {uuid: fields})
+            return
+        with self._lock:
+            self._pending.setdefault(uuid, {}).update(fields)
+            dirty = len(self._pending)
+        if dirty >= self.max_pending:
+            self._wake.set()
+
+    def discard(self, uuid: str):
+        with self._lock:
+            self._pending.pop(uuid, None)
+
+    def pending(self, uuid: str) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._in_flight.get(uuid, {}), **self._pending.get(uuid, {})}
+
+    def apply(self, device):
+        # Overlays unflushed updates so callers read their own writes
+        fields = self.pending(device.uuid)
+        if not fields:
+            return device
+        return SimDevice.model_validate(device, from_attributes=True).model_copy(
+            update=fields
+        )
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+            if not batch:
+                return 0
+            try:
+                with db_driver.session_scope() as db:
+                    db_driver.update_device_fields(db, batch)
+            except Exception:
+                # Keep the batch, newer updates win over the failed ones
+                with self._lock:
+                    for uuid, fields in batch.items():
+                        self._pending[uuid] = {**fields, **self._pending.get(uuid, {})}
+                raise
+            finally:
+                with self._lock:
+                    self._in_flight = {}
+            return len(batch)
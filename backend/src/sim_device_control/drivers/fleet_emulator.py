@@ -0,0 +1,103 @@
+import json
+import time
+from typing import Iterable, List, Optional
+from .fleet_sim import FleetSimulator
+
+CONNECTIONS_TOPIC = "sim-device-control/connections"
+COMMAND_TOPICS = "sim-device-control/+/command"
+GROUP_COMMAND_TOPICS = "sim-device-control/group/+/command"
+
+
+class FleetEmulator:
+    # Emulates many sim devices on a single MQTT client: announces them on the
+    # connections topic and answers their command topics with the same reply
+    # payload as the Rust sim device. Device state comes from a FleetSimulator.
+    def __init__(self, client, simulator: Optional[FleetSimulator] = None):
+        self.client = client
+        self.simulator = simulator or FleetSimulator()
+        self.client.on_message = self._on_message
+        self.commands = 0
+
+    def add_many(self, device_type, count: int, prefix: str = "sim") -> List[str]:
+        return self.simulator.add_many(device_type, count, prefix)
+
+    def _announce(self, device_id: str, action: str):
+        info = self.simulator.info(device_id)
+        payload = {
+            "device_id": device_id,
+            "device_type": info["type"],
+            "action": action,
+        }
+        if action == "connected":
+            payload.update(
+                name=info["name"],
+                description=info["description"],
+                status="Fleet Simulation",
+                version="1.0.0",
+            )
+        self.client.publish(CONNECTIONS_TOPIC, json.dumps(payload), qos=1)
+
+    def connect(self, device_ids: Optional[Iterable[str]] = None):
+        for device_id in device_ids or self.simulator.device_ids():
+            self._announce(device_id, "connected")
+
+    def disconnect(self, device_ids: Optional[Iterable[str]] = None):
+        for device_id in device_ids or self.simulator.device_ids():
+            self._announce(device_id, "disconnected")
+
+    def start(self):
+        self.client.subscribe(COMMAND_TOPICS, qos=1)
+        self.client.subscribe(GROUP_COMMAND_TOPICS, qos=1)
+        self.client.loop_start()
+        self.connect()
+
+    def stop(self):
+        self.disconnect()
+        self.client.loop_stop()
+
+    def _publish_reply(self, reply: dict):
+        self.client.publish(
+            f"sim-device-control/{reply['device_id']}/response",
+            json.dumps(reply),
+            qos=1,
+        )
+
+    def _on_message(self, client, userdata, msg):
+        try:
+            message = json.loads(msg.payload.decode())
+            request_id = message["id"]
+            command = message["command"]
+            parameter = message["parameter"]
+        except (ValueError, KeyError, TypeError):
+            message = None
+
+        if msg.topic.startswith("sim-device-control/group/"):
+            if message is None:
+                return
+            replies = self.simulator.send_group_command_and_wait(
+                msg.topic, [], command, parameter, []
+            )
+        else:
+            device_id = msg.topic.split("/")[1]
+            if device_id not in self.simulator:
+                return
+            if message is None:
+                request_id = ""
+                replies = {
+                    device_id: {
+                        "device_id": device_id,
+                        "response": "Invalid message format",
+                        "timestamp": int(time.time() * 1000),
+                    }
+                }
+            else:
+                replies = {
+                    device_id: self.simulator.send_command_and_wait(
+                        msg.topic, "", command, parameter
+                    )
+                }
+
+        for reply in replies.values():
+            reply["id"] = request_id
+            self.commands += 1
+            self._publish_reply(reply)
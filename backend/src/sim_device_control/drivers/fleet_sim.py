@@ -0,0 +1,376 @@
+import math
+import threading
+import time
+import uuid as uuid_lib
+from typing import Dict, List, Optional, Set
+import numpy as np
+
+# Device types the simulator can model, the position is the type's kind code
+KINDS = [
+    "temperature_sensor",
+    "pressure_sensor",
+    "humidity_sensor",
+    "dc_motor",
+    "stepper_motor",
+]
+TEMPERATURE, PRESSURE, HUMIDITY, DC_MOTOR, STEPPER_MOTOR = range(len(KINDS))
+FREE = -1
+
+# Sensor models indexed by kind: resting value, random walk drift per sqrt(second),
+# measurement noise, how fast drift decays back to rest (1/s) and the valid range
+SENSOR_BASELINE = np.array([21.0, 50.0, 45.0])
+SENSOR_DRIFT = np.array([0.05, 0.1, 0.1])
+SENSOR_NOISE = np.array([0.1, 0.2, 0.3])
+SENSOR_DRIFT_DECAY = np.array([0.01, 0.01, 0.01])
+SENSOR_LOW = np.array([-20.0, 0.0, 0.0])
+SENSOR_HIGH = np.array([50.0, 100.0, 100.0])
+SENSOR_COMMANDS = {
+    "read_temperature": TEMPERATURE,
+    "read_pressure": PRESSURE,
+    "read_humidity": HUMIDITY,
+}
+
+# Time constant (s) of a DC motor reaching its set speed
+DC_MOTOR_TIME_CONSTANT = 0.5
+
+STATE_ARRAYS = (
+    "value",
+    "drift",
+    "velocity",
+    "speed",
+    "acceleration",
+    "location",
+    "target",
+)
+
+
+def _format(value: float) -> str:
+    return str(float(value))
+
+
+def _direction(forward: bool) -> str:
+    return "forward" if forward else "backward"
+
+
+class FleetSimulator:
+    # Simulates a fleet of devices in NumPy arrays, one slot per device, and
+    # answers the same command protocol as MqttDriver so drivers can use it as
+    # their mqtt_session when no broker is available. Seeded simulators stepped
+    # by hand are reproducible; start() advances the fleet in real time instead.
+    def __init__(self, seed: Optional[int] = None, capacity: int = 1024):
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._index: Dict[str, int] = {}
+        self._uuids: List[Optional[str]] = []
+        self._names: List[str] = []
+        self._descriptions: List[str] = []
+        self._free: List[int] = []
+        self._size = 0
+        self.groups: Dict[str, Set[str]] = {}
+        self.elapsed = 0.0
+
+        self.kind = np.full(capacity, FREE, dtype=np.int8)
+        self.forward = np.ones(capacity, dtype=bool)
+        for name in STATE_ARRAYS:
+            setattr(self, name, np.zeros(capacity))
+
+    # region fleet membership
+
+    def _grow(self, needed: int):
+        capacity = len(self.kind)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        extra = capacity - len(self.kind)
+        self.kind = np.concatenate([self.kind, np.full(extra, FREE, dtype=np.int8)])
+        self.forward = np.concatenate([self.forward, np.ones(extra, dtype=bool)])
+        for name in STATE_ARRAYS:
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(extra)]))
+
+    def _reset(self, slots, kind: int):
+        self.kind[slots] = kind
+        self.forward[slots] = True
+        for name in STATE_ARRAYS:
+            getattr(self, name)[slots] = 0.0
+        if kind in SENSOR_COMMANDS.values():
+            self.value[slots] = SENSOR_BASELINE[kind]
+
+    @staticmethod
+    def _kind(device_type) -> int:
+        type_name = getattr(device_type, "value", device_type)
+        try:
+            return KINDS.index(type_name)
+        except ValueError:
+            raise ValueError(
+                f"Device type {type_name} is not supported by the fleet simulator"
+            )
+
+    def add(self, uuid: str, device_type, name: str = "", description: str = ""):
+        kind = self._kind(device_type)
+        with self._lock:
+            if uuid in self._index:
+                raise ValueError(f"Device {uuid} is already simulated")
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = self._size
+                self._grow(slot + 1)
+                self._size += 1
+                self._uuids.append(None)
+                self._names.append("")
+                self._descriptions.append("")
+            self._reset(slot, kind)
+            self._index[uuid] = slot
+            self._uuids[slot] = uuid
+            self._names[slot] = name
+            self._descriptions[slot] = description
+        return slot
+
+    def add_many(self, device_type, count: int, prefix: str = "sim") -> List[str]:
+        # Bulk registration for load tests, slots are appended as one block
+        kind = self._kind(device_type)
+        type_name = KINDS[kind]
+        with self._lock:
+            start = self._size
+            uuids = [f"{prefix}-{type_name}-{start + i}" for i in range(count)]
+            if any(uuid in self._index for uuid in uuids):
+                raise ValueError("Some devices are already simulated")
+            self._grow(start + count)
+            self._size += count
+            self._reset(slice(start, start + count), kind)
+            self._index.update(zip(uuids, range(start, start + count)))
+            self._uuids.extend(uuids)
+            self._names.extend([f"Simulated {type_name}"] * count)
+            self._descriptions.extend([""] * count)
+        return uuids
+
+    def remove(self, uuid: str):
+        with self._lock:
+            slot = self._index.pop(uuid, None)
+            if slot is None:
+                return
+            self.kind[slot] = FREE
+            self._uuids[slot] = None
+            self._free.append(slot)
+            for members in self.groups.values():
+                members.discard(uuid)
+
+    def device_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    def info(self, uuid: str) -> Dict[str, str]:
+        with self._lock:
+            slot = self._index[uuid]
+            return {
+                "type": KINDS[self.kind[slot]],
+                "name": self._names[slot],
+                "description": self._descriptions[slot],
+            }
+
+    def __contains__(self, uuid: str):
+        return uuid in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    # endregion
+
+    # region simulation
+
+    def step(self, dt: float):
+        if dt <= 0:
+            return
+        with self._lock:
+            kind = self.kind[: self._size]
+            self._step_sensors(np.flatnonzero((kind >= 0) & (kind < DC_MOTOR)), dt)
+            self._step_dc_motors(np.flatnonzero(kind == DC_MOTOR), dt)
+            self._step_stepper_motors(np.flatnonzero(kind == STEPPER_MOTOR), dt)
+            self.elapsed += dt
+
+    def _step_sensors(self, slots: np.ndarray, dt: float):
+        if not len(slots):
+            return
+        kind = self.kind[slots]
+        # Mean reverting random walk plus white measurement noise
+        drift = self.drift[slots] * np.exp(-SENSOR_DRIFT_DECAY[kind] * dt)
+        step_drift = SENSOR_DRIFT[kind] * math.sqrt(dt)
+        drift += self._rng.normal(0.0, 1.0, len(slots)) * step_drift
+        self.drift[slots] = drift
+        value = SENSOR_BASELINE[kind] + drift
+        value += self._rng.normal(0.0, 1.0, len(slots)) * SENSOR_NOISE[kind]
+        self.value[slots] = np.clip(value, SENSOR_LOW[kind], SENSOR_HIGH[kind])
+
+    def _step_dc_motors(self, slots: np.ndarray, dt: float):
+        if not len(slots):
+            return
+        # First order spin-up towards the signed set speed, reversing passes
+        # through zero instead of flipping instantly
+        target = np.where(self.forward[slots], self.speed[slots], -self.speed[slots])
+        velocity = self.velocity[slots]
+        velocity += (target - velocity) * (1.0 - math.exp(-dt / DC_MOTOR_TIME_CONSTANT))
+        self.velocity[slots] = velocity
+
+    def _step_stepper_motors(self, slots: np.ndarray, dt: float):
+        if not len(slots):
+            return
+        location = self.location[slots]
+        velocity = self.velocity[slots]
+        speed = self.speed[slots]
+        acceleration = self.acceleration[slots]
+        remaining = self.target[slots] - location
+        heading = np.sign(remaining)
+
+        # Trapezoidal profile: accelerate to the set speed, brake in time to stop
+        # on the target. Zero acceleration changes speed instantly.
+        accelerating = acceleration > 0
+        safe_acceleration = np.where(accelerating, acceleration, 1.0)
+        stopping = np.where(
+            accelerating, velocity * velocity / (2.0 * safe_acceleration), 0.0
+        )
+        braking = (velocity * heading > 0) & (stopping >= np.abs(remaining))
+        desired = np.where(braking, 0.0, heading * speed)
+        max_change = np.where(accelerating, acceleration * dt, np.inf)
+        velocity = velocity + np.clip(desired - velocity, -max_change, max_change)
+        moved = velocity * dt
+
+        # A speed of zero moves instantly, like the stored value drivers
+        arrived = (speed <= 0) | (
+            (moved * heading >= 0) & (np.abs(moved) >= np.abs(remaining))
+        )
+        self.location[slots] = np.where(arrived, self.target[slots], location + moved)
+        self.velocity[slots] = np.where(arrived, 0.0, velocity)
+
+    def start(self, tick: float = 0.1):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, args=(tick,), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, tick: float):
+        last = time.monotonic()
+        while not self._stop_event.wait(tick):
+            now = time.monotonic()
+            self.step(now - last)
+            last = now
+
+    # endregion
+
+    # region command protocol
+
+    def _operate(self, slot: int, command: str, parameter: str) -> Optional[str]:
+        kind = int(self.kind[slot])
+        if command == "get_status":
+            return "Fleet Simulation"
+        if command == "get_version":
+            return "1.0.0"
+        if command == "get_name":
+            return self._names[slot]
+        if command == "set_name":
+            self._names[slot] = parameter
+            return parameter
+        if command == "get_description":
+            return self._descriptions[slot]
+        if command == "set_description":
+            self._descriptions[slot] = parameter
+            return parameter
+        if SENSOR_COMMANDS.get(command) == kind:
+            return _format(self.value[slot])
+        if kind in (DC_MOTOR, STEPPER_MOTOR):
+            return self._operate_motor(slot, kind, command, parameter)
+        return None
+
+    def _operate_motor(
+        self, slot: int, kind: int, command: str, parameter: str
+    ) -> Optional[str]:
+        if command == "get_direction":
+            return _direction(self.forward[slot])
+        if command == "set_direction":
+            if parameter.lower() not in ("forward", "backward"):
+                return None
+            self.forward[slot] = parameter.lower() == "forward"
+            return _direction(self.forward[slot])
+        if command == "get_speed":
+            if kind == DC_MOTOR:
+                return _format(abs(self.velocity[slot]))
+            return _format(self.speed[slot])
+        if kind == STEPPER_MOTOR and command == "get_acceleration":
+            return _format(self.acceleration[slot])
+        if kind == STEPPER_MOTOR and command == "get_location":
+            # Motion is integrated in floats, the device reports whole steps
+            return _format(round(float(self.location[slot])))
+        try:
+            value = float(parameter)
+        except ValueError:
+            return None
+        if command == "set_speed":
+            if kind == DC_MOTOR and not 0.0 <= value <= 100.0:
+                return None
+            self.speed[slot] = value
+            return _format(value)
+        if kind == DC_MOTOR:
+            return None
+        if command == "set_acceleration":
+            self.acceleration[slot] = value
+            return _format(value)
+        if command == "set_location_absolute":
+            self.target[slot] = value
+            return _format(self.target[slot])
+        if command == "set_location_relative":
+            self.target[slot] += value
+            return _format(self.target[slot])
+        return None
+
+    def _reply(self, device_id: str, command: str, parameter: str) -> dict:
+        if command == "join_group":
+            self.groups.setdefault(parameter, set()).add(device_id)
+            response = parameter
+        elif command == "leave_group":
+            self.groups.get(parameter, set()).discard(device_id)
+            response = parameter
+        else:
+            response = self._operate(self._index[device_id], command, parameter)
+        if response is None:
+            response = f"Invalid command: {command}"
+        return {
+            "id": str(uuid_lib.uuid4()),
+            "device_id": device_id,
+            "response": response,
+            "timestamp": int(time.time() * 1000),
+        }
+
+    def send_command_and_wait(
+        self, cmd_topic, reply_topic, command, parameter, timeout=5
+    ):
+        device_id = cmd_topic.split("/")[1]
+        with self._lock:
+            if device_id not in self._index:
+                raise TimeoutError("No reply received")
+            return self._reply(device_id, command, parameter)
+
+    def send_group_command_and_wait(
+        self, group_topic, reply_topics, command, parameter, expected, timeout=5
+    ):
+        name = group_topic.split("/")[2]
+        with self._lock:
+            members = [
+                device_id
+                for device_id in self.groups.get(name, ())
+                if device_id in self._index
+            ]
+            return {
+                device_id: self._reply(device_id, command, parameter)
+                for device_id in members
+            }
+
+    # endregion
@@ -0,0 +1,115 @@
+import queue
+import threading
+from typing import Dict, List, Set
+from paho.mqtt.client import topic_matches_sub
+
+
+class LocalMessage:
+    def __init__(self, topic: str, payload: bytes):
+        self.topic = topic
+        self.payload = payload
+
+
+class LocalClient:
+    # Implements the part of paho's Client used by MqttDriver and the fleet
+    # emulator, so either side can run against a LocalBroker instead
+    def __init__(self, broker: "LocalBroker"):
+        self.broker = broker
+        self.on_message = None
+        self.on_connect = None
+
+    def connect(self, host: str = "", port: int = 1883, keepalive: int = 60):
+        if self.on_connect:
+            self.on_connect(self, None, {}, 0)
+
+    def subscribe(self, topic: str, qos: int = 0):
+        self.broker.subscribe(self, topic)
+
+    def unsubscribe(self, topic: str):
+        self.broker.unsubscribe(self, topic)
+
+    def publish(self, topic: str, payload, qos: int = 0, retain: bool = False):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self.broker.publish(topic, payload)
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        self.broker.unsubscribe_all(self)
+
+
+class LocalBroker:
+    # In-process stand-in for the MQTT broker used by load tests. Messages are
+    # queued and delivered in order on the broker's own thread, like a network
+    # loop would; exact topics are looked up directly and only wildcard filters
+    # are matched one by one.
+    def __init__(self):
+        self._exact: Dict[str, Set[LocalClient]] = {}
+        self._wildcards: Dict[str, Set[LocalClient]] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self.delivered = 0
+
+    def client(self) -> LocalClient:
+        return LocalClient(self)
+
+    def _table(self, topic: str):
+        return self._wildcards if "+" in topic or "#" in topic else self._exact
+
+    def subscribe(self, client: LocalClient, topic: str):
+        with self._lock:
+            self._table(topic).setdefault(topic, set()).add(client)
+
+    def unsubscribe(self, client: LocalClient, topic: str):
+        with self._lock:
+            self._table(topic).get(topic, set()).discard(client)
+
+    def unsubscribe_all(self, client: LocalClient):
+        with self._lock:
+            for table in (self._exact, self._wildcards):
+                for clients in table.values():
+                    clients.discard(client)
+
+    def publish(self, topic: str, payload: bytes):
+        self._queue.put((topic, payload))
+
+    def _subscribers(self, topic: str) -> List[LocalClient]:
+        with self._lock:
+            clients = set(self._exact.get(topic, ()))
+            for pattern, subscribed in self._wildcards.items():
+                if subscribed and topic_matches_sub(pattern, topic):
+                    clients |= subscribed
+        return list(clients)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            topic, payload = item
+            message = LocalMessage(topic, payload)
+            for client in self._subscribers(topic):
+                if client.on_message is None:
+                    continue
+                try:
+                    client.on_message(client, None, message)
+                except Exception as e:
+                    print(f"Failed to deliver message on {topic}: {e}")
+            self.delivered += 1
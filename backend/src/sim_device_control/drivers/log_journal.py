@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+from pydantic import ValidationError
+from . import db as db_driver
+from ..schemas import LogRecord
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class LogJournal:
+    # Append-only audit journal on local disk. Records are appended as JSON lines
+    # to numbered segment files, which are handed to the OS on every append and
+    # fsynced in batches by a background thread, and rotated once they reach
+    # segment_max_bytes. ship() bulk loads the complete lines after the checkpoint
+    # into log_records and then moves the checkpoint; records shipped again after
+    # a crash between the two are skipped by uuid.
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 16 * 1024 * 1024,
+        fsync_interval: float = 0.2,
+    ):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._ship_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._dirty = False
+
+        self.appended = 0
+        self.shipped = 0
+        self.duplicates = 0
+        self.skipped_lines = 0
+
+        # Segments left by an earlier process are only read, never appended to,
+        # so a torn last line cannot be continued by new records
+        segments = self.segments()
+        self._open_segment(segments[-1] + 1 if segments else 1)
+
+    # region Writing
+
+    def _segment_path(self, sequence: int) -> str:
+        return os.path.join(
+            self.directory, f"{SEGMENT_PREFIX}{sequence:012d}{SEGMENT_SUFFIX}"
+        )
+
+    def segments(self) -> List[int]:
+        return sorted(
+            int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _open_segment(self, sequence: int):
+        self._sequence = sequence
+        self._file = open(self._segment_path(sequence), "ab")
+        self._size = self._file.tell()
+
+    def append(self, record: LogRecord):
+        line = (record.model_dump_json() + "\n").encode()
+        with self._lock:
+            if self._size and self._size + len(line) > self.segment_max_bytes:
+                self._sync_locked()
+                self._file.close()
+                self._open_segment(self._sequence + 1)
+            # Flushed to the OS right away: a crashed process loses nothing, the
+            # batched fsync covers the machine going down
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line)
+            self._dirty = True
+            self.appended += 1
+
+    def _sync_locked(self):
+        if self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+
+    def _run(self):
+        while not self._stop_event.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except OSError as e:
+                print(f"Failed to sync audit journal: {e}")
+
+    # endregion
+
+    # region Shipping
+
+    def _read_checkpoint(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as checkpoint:
+                position = json.load(checkpoint)
+            return position["segment"], position["offset"]
+        except FileNotFoundError:
+            segments = self.segments()
+            return (segments[0] if segments else self._sequence), 0
+
+    def _write_checkpoint(self, sequence: int, offset: int):
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        partial = f"{path}.partial"
+        with open(partial, "w") as checkpoint:
+            json.dump({"segment": sequence, "offset": offset}, checkpoint)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(partial, path)
+
+    def _read_records(
+        self, max_records: int
+    ) -> Tuple[List[LogRecord], Tuple[int, int], List[int]]:
+        # Complete lines from the checkpoint on, across segments, and the position
+        # after the last one read. Segments read to the end (other than the one
+        # being appended to) are returned for removal.
+        sequence, offset = self._read_checkpoint()
+        with self._lock:
+            active = self._sequence
+        records: List[LogRecord] = []
+        finished: List[int] = []
+        for segment in [s for s in self.segments() if s >= sequence]:
+            if segment != sequence:
+                offset = 0
+            with open(self._segment_path(segment), "rb") as journal:
+                journal.seek(offset)
+                while len(records) < max_records:
+                    line = journal.readline()
+                    if not line.endswith(b"\n"):
+                        if line and segment != active:
+                            # Torn write from a crashed process, never completed
+                            self.skipped_lines += 1
+                            offset += len(line)
+                        break
+                    offset += len(line)
+                    try:
+                        records.append(LogRecord.model_validate_json(line))
+                    except ValidationError as e:
+                        self.skipped_lines += 1
+                        print(f"Skipping unreadable audit journal line: {e}")
+            if len(records) >= max_records or segment == active:
+                return records, (segment, offset), finished
+            finished.append(segment)
+            sequence = segment
+        return records, (sequence, offset), finished
+
+    def ship(self, max_records: int = 500) -> int:
+        with self._ship_lock:
+            records, (sequence, offset), finished = self._read_records(max_records)
+            if records:
+                with db_driver.session_scope() as db:
+                    inserted = db_driver.add_logs(db, records, skip_existing=True)
+                self.duplicates += len(records) - inserted
+            if records or finished:
+                self._write_checkpoint(sequence, offset)
+            for segment in finished:
+                if segment != sequence:
+                    os.remove(self._segment_path(segment))
+            self.shipped += len(records)
+            return len(records)
+
+    def pending_bytes(self) -> int:
+        sequence, offset = self._read_checkpoint()
+        total = 0
+        for segment in self.segments():
+            if segment >= sequence:
+                size = os.path.getsize(self._segment_path(segment))
+                total += size - offset if segment == sequence else size
+        return total
+
+    def pending_records(self) -> int:
+        # Complete lines after the checkpoint, e.g. left by an earlier process
+        sequence, offset = self._read_checkpoint()
+        count = 0
+        for segment in self.segments():
+            if segment < sequence:
+                continue
+            with open(self._segment_path(segment), "rb") as journal:
+                journal.seek(offset if segment == sequence else 0)
+                for block in iter(lambda: journal.read(1 << 20), b""):
+                    count += block.count(b"\n")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "journal_segments": len(self.segments()),
+            "journal_pending_bytes": self.pending_bytes(),
+            "journal_duplicates": self.duplicates,
+            "journal_skipped_lines": self.skipped_lines,
+        }
+
+    # endregion
@@ -0,0 +1,122 @@
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+from . import db as db_driver
+from ..config import settings
+
+
+class LogRetention:
+    # Background job for log_records: fills in day buckets, keeps per day record
+    # counts for closed days and purges (optionally archiving first) whole days
+    # older than retention_days. retention_days <= 0 keeps every record.
+    def __init__(
+        self,
+        retention_days: int = 0,
+        interval: float = 3600.0,
+        archive_dir: Optional[str] = None,
+    ):
+        self.retention_days = retention_days
+        self.interval = interval
+        self.archive_dir = archive_dir
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.runs = 0
+        self.last_run: Optional[datetime] = None
+        self.purged_days = 0
+        self.purged_records = 0
+        self.archived_days = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Log retention run failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def archive_day(self, day: date) -> str:
+        # The day's records as gzip CSV, written to a temporary name first so a
+        # partial archive is never mistaken for a complete one
+        from ..log_export import export_csv_gzip
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"logs-{day.isoformat()}.csv.gz")
+        partial = f"{path}.partial"
+        with open(partial, "wb") as archive:
+            for chunk in export_csv_gzip(
+                start_time=datetime.combine(day, time.min),
+                end_time=datetime.combine(day, time.max),
+            ):
+                archive.write(chunk)
+        os.replace(partial, path)
+        return path
+
+    def run_once(self, today: Optional[date] = None) -> Dict[str, Any]:
+        today = today or date.today()
+        with self._lock:
+            with db_driver.session_scope() as db:
+                backfilled = db_driver.backfill_log_days(db)
+                summarized = db_driver.summarize_log_days(db, today)
+                purged_days = 0
+                purged_records = 0
+                if self.retention_days > 0:
+                    cutoff = today - timedelta(days=self.retention_days)
+                    for day in db_driver.get_log_days_before(db, cutoff):
+                        if self.archive_dir:
+                            self.archive_day(day)
+                            self.archived_days += 1
+                        purged_records += db_driver.purge_log_day(db, day)
+                        purged_days += 1
+            self.runs += 1
+            self.last_run = datetime.now()
+            self.purged_days += purged_days
+            self.purged_records += purged_records
+        return {
+            "backfilled": backfilled,
+            "summarized": summarized,
+            "purged_days": purged_days,
+            "purged_records": purged_records,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retention_days": self.retention_days,
+            "archive_dir": self.archive_dir,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "purged_days": self.purged_days,
+            "purged_records": self.purged_records,
+            "archived_days": self.archived_days,
+        }
+
+
+_log_retention = None
+_log_retention_lock = threading.Lock()
+
+
+def get_log_retention() -> LogRetention:
+    global _log_retention
+    with _log_retention_lock:
+        if _log_retention is None:
+            _log_retention = LogRetention(
+                retention_days=settings.log_retention_days,
+                interval=settings.log_retention_interval,
+                archive_dir=settings.log_archive_dir,
+            )
+        return _log_retention
@@ -0,0 +1,166 @@
+import threading
+from typing import Any, Dict, Optional
+from . import db as db_driver
+from .batch_writer import BatchWriter
+from .log_journal import LogJournal
+from .log_tail import LogTail, get_log_tail
+from ..config import settings
+
+SINK_MODES = ("batched", "direct", "journal")
+
+
+def _write_logs(batch):
+    with db_driver.session_scope() as db:
+        db_driver.add_logs(db, batch)
+
+
+class LogSink(BatchWriter):
+    # Takes audit records off the request path: in "batched" mode records are
+    # queued in memory and bulk inserted by the writer thread (see BatchWriter).
+    # In "direct" mode every record is written immediately on the caller's
+    # session. In "journal" mode records are appended to a local LogJournal and
+    # the writer thread ships them from there, so nothing is lost while the
+    # database is down.
+    def __init__(
+        self,
+        mode: str = "batched",
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        overflow: str = "block",
+        block_timeout: float = 5.0,
+        journal: Optional[LogJournal] = None,
+        tail: Optional[LogTail] = None,
+    ):
+        if mode not in SINK_MODES:
+            raise ValueError(f"Unknown log sink mode: {mode}")
+        if mode == "journal" and journal is None:
+            raise ValueError("Journal mode needs a LogJournal")
+        super().__init__(
+            _write_logs,
+            "audit records",
+            max_queue_size=max_queue_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            overflow=overflow,
+            block_timeout=block_timeout,
+        )
+        self.mode = mode
+        self.journal = journal
+        # Accepted records are also handed to live tail subscribers
+        self.tail = tail
+        # Records in the journal not shipped yet
+        self._unshipped = 0
+
+    def start(self):
+        backlog = 0
+        if self.journal is not None:
+            self.journal.start()
+            # Records an earlier process left unshipped count as queued, and
+            # the writer ships them right away instead of after batch_size more
+            backlog = self.journal.pending_records()
+            with self._lock:
+                self._unshipped = backlog
+        if self.mode != "direct":
+            super().start()
+        if backlog:
+            self._wake.set()
+
+    def stop(self):
+        if self.journal is None:
+            super().stop()
+            return
+        try:
+            super().stop()
+        except Exception as e:
+            print(f"Audit records left in the journal for the next start: {e}")
+        self.journal.stop()
+
+    def submit(self, record, db=None):
+        if self.mode == "journal":
+            self.journal.append(record)
+            self._wake_if_due()
+        elif self.mode == "direct":
+            if db is not None:
+                db_driver.add_log(db, record)
+            else:
+                with db_driver.session_scope() as session:
+                    db_driver.add_log(session, record)
+        elif not self.enqueue([record]):
+            return
+        if self.tail is not None:
+            self.tail.publish(record)
+
+    def _wake_if_due(self):
+        with self._lock:
+            self._unshipped += 1
+            due = self._unshipped >= self.batch_size
+        if due:
+            self._wake.set()
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return self._unshipped if self.journal is not None else len(self._queue)
+
+    def blocks(self) -> bool:
+        # Whether submit() may wait on the database or for room in the queue
+        if self.mode == "direct":
+            return True
+        return self.mode == "batched" and self.queue_depth() >= self.max_queue_size
+
+    def _ship(self) -> int:
+        try:
+            shipped = self.journal.ship(self.batch_size)
+        except Exception:
+            with self._lock:
+                self.failed_batches += 1
+            raise
+        with self._lock:
+            self._unshipped = max(0, self._unshipped - shipped)
+            if shipped:
+                self.written += shipped
+                self.batches += 1
+        return shipped
+
+    def flush(self) -> int:
+        if self.journal is not None:
+            return self._ship()
+        return super().flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "overflow": self.overflow,
+            "max_queue_size": self.max_queue_size,
+            **super().stats(),
+            # In journal mode the backlog is what has not been shipped yet
+            "queue_depth": self.queue_depth(),
+            **(self.journal.stats() if self.journal is not None else {}),
+        }
+
+
+_log_sink = None
+_log_sink_lock = threading.Lock()
+
+
+def get_log_sink() -> LogSink:
+    global _log_sink
+    with _log_sink_lock:
+        if _log_sink is None:
+            _log_sink = LogSink(
+                mode=settings.audit_log_sink,
+                max_queue_size=settings.audit_log_queue_size,
+                batch_size=settings.audit_log_batch_size,
+                flush_interval=settings.audit_log_flush_interval,
+                overflow=settings.audit_log_overflow,
+                journal=LogJournal(
+                    settings.audit_journal_dir,
+                    segment_max_bytes=settings.audit_journal_segment_bytes,
+                    fsync_interval=settings.audit_journal_fsync_interval,
+                )
+                if settings.audit_log_sink == "journal"
+                else None,
+                tail=get_log_tail(),
+            )
+            _log_sink.start()
+        return _log_sink
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from ..config import settings
+from ..schemas import LogRecord
+
+
+class LogSubscription:
+    # Records for one live tail client. The buffer is bounded: when the client
+    # falls behind the oldest records are dropped and counted instead of growing.
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        device_uuid: Optional[str] = None,
+        action: Optional[str] = None,
+        max_buffer: int = 1000,
+    ):
+        self.device_uuid = device_uuid
+        self.action = action
+        self.dropped = 0
+        self._buffer = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._wake_pending = False
+
+    def matches(self, record: LogRecord) -> bool:
+        return (
+            self.device_uuid is None or record.device_uuid == self.device_uuid
+        ) and (self.action is None or record.action == self.action)
+
+    def push(self, record: LogRecord):
+        # Called from any thread; wakes the client's coroutine on its own loop
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(record)
+            # One wake-up per drain, not per record
+            wake = not self._wake_pending
+            self._wake_pending = True
+        if wake:
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                # The client's event loop is gone, it is unsubscribed shortly
+                pass
+
+    async def get(self, timeout: float) -> Tuple[List[LogRecord], int]:
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        # Cleared before draining, so a record pushed meanwhile sets it again
+        self._ready.clear()
+        with self._lock:
+            records = list(self._buffer)
+            self._buffer.clear()
+            self._wake_pending = False
+            dropped, self.dropped = self.dropped, 0
+        return records, dropped
+
+
+class LogTail:
+    # In-process fan-out of audit records to live tail subscribers, fed by the
+    # log sink as records are handed to it; nothing here reads the database
+    def __init__(self, max_subscribers: int = 100, max_buffer: int = 1000):
+        self.max_subscribers = max_subscribers
+        self.max_buffer = max_buffer
+        self._subscribers: List[LogSubscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self, device_uuid: Optional[str] = None, action: Optional[str] = None
+    ) -> LogSubscription:
+        subscription = LogSubscription(
+            asyncio.get_running_loop(), device_uuid, action, self.max_buffer
+        )
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise ValueError("Too many live log subscribers")
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, record: LogRecord):
+        if not self._subscribers:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.matches(record):
+                subscription.push(record)
+
+
+async def log_tail_events(
+    tail: LogTail,
+    subscription: LogSubscription,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    keepalive: float = 15.0,
+) -> AsyncIterator[str]:
+    # Server-Sent Events: one "data:" event per record, a "dropped" event with the
+    # number of records a slow client missed, and a comment as keepalive
+    try:
+        yield ": connected\n\n"
+        while not await is_disconnected():
+            records, dropped = await subscription.get(keepalive)
+            if dropped:
+                yield f"event: dropped\ndata: {dropped}\n\n"
+            for record in records:
+                yield f"id: {record.uuid}\ndata: {record.model_dump_json()}\n\n"
+            if not records and not dropped:
+                yield ": keepalive\n\n"
+    finally:
+        tail.unsubscribe(subscription)
+
+
+_log_tail = None
+_log_tail_lock = threading.Lock()
+
+
+def get_log_tail() -> LogTail:
+    global _log_tail
+    with _log_tail_lock:
+        if _log_tail is None:
+            _log_tail = LogTail(
+                max_subscribers=settings.log_tail_max_subscribers,
+                max_buffer=settings.log_tail_buffer,
+            )
+        return _log_tail
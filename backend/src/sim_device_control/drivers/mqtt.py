@@ -6,13 +6,15 @@ import paho.mqtt.client as mqtt
 
 
 class MqttDriver:
-    def __init__(self, broker_address, port=1883):
-        self.client = mqtt.Client()
+    def __init__(self, broker_address, port=1883, client=None):
+        # A paho compatible client can be handed in, e.g. a LocalBroker client
+        self.client = client or mqtt.Client()
         self.broker_address = broker_address
         self.port = port
 
         self._handlers = {}
         self._pending_requests = {}
+        self._pending_group_requests = {}
 
         self.devices = {}
         self._device_lock = threading.Lock()
@@ -69,6 +71,13 @@ class MqttDriver:
             event.set()
             return
 
+        if request_id in self._pending_group_requests:
+            event, expected, responses = self._pending_group_requests[request_id]
+            responses[payload.get("device_id")] = payload
+            if expected.issubset(responses):
+                event.set()
+            return
+
         handler = self._handlers.get(topic)
         if handler:
             handler(topic, payload)
@@ -108,6 +117,34 @@ class MqttDriver:
         del self._pending_requests[request_id]
         return response
 
+    def send_group_command_and_wait(
+        self, group_topic, reply_topics, command, parameter, expected, timeout=5
+    ):
+        # One publish reaches every member subscribed to the group topic, replies
+        # arrive on each member's own response topic and are collected by device id
+        request_id = str(uuid.uuid4())
+        event = threading.Event()
+        expected = set(expected)
+        responses = {}
+
+        self._pending_group_requests[request_id] = (event, expected, responses)
+
+        for reply_topic in reply_topics:
+            self.subscribe(reply_topic)
+
+        command_payload = {
+            "id": request_id,
+            "command": command,
+            "parameter": parameter,
+        }
+
+        self.publish(group_topic, command_payload)
+
+        if expected:
+            event.wait(timeout)
+        del self._pending_group_requests[request_id]
+        return dict(responses)
+
     def start(self):
         self.subscribe("sim-device-control/connections")
         self.client.loop_start()
@@ -0,0 +1,236 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+
+def _summary(values: np.ndarray, percentiles: Sequence[float]) -> Dict[str, Any]:
+    if not len(values):
+        return {
+            "count": 0,
+            "min": None,
+            "max": None,
+            "mean": None,
+            "std": None,
+            "percentiles": {},
+        }
+    return {
+        "count": int(len(values)),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "percentiles": {
+            f"{p:g}": float(q)
+            for p, q in zip(percentiles, np.percentile(values, percentiles))
+        },
+    }
+
+
+class ReadingRing:
+    # Recent (timestamp, value) pairs of every sensor of one quantity, one row per
+    # sensor in two 2-D arrays, written round robin: a sensor never holds more
+    # than `capacity` readings. Empty cells have a NaN timestamp, so they drop out
+    # of every time window.
+    def __init__(self, capacity: int, rows: int = 64):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._uuids: List[Optional[str]] = []
+        self._free: List[int] = []
+        self.timestamps = np.full((rows, capacity), np.nan)
+        self.values = np.zeros((rows, capacity))
+        self.position = np.zeros(rows, dtype=np.int64)
+
+    def _grow(self, needed: int):
+        rows = len(self.position)
+        if needed <= rows:
+            return
+        while rows < needed:
+            rows *= 2
+        extra = rows - len(self.position)
+        self.timestamps = np.vstack(
+            [self.timestamps, np.full((extra, self.capacity), np.nan)]
+        )
+        self.values = np.vstack([self.values, np.zeros((extra, self.capacity))])
+        self.position = np.concatenate([self.position, np.zeros(extra, np.int64)])
+
+    def _row(self, uuid: str) -> int:
+        row = self._index.get(uuid)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self._uuids)
+                self._grow(row + 1)
+                self._uuids.append(None)
+            self._index[uuid] = row
+            self._uuids[row] = uuid
+        return row
+
+    def append(self, uuid: str, timestamp: float, value: float):
+        with self._lock:
+            row = self._row(uuid)
+            column = self.position[row] % self.capacity
+            self.timestamps[row, column] = timestamp
+            self.values[row, column] = value
+            self.position[row] += 1
+
+    def append_many(
+        self, uuids: Sequence[str], timestamps: Sequence[float], values: Sequence[float]
+    ):
+        # A batch is written with fancy indexing; readings of the same sensor within
+        # the batch go to consecutive cells in batch order
+        with self._lock:
+            rows = np.array([self._row(uuid) for uuid in uuids], dtype=np.int64)
+            if not len(rows):
+                return
+            order = np.argsort(rows, kind="stable")
+            sorted_rows = rows[order]
+            starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+            counts = np.diff(np.r_[starts, len(rows)])
+            rank = np.arange(len(rows)) - np.repeat(starts, counts)
+            columns = (self.position[sorted_rows] + rank) % self.capacity
+            self.timestamps[sorted_rows, columns] = np.asarray(timestamps)[order]
+            self.values[sorted_rows, columns] = np.asarray(values)[order]
+            self.position[sorted_rows[starts]] += counts
+
+    def remove(self, uuid: str):
+        with self._lock:
+            row = self._index.pop(uuid, None)
+            if row is None:
+                return
+            self._uuids[row] = None
+            self.timestamps[row] = np.nan
+            self.position[row] = 0
+            self._free.append(row)
+
+    def stats(
+        self,
+        since: float,
+        percentiles: Sequence[float],
+        device_uuid: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        # Pooled over one sensor or all of them; only the selected values are
+        # copied while the lock is held
+        with self._lock:
+            if device_uuid is not None:
+                row = self._index.get(device_uuid)
+                if row is None:
+                    return _summary(np.empty(0), percentiles)
+                values = self.values[row][self.timestamps[row] >= since]
+            else:
+                used = len(self._uuids)
+                values = self.values[:used][self.timestamps[:used] >= since]
+        return _summary(values, percentiles)
+
+    def stats_per_device(
+        self, since: float, percentiles: Sequence[float]
+    ) -> List[Dict[str, Any]]:
+        # Every sensor at once: values outside the window become NaN, each row is
+        # sorted (NaNs last) and percentiles are interpolated between the sorted
+        # cells at the row's own count, without a Python loop over sensors
+        with self._lock:
+            used = len(self._uuids)
+            window = self.timestamps[:used] >= since
+            values = np.where(window, self.values[:used], np.nan)
+            uuids = list(self._uuids)
+        counts = window.sum(axis=1)
+        rows = np.flatnonzero(counts)
+        values, counts = values[rows], counts[rows]
+        if not len(rows):
+            return []
+        ordered = np.sort(values, axis=1)
+        means = np.nansum(values, axis=1) / counts
+        deviations = np.where(window[rows], values - means[:, None], 0.0)
+        stds = np.sqrt((deviations**2).sum(axis=1) / counts)
+        mins = ordered[:, 0]
+        maxs = ordered[np.arange(len(rows)), counts - 1]
+        quantiles = []
+        for p in percentiles:
+            position = (counts - 1) * (p / 100)
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, counts - 1)
+            fraction = position - low
+            low_values = np.take_along_axis(ordered, low[:, None], axis=1)[:, 0]
+            high_values = np.take_along_axis(ordered, high[:, None], axis=1)[:, 0]
+            quantiles.append(low_values + (high_values - low_values) * fraction)
+        return [
+            {
+                "device_uuid": uuids[row],
+                "count": int(counts[i]),
+                "min": float(mins[i]),
+                "max": float(maxs[i]),
+                "mean": float(means[i]),
+                "std": float(stds[i]),
+                "percentiles": {
+                    f"{p:g}": float(q[i]) for p, q in zip(percentiles, quantiles)
+                },
+            }
+            for i, row in enumerate(rows)
+        ]
+
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes + self.position.nbytes
+
+
+class SensorBuffers:
+    # One ReadingRing per quantity (temperature, pressure, humidity)
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._rings: Dict[str, ReadingRing] = {}
+        self._lock = threading.Lock()
+
+    def ring(self, quantity: str) -> ReadingRing:
+        with self._lock:
+            ring = self._rings.get(quantity)
+            if ring is None:
+                ring = self._rings[quantity] = ReadingRing(self.capacity)
+            return ring
+
+    def append(self, uuid: str, quantity: str, timestamp: float, value: float):
+        self.ring(quantity).append(uuid, timestamp, value)
+
+    def append_many(
+        self,
+        quantity: str,
+        uuids: Sequence[str],
+        timestamps: Sequence[float],
+        values: Sequence[float],
+    ):
+        self.ring(quantity).append_many(uuids, timestamps, values)
+
+    def remove(self, uuid: str):
+        with self._lock:
+            rings = list(self._rings.values())
+        for ring in rings:
+            ring.remove(uuid)
+
+    def stats(
+        self,
+        quantity: str,
+        device_uuid: Optional[str] = None,
+        window: Optional[float] = None,
+        percentiles: Sequence[float] = (50, 90, 99),
+        per_device: bool = False,
+        now: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        for p in percentiles:
+            if not 0 <= p <= 100:
+                raise ValueError(f"Percentile {p} is not between 0 and 100")
+        since = (now or time.time()) - window if window is not None else -np.inf
+        ring = self.ring(quantity)
+        if per_device and device_uuid is None:
+            results = ring.stats_per_device(since, percentiles)
+        else:
+            results = [
+                {
+                    "device_uuid": device_uuid,
+                    **ring.stats(since, percentiles, device_uuid),
+                }
+            ]
+        return [{"quantity": quantity, **result} for result in results]
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(ring.nbytes() for ring in self._rings.values())
@@ -0,0 +1,233 @@
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+def _narrow(values: np.ndarray) -> np.ndarray:
+    # The smallest signed integer type holding every value
+    if not len(values):
+        return values.astype(np.int8)
+    low, high = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+
+def _pack(values: np.ndarray) -> Tuple[str, bytes]:
+    narrowed = _narrow(values)
+    return narrowed.dtype.str, zlib.compress(narrowed.tobytes(), 1)
+
+
+def _unpack(dtype: str, blob: bytes) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(blob), dtype=dtype).astype(np.int64)
+
+
+def _scaled(values: np.ndarray, decimals: int) -> Optional[np.ndarray]:
+    # Values as integers at that many decimals, unless any is not finite or too
+    # large for its integer to be exact in a float
+    scaled = np.round(values * 10.0**decimals)
+    if not np.isfinite(scaled).all() or np.abs(scaled).max(initial=0) >= 2**53:
+        return None
+    return scaled
+
+
+def _exact_decimals(values: np.ndarray, most: int = 6) -> Optional[int]:
+    # The fewest decimals that reproduce every value exactly, if at most `most`
+    for decimals in range(most + 1):
+        scaled = _scaled(values, decimals)
+        if scaled is None:
+            return None
+        if np.array_equal(scaled / 10.0**decimals, values):
+            return decimals
+    return None
+
+
+class ReadingChunk:
+    # A sealed block of one sensor's readings. Timestamps are kept in whole
+    # milliseconds as delta-of-delta: 0 for every reading that keeps the previous
+    # spacing. Values with a few decimals (as devices report them) are kept as
+    # integer deltas at that many decimals, which is exact; other values as the
+    # XOR of each float's bits with the previous one (equal or close readings
+    # leave mostly zero bytes), shuffled so byte i of every word is stored
+    # together. A `precision` rounds values to that many decimals instead. NaN,
+    # infinite and very large values always take the XOR path.
+    # Each stream is narrowed to the smallest integer type that holds it and
+    # deflated.
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        precision: Optional[int] = None,
+    ):
+        self.count = len(timestamps)
+        self.start = float(timestamps[0])
+        self.end = float(timestamps[-1])
+
+        millis = np.round(np.asarray(timestamps) * 1000).astype(np.int64)
+        self.first_time = int(millis[0])
+        deltas = np.diff(millis)
+        self._times = _pack(np.diff(deltas, prepend=0))
+
+        values = np.asarray(values, dtype=np.float64)
+        if precision is None:
+            precision = _exact_decimals(values)
+        scaled = None if precision is None else _scaled(values, precision)
+        # Values that do not fit the integers are kept as they are
+        self.precision = precision if scaled is not None else None
+        if scaled is None:
+            bits = values.view(np.uint64)
+            xored = bits ^ np.concatenate([[np.uint64(0)], bits[:-1]])
+            shuffled = xored.view(np.uint8).reshape(-1, 8).T
+            self._values = ("xor", zlib.compress(shuffled.tobytes(), 1))
+        else:
+            self._values = _pack(np.diff(scaled.astype(np.int64), prepend=0))
+
+    def decode(self) -> Tuple[np.ndarray, np.ndarray]:
+        dtype, blob = self._times
+        deltas = np.cumsum(_unpack(dtype, blob))
+        millis = self.first_time + np.concatenate([[0], np.cumsum(deltas)])
+        timestamps = millis / 1000.0
+
+        dtype, blob = self._values
+        if dtype == "xor":
+            shuffled = np.frombuffer(zlib.decompress(blob), dtype=np.uint8)
+            xored = shuffled.reshape(8, -1).T.copy().view(np.uint64).ravel()
+            values = np.bitwise_xor.accumulate(xored).view(np.float64)
+        else:
+            values = np.cumsum(_unpack(dtype, blob)) / 10.0**self.precision
+        return timestamps, values
+
+    def nbytes(self) -> int:
+        return len(self._times[1]) + len(self._values[1])
+
+
+class ChunkedSeries:
+    # One sensor's readings: sealed compressed chunks plus an open head of the
+    # newest readings as plain floats, sealed once it holds chunk_size readings.
+    # Chunks entirely older than `retention` seconds before the newest reading
+    # are dropped as new ones are sealed.
+    def __init__(
+        self,
+        chunk_size: int = 1024,
+        retention: Optional[float] = None,
+        precision: Optional[int] = None,
+    ):
+        self.chunk_size = chunk_size
+        self.retention = retention
+        self.precision = precision
+        self.chunks: List[ReadingChunk] = []
+        self._times: List[float] = []
+        self._values: List[float] = []
+
+    def append(self, timestamp: float, value: float):
+        self._times.append(timestamp)
+        self._values.append(value)
+        if len(self._times) >= self.chunk_size:
+            self.seal()
+
+    def seal(self):
+        if not self._times:
+            return
+        self.chunks.append(
+            ReadingChunk(np.array(self._times), np.array(self._values), self.precision)
+        )
+        self._times, self._values = [], []
+        if self.retention is not None:
+            oldest = self.chunks[-1].end - self.retention
+            while self.chunks and self.chunks[0].end < oldest:
+                self.chunks.pop(0)
+
+    def range(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Readings with start <= timestamp < end; only the chunks overlapping the
+        # range are decoded
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        times, values = [], []
+        for chunk in self.chunks:
+            if chunk.end >= start and chunk.start < end:
+                chunk_times, chunk_values = chunk.decode()
+                times.append(chunk_times)
+                values.append(chunk_values)
+        times.append(np.array(self._times, dtype=np.float64))
+        values.append(np.array(self._values, dtype=np.float64))
+        times, values = np.concatenate(times), np.concatenate(values)
+        selected = (times >= start) & (times < end)
+        return times[selected], values[selected]
+
+    def __len__(self) -> int:
+        return sum(chunk.count for chunk in self.chunks) + len(self._times)
+
+    def nbytes(self) -> int:
+        # The head is counted as two float64 arrays
+        head = 16 * len(self._times)
+        return sum(chunk.nbytes() for chunk in self.chunks) + head
+
+
+class ReadingArchive:
+    # Long retention of every sensor's readings in memory, one ChunkedSeries per
+    # device and quantity
+    def __init__(
+        self,
+        chunk_size: int = 1024,
+        retention: Optional[float] = None,
+        precision: Optional[int] = None,
+    ):
+        self.chunk_size = chunk_size
+        self.retention = retention
+        self.precision = precision
+        self._series: Dict[Tuple[str, str], ChunkedSeries] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, uuid: str, quantity: str) -> ChunkedSeries:
+        series = self._series.get((uuid, quantity))
+        if series is None:
+            series = self._series[(uuid, quantity)] = ChunkedSeries(
+                self.chunk_size, self.retention, self.precision
+            )
+        return series
+
+    def append(self, uuid: str, quantity: str, timestamp: float, value: float):
+        with self._lock:
+            self._get(uuid, quantity).append(timestamp, value)
+
+    def append_many(
+        self,
+        quantity: str,
+        uuids: Sequence[str],
+        timestamps: Sequence[float],
+        values: Sequence[float],
+    ):
+        with self._lock:
+            for uuid, timestamp, value in zip(uuids, timestamps, values):
+                self._get(uuid, quantity).append(timestamp, value)
+
+    def range(
+        self,
+        uuid: str,
+        quantity: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            series = self._series.get((uuid, quantity))
+            if series is None:
+                return np.empty(0), np.empty(0)
+            return series.range(start, end)
+
+    def remove(self, uuid: str):
+        with self._lock:
+            for key in [key for key in self._series if key[0] == uuid]:
+                del self._series[key]
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(series.nbytes() for series in self._series.values())
+
+    def points(self) -> int:
+        with self._lock:
+            return sum(len(series) for series in self._series.values())
@@ -0,0 +1,77 @@
+import threading
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Dict, List, Union
+
+# Third-party packages add device types by exposing a driver class under this group:
+#
+#   [project.entry-points."sim_device_control.drivers"]
+#   co2_sensor = "my_package.co2:Co2SensorDriver"
+ENTRY_POINT_GROUP = "sim_device_control.drivers"
+
+# Built-in drivers. They are not declared as entry points, entry points are only
+# scanned for types that are not built in.
+BUILTIN_DRIVERS: Dict[str, str] = {
+    "temperature_sensor": "sim_device_control.drivers.temperature:TemperatureSensorDriver",
+    "pressure_sensor": "sim_device_control.drivers.pressure:PressureSensorDriver",
+    "humidity_sensor": "sim_device_control.drivers.humidity:HumiditySensorDriver",
+    "dc_motor": "sim_device_control.drivers.dc_motor:DcMotorDriver",
+    "stepper_motor": "sim_device_control.drivers.stepper_motor:StepperMotorDriver",
+}
+
+
+class DriverRegistry:
+    # Maps device type names to driver classes. Entry points are only scanned and
+    # driver modules only imported when the first device of a type is added.
+    def __init__(self, group: str = ENTRY_POINT_GROUP):
+        self.group = group
+        self._targets: Dict[str, Union[str, type]] = dict(BUILTIN_DRIVERS)
+        self._scanned = False
+        self._loaded: Dict[str, type] = {}
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        # Scanning installed distributions is the expensive part, so it only
+        # happens for types that are not built in
+        if not self._scanned:
+            for entry_point in entry_points(group=self.group):
+                self._targets.setdefault(entry_point.name, entry_point.value)
+            self._scanned = True
+
+    def register(self, type_name: str, driver: Union[str, type]):
+        with self._lock:
+            self._targets[type_name] = driver
+            self._loaded.pop(type_name, None)
+
+    def available(self) -> List[str]:
+        with self._lock:
+            self._scan()
+            return sorted(self._targets)
+
+    def loaded(self) -> List[str]:
+        return sorted(self._loaded)
+
+    def get(self, device_type) -> type:
+        type_name = getattr(device_type, "value", device_type)
+        driver = self._loaded.get(type_name)
+        if driver is not None:
+            return driver
+        with self._lock:
+            if type_name not in self._targets:
+                self._scan()
+            target = self._targets.get(type_name)
+            if target is None:
+                raise ValueError(f"Unsupported device type: {device_type}")
+            if isinstance(target, str):
+                module_name, _, attribute = target.partition(":")
+                try:
+                    target = getattr(import_module(module_name), attribute)
+                except (ImportError, AttributeError) as e:
+                    raise ValueError(
+                        f"Failed to load driver for device type {type_name}: {e}"
+                    )
+            self._loaded[type_name] = target
+            return target
+
+
+driver_registry = DriverRegistry()
@@ -0,0 +1,80 @@
+import threading
+from datetime import datetime
+from typing import List, Optional
+from . import db as db_driver
+from .batch_writer import BatchWriter
+from ..config import settings
+from ..schemas import SensorReading
+
+# Quantity recorded for each read command: sensor values, and the speed and
+# location reported by motors
+READING_QUANTITIES = {
+    "read_temperature": "temperature",
+    "read_pressure": "pressure",
+    "read_humidity": "humidity",
+    "get_speed": "speed",
+    "get_location": "location",
+}
+
+
+def _write_readings(batch):
+    with db_driver.session_scope() as db:
+        db_driver.add_sensor_readings(db, batch)
+
+
+class SensorHistory(BatchWriter):
+    # Batched ingest of numeric sensor readings into sensor_readings (see
+    # BatchWriter). Readings are not worth blocking a request for, a full queue
+    # drops the oldest.
+    def __init__(
+        self,
+        max_queue_size: int = 100000,
+        batch_size: int = 1000,
+        flush_interval: float = 1.0,
+    ):
+        super().__init__(
+            _write_readings,
+            "sensor readings",
+            max_queue_size=max_queue_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            overflow="drop_oldest",
+        )
+
+    def record(
+        self,
+        device_uuid: str,
+        quantity: str,
+        value: float,
+        timestamp: Optional[datetime] = None,
+    ):
+        self.submit(
+            [
+                SensorReading(
+                    device_uuid=device_uuid,
+                    quantity=quantity,
+                    timestamp=timestamp or datetime.now(),
+                    value=value,
+                )
+            ]
+        )
+
+    def submit(self, readings: List[SensorReading]):
+        self.enqueue(readings)
+
+
+_sensor_history = None
+_sensor_history_lock = threading.Lock()
+
+
+def get_sensor_history() -> SensorHistory:
+    # The writer thread is started with the app (see app.lifespan)
+    global _sensor_history
+    with _sensor_history_lock:
+        if _sensor_history is None:
+            _sensor_history = SensorHistory(
+                max_queue_size=settings.sensor_history_queue_size,
+                batch_size=settings.sensor_history_batch_size,
+                flush_interval=settings.sensor_history_flush_interval,
+            )
+        return _sensor_history
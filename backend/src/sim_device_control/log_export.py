@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterator
+from .drivers import db as db_driver
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "logs.ndjson"),
+    "csv": ("application/gzip", "logs.csv.gz"),
+}
+EXPORT_COLUMNS = [
+    "uuid",
+    "timestamp",
+    "user",
+    "device_uuid",
+    "action",
+    "description",
+    "status",
+    "duration_ms",
+    "parameters",
+    "error",
+]
+# Rows fetched from the database cursor per chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+def _row(log) -> list:
+    values = [getattr(log, column) for column in EXPORT_COLUMNS]
+    values[1] = log.timestamp.isoformat() if log.timestamp else None
+    return values
+
+
+def _batches(batch_size: int, filters) -> Iterator[list]:
+    # The export runs after the request's session is gone, so it reads on its own
+    with db_driver.session_scope() as db:
+        batch = []
+        for log in db_driver.iter_logs(db, batch_size=batch_size, **filters):
+            batch.append(_row(log))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def export_ndjson(batch_size: int = EXPORT_BATCH_SIZE, **filters) -> Iterator[bytes]:
+    for batch in _batches(batch_size, filters):
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in batch
+        ).encode()
+
+
+def export_csv_gzip(batch_size: int = EXPORT_BATCH_SIZE, **filters) -> Iterator[bytes]:
+    # One gzip stream, compressed chunk by chunk as rows arrive
+    compressor = zlib.compressobj(wbits=31)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield compressor.compress(buffer.getvalue().encode())
+    for batch in _batches(batch_size, filters):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        chunk = compressor.compress(buffer.getvalue().encode())
+        if chunk:
+            yield chunk
+    yield compressor.flush()
@@ -1,8 +1,20 @@
-from pydantic import BaseModel
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum
+from typing import Annotated, Dict, List, Optional, Union
+from pydantic import BaseModel, BeforeValidator, Field
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    String,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+)
+from sqlalchemy.types import BINARY, LargeBinary, TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
 import uuid
 
 
@@ -16,9 +28,22 @@ class DeviceType(Enum):
     # ANALOG_PORT = "analog_port"
 
 
+def _coerce_device_type(value):
+    # Built-in types become DeviceType members, plugin types stay plain strings
+    if isinstance(value, str):
+        try:
+            return DeviceType(value)
+        except ValueError:
+            pass
+    return value
+
+
+DeviceTypeName = Annotated[Union[DeviceType, str], BeforeValidator(_coerce_device_type)]
+
+
 class SimDevice(BaseModel):
     uuid: str
-    type: DeviceType
+    type: DeviceTypeName
     name: str
     description: str
     status: str
@@ -32,6 +57,153 @@ class LogRecord(BaseModel):
     action: str
     description: str
     timestamp: datetime
+    # Outcome ("ok"/"error"), duration and parameters of the logged request,
+    # and the exception it failed with
+    status: Optional[str] = None
+    duration_ms: Optional[float] = None
+    parameters: Optional[str] = None
+    error: Optional[str] = None
+
+
+class LogSinkStats(BaseModel):
+    mode: str
+    overflow: str
+    queue_depth: int
+    max_queue_size: int
+    written: int
+    dropped: int
+    batches: int
+    failed_batches: int
+    # Journal mode only
+    journal_segments: Optional[int] = None
+    journal_pending_bytes: Optional[int] = None
+    journal_duplicates: Optional[int] = None
+    journal_skipped_lines: Optional[int] = None
+
+
+class LogDailyCount(BaseModel):
+    day: date
+    records: int
+    errors: int
+    purged: bool
+
+
+class LogRetentionStats(BaseModel):
+    retention_days: int
+    archive_dir: Optional[str]
+    runs: int
+    last_run: Optional[datetime]
+    purged_days: int
+    purged_records: int
+    archived_days: int
+
+
+class LogAggregate(BaseModel):
+    bucket: datetime
+    device_uuid: Optional[str] = None
+    action: Optional[str] = None
+    status: Optional[str] = None
+    records: int
+    avg_duration_ms: Optional[float] = None
+    max_duration_ms: Optional[float] = None
+
+
+class DeviceGroup(BaseModel):
+    # The name is part of the group's MQTT topic, so no levels or wildcards
+    name: str = Field(min_length=1, max_length=255, pattern=r"^[^/+#\s]+$")
+    description: str = ""
+    device_uuids: List[str] = []
+
+
+class SensorReading(BaseModel):
+    device_uuid: str
+    quantity: str
+    timestamp: datetime
+    value: float
+
+
+# Readings of one bucket of a downsampled range query
+class SensorReadingBucket(BaseModel):
+    bucket: datetime
+    quantity: str
+    count: int
+    avg: float
+    min: float
+    max: float
+    std: Optional[float] = None
+
+
+# Statistics over the recent readings held in memory, for one device or pooled
+# over every sensor of the quantity (device_uuid None)
+class SensorStats(BaseModel):
+    quantity: str
+    device_uuid: Optional[str] = None
+    count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    percentiles: Dict[str, float] = {}
+
+
+# A rule evaluated on every reading of a quantity, for one device or all of them:
+# "threshold" fires outside low..high, "rate" when the change per second since
+# the device's previous reading exceeds limit, "zscore" when the reading is more
+# than limit standard deviations from the device's recent readings (weighted
+# over about `window` readings, once min_samples have been seen)
+class AlertRule(BaseModel):
+    name: str
+    quantity: str
+    kind: str
+    device_uuid: Optional[str] = None
+    low: Optional[float] = None
+    high: Optional[float] = None
+    limit: Optional[float] = None
+    window: int = 60
+    min_samples: int = 10
+
+
+# A rule starting ("firing") or ceasing ("resolved") to match a device's
+# readings; score is the rate or z-score that was compared against the limit
+class Alert(BaseModel):
+    uuid: uuid.UUID
+    rule: str
+    kind: str
+    state: str
+    device_uuid: str
+    quantity: str
+    timestamp: datetime
+    value: float
+    score: Optional[float] = None
+
+
+class SamplingSchedule(BaseModel):
+    device_uuid: str
+    command: str
+    interval: float
+    samples: int
+    missed: int
+    failures: int
+
+
+# Scheduled sampling: deadlines skipped (missed) and failed reads, and the
+# lateness of reads behind their deadline and their duration in milliseconds
+# (mean, p50, p99, max over the recent reads)
+class AcquisitionStats(BaseModel):
+    sensors: int
+    samples: int
+    missed: int
+    failures: int
+    lateness_ms: Dict[str, float] = {}
+    read_ms: Dict[str, float] = {}
+    schedule: List[SamplingSchedule] = []
+
+
+class GroupCommandResult(BaseModel):
+    group: str
+    command: str
+    responses: Dict[str, str]
+    missing: List[str]
 
 
 class MotorDirection(Enum):
@@ -42,23 +214,200 @@ class MotorDirection(Enum):
 Base = declarative_base()
 
 
+class DeviceTypeColumn(TypeDecorator):
+    # Stores built-in types by enum name (as the previous Enum column did) and
+    # plugin device types by their type name
+    impl = String(50)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, DeviceType):
+            return value.name
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value in DeviceType.__members__:
+            return DeviceType[value]
+        return _coerce_device_type(value)
+
+
 class DatabaseDevice(Base):
     __tablename__ = "devices"
 
     uuid = Column(String(225), primary_key=True)
-    type = Column(SQLEnum(DeviceType), nullable=False)
+    type = Column(DeviceTypeColumn(), nullable=False)
     name = Column(String(255), nullable=False)
     status = Column(String(50), nullable=False)
     description = Column(String(1024), nullable=True)
     version = Column(String(50), nullable=False)
 
 
+class DatabaseDeviceGroup(Base):
+    __tablename__ = "device_groups"
+
+    name = Column(String(255), primary_key=True)
+    description = Column(String(1024), nullable=True)
+
+
+# Memberships and tags are keyed by device uuid without a foreign key so that they
+# survive a device disconnecting (and being removed from the devices table)
+class DatabaseDeviceGroupMember(Base):
+    __tablename__ = "device_group_members"
+
+    group_name = Column(String(255), primary_key=True)
+    device_uuid = Column(String(225), primary_key=True, index=True)
+
+
+class DatabaseDeviceTag(Base):
+    __tablename__ = "device_tags"
+
+    device_uuid = Column(String(225), primary_key=True)
+    tag = Column(String(255), primary_key=True, index=True)
+
+
+class BinaryUuidColumn(TypeDecorator):
+    # UUIDs as 16 raw bytes instead of 36 characters. Byte order matches the order
+    # of the text form, so keyset comparisons on uuid are unchanged.
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(BINARY(16))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
+# Values repeated on every log record are stored once here and referenced by id
+class DatabaseLogAction(Base):
+    __tablename__ = "log_actions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(255), nullable=False, unique=True)
+
+
+class DatabaseLogUser(Base):
+    __tablename__ = "log_users"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(255), nullable=False, unique=True)
+
+
+class DatabaseLogDevice(Base):
+    __tablename__ = "log_devices"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(225), nullable=False, unique=True)
+
+
 class DatabaseLogRecord(Base):
     __tablename__ = "log_records"
+    # Log pages are read newest first, keyed on (timestamp, uuid), optionally
+    # filtered by device, action and/or user
+    __table_args__ = (
+        Index("ix_log_records_timestamp_uuid", "timestamp", "uuid"),
+        Index("ix_log_records_device_timestamp", "device_id", "timestamp"),
+        Index(
+            "ix_log_records_device_action_timestamp",
+            "device_id",
+            "action_id",
+            "timestamp",
+        ),
+        Index("ix_log_records_action_timestamp", "action_id", "timestamp"),
+        Index("ix_log_records_user_timestamp", "user_id", "timestamp"),
+        Index("ix_log_records_log_day", "log_day"),
+    )
 
-    uuid = Column(String(225), primary_key=True)
-    user = Column(String(255), nullable=False)
-    device_uuid = Column(String(225))
-    action = Column(String(255), nullable=False)
+    uuid = Column(BinaryUuidColumn(), primary_key=True)
+    user_id = Column(Integer, ForeignKey("log_users.id"), nullable=False)
+    device_id = Column(Integer, ForeignKey("log_devices.id"), nullable=False)
+    action_id = Column(Integer, ForeignKey("log_actions.id"), nullable=False)
     description = Column(String(1024), nullable=True)
     timestamp = Column(DateTime, default=datetime.now())
+    status = Column(String(20), nullable=True)
+    duration_ms = Column(Float, nullable=True)
+    parameters = Column(String(1024), nullable=True)
+    error = Column(String(1024), nullable=True)
+    # Day bucket of the timestamp, retention purges and summarizes whole days
+    log_day = Column(Date, nullable=True)
+
+    # Names for the ids above, filled in from the in-process dictionaries when
+    # records are read (see drivers.db)
+    user = None
+    device_uuid = None
+    action = None
+
+
+# Per day record counts, kept after the day's records are purged
+class DatabaseLogDailyCount(Base):
+    __tablename__ = "log_daily_counts"
+
+    day = Column(Date, primary_key=True)
+    records = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    purged_at = Column(DateTime, nullable=True)
+
+
+# Hourly counts and durations per device, action and outcome, updated as log
+# records are inserted so dashboards do not have to scan log_records
+class DatabaseLogRollup(Base):
+    __tablename__ = "log_rollups_hourly"
+
+    hour = Column(DateTime, primary_key=True)
+    device_uuid = Column(String(225), primary_key=True)
+    action = Column(String(255), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    records = Column(Integer, nullable=False, default=0)
+    duration_count = Column(Integer, nullable=False, default=0)
+    duration_sum = Column(Float, nullable=False, default=0.0)
+    duration_max = Column(Float, nullable=True)
+
+
+class DatabaseSensorReading(Base):
+    __tablename__ = "sensor_readings"
+    # Range queries read one device's readings over a time window
+    __table_args__ = (
+        Index(
+            "ix_sensor_readings_device_quantity_timestamp",
+            "device_uuid",
+            "quantity",
+            "timestamp",
+        ),
+    )
+
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    device_uuid = Column(String(225), nullable=False)
+    quantity = Column(String(20), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    value = Column(Float, nullable=False)
+
+
+class DatabaseReadingRollup(Base):
+    # Count, sum, sum of squares, min and max of one device's readings of one
+    # quantity per minute, hour and day bucket (period in seconds)
+    __tablename__ = "sensor_rollups"
+
+    period = Column(Integer, primary_key=True)
+    device_uuid = Column(String(225), primary_key=True)
+    quantity = Column(String(20), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    readings = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+    value_sumsq = Column(Float, nullable=False, default=0.0)
+    value_min = Column(Float, nullable=False)
+    value_max = Column(Float, nullable=False)
@@ -1,9 +1,15 @@
 import sys
 import os
+import uuid
+from datetime import datetime
 
 # Disable MQTT before importing any sim_device_control modules
 os.environ["SIM_DEVICE_CONTROL_DISABLE_MQTT"] = "1"
 os.environ["SIM_DEVICE_CONTROL_DISABLE_MANAGER"] = "1"
+# Write device rows through so background flushes don't share the test connection
+os.environ["DEVICE_STATE_WRITE_BEHIND"] = "false"
+# Insert audit records inside the request so tests can read them back directly
+os.environ["AUDIT_LOG_SINK"] = "direct"
 
 import pytest
 from sqlalchemy import create_engine
@@ -15,7 +21,7 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 SRC = os.path.join(ROOT, "src")
 if SRC not in sys.path:
     sys.path.insert(0, SRC)
-from sim_device_control.schemas import Base
+from sim_device_control.schemas import Base, LogRecord
 from sim_device_control.drivers import db as db_driver
 from sim_device_control import app as app_module
 from sim_device_control.app import app as fastapi_app
@@ -58,12 +64,31 @@ def db_session(SessionForTests):
         session.close()
 
 
+@pytest.fixture
+def make_record():
+    # Builds an audit LogRecord; any other LogRecord field can be passed too
+    def make(description="d", device_uuid="", action="act", timestamp=None, **fields):
+        return LogRecord(
+            uuid=uuid.uuid4(),
+            user="host",
+            device_uuid=device_uuid,
+            action=action,
+            description=description,
+            timestamp=timestamp or datetime.now(),
+            **fields,
+        )
+
+    return make
+
+
 # Clear all tables before each test for isolation
 @pytest.fixture(autouse=True)
 def clear_db(db_session):
     for table in reversed(Base.metadata.sorted_tables):
         db_session.execute(table.delete())
     db_session.commit()
+    # The log dictionary tables were emptied too
+    db_driver.clear_log_dictionaries()
 
 
 @pytest.fixture
@@ -0,0 +1,109 @@
+from sim_device_control import schemas
+from sim_device_control.config import settings
+from sim_device_control.drivers.acquisition import AcquisitionScheduler
+from sim_device_control.drivers.device_manager import DeviceManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sensors_are_spread_over_their_interval():
+    clock = FakeClock()
+    batches = []
+    scheduler = AcquisitionScheduler(
+        read=lambda uuid, command: 1.0,
+        sink=lambda command, values: batches.append((command, sorted(values))),
+        batch_size=100,
+        batch_window=0,
+        clock=clock,
+    )
+    for i in range(1000):
+        scheduler.schedule(f"dev-{i}", "read_temperature", 10.0)
+
+    # About a tenth of the sensors per second, never all at once
+    per_second = [scheduler.run_pending(float(second)) for second in range(1, 11)]
+    assert sum(per_second) == 1000
+    assert max(per_second) < 150
+    assert all(len(uuids) <= 100 for _, uuids in batches)
+    # Each sensor again one interval later
+    assert sum(scheduler.run_pending(float(second)) for second in range(11, 21)) == 1000
+    assert scheduler.stats()["missed"] == 0
+
+
+def test_late_timer_skips_missed_deadlines_without_drifting():
+    clock = FakeClock()
+    scheduler = AcquisitionScheduler(
+        read=lambda uuid, command: 1.0,
+        sink=lambda command, values: None,
+        batch_window=0,
+        clock=clock,
+    )
+    scheduler.schedule("dev-1", "read_pressure", 1.0)
+    [(due, _, sensor)] = scheduler._heap
+    assert scheduler.run_pending(due) == 1
+
+    # The timer wakes 3.5 intervals late: one read, 2 deadlines missed, and the
+    # next deadline still on the original grid
+    assert scheduler.run_pending(due + 3.5) == 1
+    assert sensor.due == due + 4
+    stats = scheduler.stats()
+    assert (stats["samples"], stats["missed"]) == (2, 2)
+    assert stats["lateness_ms"]["max"] == 2500.0
+
+    scheduler.schedule("dev-1", "read_pressure", 0)
+    assert scheduler.run_pending(due + 100) == 0
+    assert scheduler.stats()["sensors"] == 0
+
+
+def test_failed_reads_are_counted_and_the_rest_recorded():
+    clock = FakeClock()
+    recorded = {}
+
+    def read(uuid, command):
+        if uuid == "dev-2":
+            raise TimeoutError("No reply received")
+        return 21.5
+
+    scheduler = AcquisitionScheduler(
+        read=read, sink=lambda command, values: recorded.update(values), clock=clock
+    )
+    for uuid in ("dev-1", "dev-2", "dev-3"):
+        scheduler.schedule(uuid, "read_humidity", 5.0)
+    assert scheduler.run_pending(5.0) == 2
+    assert recorded == {"dev-1": 21.5, "dev-3": 21.5}
+    assert scheduler.stats()["failures"] == 1
+
+
+def test_device_manager_samples_sensors_into_the_buffers(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "acquisition", True)
+    monkeypatch.setattr(settings, "acquisition_intervals", {"temperature_sensor": 2.0})
+    manager = DeviceManager(enable_mqtt=False)
+    try:
+        for uuid, device_type in [
+            ("sensor-1", schemas.DeviceType.TEMPERATURE_SENSOR),
+            ("motor-1", schemas.DeviceType.DC_MOTOR),
+        ]:
+            manager.add_device(
+                schemas.SimDevice(
+                    uuid=uuid,
+                    type=device_type,
+                    name=uuid,
+                    status="simulated",
+                    description="",
+                    version="1.0.0",
+                ),
+                db=db_session,
+            )
+        # Only sensors are sampled, at the interval set for their type
+        [schedule] = manager.acquisition.stats()["schedule"]
+        assert (schedule["device_uuid"], schedule["interval"]) == ("sensor-1", 2.0)
+        manager.acquisition.run_pending(manager.acquisition.clock() + 60)
+        [stats] = manager.reading_buffers.stats("temperature", "sensor-1")
+        assert stats["count"] == 1
+    finally:
+        manager.stop()
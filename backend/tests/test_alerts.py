@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from sim_device_control.drivers.alerts import AlertEngine
+from sim_device_control.schemas import AlertRule
+
+
+def test_rules_fire_once_and_resolve():
+    engine = AlertEngine(
+        [
+            AlertRule(name="hot", quantity="temperature", kind="threshold", high=30),
+            AlertRule(name="jump", quantity="temperature", kind="rate", limit=2.0),
+        ]
+    )
+    # Two readings of dev-1 in one batch are evaluated in order
+    engine.submit(
+        "temperature",
+        ["dev-1", "dev-2", "dev-1"],
+        [0.0, 0.0, 1.0],
+        [20.0, 35.0, 21.0],
+    )
+    alerts = engine.flush()
+    assert [(a.rule, a.device_uuid, a.state) for a in alerts] == [
+        ("hot", "dev-2", "firing")
+    ]
+
+    # Still too hot: nothing new; dev-1 rising 10 per second fires the rate rule
+    engine.submit("temperature", ["dev-2", "dev-1"], [1.0, 2.0], [36.0, 31.0])
+    alerts = engine.flush()
+    assert sorted((a.rule, a.device_uuid, a.state) for a in alerts) == [
+        ("hot", "dev-1", "firing"),
+        ("jump", "dev-1", "firing"),
+    ]
+    assert [a.score for a in alerts if a.rule == "jump"] == [10.0]
+
+    engine.submit("temperature", ["dev-2"], [10.0], [25.0])
+    engine.submit("pressure", ["dev-2"], [2.0], [999.0])
+    [alert] = engine.flush()
+    assert (alert.rule, alert.device_uuid, alert.state) == ("hot", "dev-2", "resolved")
+    assert engine.stats()["evaluated"] == 7
+
+    with pytest.raises(ValueError):
+        engine.set_rule(AlertRule(name="bad", quantity="temperature", kind="rate"))
+
+
+def test_zscore_flags_outliers_per_device():
+    rng = np.random.default_rng(0)
+    engine = AlertEngine(
+        [
+            AlertRule(
+                name="odd",
+                quantity="pressure",
+                kind="zscore",
+                limit=5.0,
+                window=50,
+                min_samples=20,
+            )
+        ]
+    )
+    uuids = [f"dev-{i}" for i in range(100)]
+    # Every device around its own level, which a pooled score would flag
+    levels = np.arange(100) * 10.0
+    for second in range(60):
+        values = levels + rng.normal(0, 1, 100)
+        engine.submit("pressure", uuids, [float(second)] * 100, values)
+    assert engine.flush() == []
+
+    values = levels + rng.normal(0, 1, 100)
+    values[7] += 25
+    engine.submit("pressure", uuids, [60.0] * 100, values)
+    [alert] = engine.flush()
+    assert (alert.device_uuid, alert.state) == ("dev-7", "firing")
+    assert alert.score > 5
@@ -1,11 +1,14 @@
 import pytest
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock
 from fastapi.testclient import TestClient
 from sim_device_control import schemas
+from sim_device_control import app as app_module
 from sim_device_control.app import app
 from sim_device_control.drivers import device_manager
 from sim_device_control import schemas
 from sim_device_control.drivers import device_manager as dm_mod
+from sim_device_control.drivers.sensor_history import get_sensor_history
 
 
 @pytest.fixture
@@ -212,6 +215,12 @@ def test_update_device_name(client):
     assert r.status_code == 200
     updated = r.json()
     assert updated["name"] == updated_name
+    r = client.get(
+        "/logs/", params={"device_uuid": "uuid-103", "action": "update_device_name"}
+    )
+    assert [(log["status"], log["description"]) for log in r.json()] == [
+        ("ok", "Updated device uuid-103")
+    ]
 
 
 # def test_update_device():
@@ -274,6 +283,109 @@ def test_read_temperature(client):
     assert isinstance(r.json(), float)
 
 
+def test_sensor_readings_history(client):
+    payload = make_device_payload(
+        "uuid-302", type_val=schemas.DeviceType.TEMPERATURE_SENSOR
+    )
+    client.post("/devices/", json=payload)
+    for _ in range(3):
+        client.get(
+            "/devices/temperature_sensor/read_temperature",
+            params={"device_uuid": "uuid-302"},
+        )
+    # Range queries only see readings the writer thread has inserted
+    get_sensor_history().flush_all()
+    r = client.get(
+        "/devices/readings",
+        params={"device_uuid": "uuid-302", "quantity": "temperature"},
+    )
+    assert r.status_code == 200
+    assert [(b["count"], b["avg"]) for b in r.json()] == [(3, 20.0)]
+    r = client.get(
+        "/devices/readings", params={"device_uuid": "uuid-302", "quantity": "voltage"}
+    )
+    assert r.status_code == 400
+
+
+def test_sensor_reading_stats_from_memory(client):
+    payload = make_device_payload(
+        "uuid-303", type_val=schemas.DeviceType.TEMPERATURE_SENSOR
+    )
+    client.post("/devices/", json=payload)
+    for _ in range(2):
+        client.get(
+            "/devices/temperature_sensor/read_temperature",
+            params={"device_uuid": "uuid-303"},
+        )
+    r = client.get(
+        "/devices/readings/stats",
+        params={"quantity": "temperature", "device_uuid": "uuid-303", "window": 60},
+    )
+    assert r.status_code == 200
+    [stats] = r.json()
+    assert (stats["count"], stats["mean"], stats["std"]) == (2, 20.0, 0.0)
+    assert stats["percentiles"] == {"50": 20.0, "90": 20.0, "99": 20.0}
+
+
+def test_sensor_reading_points_from_archive(client):
+    payload = make_device_payload(
+        "uuid-304", type_val=schemas.DeviceType.TEMPERATURE_SENSOR
+    )
+    client.post("/devices/", json=payload)
+    for _ in range(3):
+        client.get(
+            "/devices/temperature_sensor/read_temperature",
+            params={"device_uuid": "uuid-304"},
+        )
+    r = client.get(
+        "/devices/readings/points",
+        params={"device_uuid": "uuid-304", "quantity": "temperature"},
+    )
+    assert r.status_code == 200
+    assert [reading["value"] for reading in r.json()] == [20.0, 20.0, 20.0]
+    r = client.get(
+        "/devices/readings/points",
+        params={
+            "device_uuid": "uuid-304",
+            "quantity": "temperature",
+            "end_time": r.json()[0]["timestamp"],
+        },
+    )
+    assert r.json() == []
+
+
+# endregion
+
+# region alerts tests
+
+
+def test_alert_rules_raise_alerts_on_reads(client):
+    rule = {"name": "warm", "quantity": "temperature", "kind": "threshold", "high": 15}
+    assert client.put("/devices/alerts/rules", json=rule).status_code == 200
+    r = client.put("/devices/alerts/rules", json={**rule, "kind": "rate"})
+    assert r.status_code == 400
+    assert [r["name"] for r in client.get("/devices/alerts/rules").json()] == ["warm"]
+
+    client.post("/devices/", json=make_device_payload("uuid-330"))
+    for _ in range(2):
+        client.get(
+            "/devices/temperature_sensor/read_temperature",
+            params={"device_uuid": "uuid-330"},
+        )
+    # Raised once, while the rule keeps matching
+    [alert] = client.get("/devices/alerts", params={"device_uuid": "uuid-330"}).json()
+    assert (alert["rule"], alert["state"], alert["value"]) == ("warm", "firing", 20.0)
+
+    assert client.delete("/devices/alerts/rules/warm").status_code == 204
+    assert client.delete("/devices/alerts/rules/warm").status_code == 404
+
+
+def test_alert_stream_limits_subscribers(client, app_with_test_db):
+    manager = app_with_test_db.dependency_overrides[app_module.get_device_manager]()
+    manager.alerts.feed.max_subscribers = 0
+    assert client.get("/devices/alerts/stream").status_code == 503
+
+
 # endregion
 
 # region pressure sensor operations tests
@@ -344,6 +456,31 @@ def test_set_dc_motor_speed(client):
     assert r2.json() == 75.0
 
 
+def test_dc_motor_speed_history_from_rollups(client):
+    payload = make_device_payload("uuid-308", type_val=schemas.DeviceType.DC_MOTOR)
+    client.post("/devices/", json=payload)
+    client.put(
+        "/devices/dc_motor/set_speed",
+        params={"device_uuid": "uuid-308", "speed": 40.0},
+    )
+    for _ in range(2):
+        client.get("/devices/dc_motor/get_speed", params={"device_uuid": "uuid-308"})
+    get_sensor_history().flush_all()
+    # A day split into 500 points is rounded to 3 minute buckets, read from the
+    # minute rollups
+    end = datetime.now() + timedelta(minutes=1)
+    params = {
+        "device_uuid": "uuid-308",
+        "quantity": "speed",
+        "start_time": (end - timedelta(days=1)).isoformat(),
+        "end_time": end.isoformat(),
+    }
+    for source in ("auto", "raw", "rollup"):
+        r = client.get("/devices/readings", params={**params, "source": source})
+        assert r.status_code == 200
+        assert [(b["count"], b["avg"], b["std"]) for b in r.json()] == [(2, 40.0, 0.0)]
+
+
 def test_set_dc_motor_direction(client):
     payload = make_device_payload("uuid-307", type_val=schemas.DeviceType.DC_MOTOR)
     client.post("/devices/", json=payload)
@@ -491,6 +628,97 @@ def test_move_stepper_motor_relative(client):
 
 # endregion
 
+# endregion
+
+# region device group operations tests
+
+
+def test_create_and_get_group(client):
+    client.post("/devices/", json=make_device_payload("uuid-401"))
+    r = client.post(
+        "/groups/",
+        json={"name": "line-3", "description": "motors", "device_uuids": ["uuid-401"]},
+    )
+    assert r.status_code == 200
+    r = client.get("/groups/line-3")
+    assert r.status_code == 200
+    assert r.json()["device_uuids"] == ["uuid-401"]
+
+
+def test_add_and_remove_group_device(client):
+    client.post("/devices/", json=make_device_payload("uuid-402"))
+    client.post("/groups/", json={"name": "g1"})
+    r = client.put("/groups/g1/add_device/uuid-402")
+    assert r.status_code == 200
+    assert r.json()["device_uuids"] == ["uuid-402"]
+    r = client.put("/groups/g1/remove_device/uuid-402")
+    assert r.status_code == 200
+    assert r.json()["device_uuids"] == []
+
+
+def test_group_names_cannot_break_the_topic(client):
+    for name in ("a/b", "line+", "#", ""):
+        assert client.post("/groups/", json={"name": name}).status_code == 422
+
+
+def test_group_membership_survives_unconfirmed_subscription(client):
+    client.post("/devices/", json=make_device_payload("uuid-406"))
+    client.post("/groups/", json={"name": "g2"})
+    manager = client.app.dependency_overrides[app_module.get_device_manager]()
+    manager.mqtt_session = MagicMock()
+    manager.mqtt_session.send_command_and_wait.side_effect = TimeoutError("No reply")
+    try:
+        r = client.put("/groups/g2/add_device/uuid-406")
+        assert r.status_code == 200
+        assert r.json()["device_uuids"] == ["uuid-406"]
+        r = client.put("/groups/g2/remove_device/uuid-406")
+        assert r.status_code == 200
+        assert r.json()["device_uuids"] == []
+        assert manager.mqtt_session.send_command_and_wait.call_count == 2
+    finally:
+        manager.mqtt_session = None
+
+
+def test_group_command_reaches_all_members(client):
+    for u in ("uuid-403", "uuid-404"):
+        client.post(
+            "/devices/",
+            json=make_device_payload(u, type_val=schemas.DeviceType.DC_MOTOR),
+        )
+    client.post(
+        "/groups/",
+        json={"name": "motors", "device_uuids": ["uuid-403", "uuid-404", "gone"]},
+    )
+    r = client.post(
+        "/groups/motors/command", params={"command": "set_speed", "parameter": "0"}
+    )
+    assert r.status_code == 200
+    result = r.json()
+    assert set(result["responses"]) == {"uuid-403", "uuid-404"}
+    assert result["missing"] == ["gone"]
+    r = client.get("/devices/dc_motor/get_speed", params={"device_uuid": "uuid-404"})
+    assert r.json() == 0.0
+
+
+def test_delete_group(client):
+    client.post("/groups/", json={"name": "tmp"})
+    r = client.delete("/groups/tmp")
+    assert r.status_code == 204
+    assert client.get("/groups/tmp").status_code == 404
+
+
+def test_device_tags(client):
+    client.post("/devices/", json=make_device_payload("uuid-405"))
+    r = client.put("/devices/add_tag/uuid-405", params={"tag": "lab"})
+    assert r.status_code == 204
+    assert client.get("/devices/tags/uuid-405").json() == ["lab"]
+    r = client.get("/devices/tag/lab")
+    assert [d["uuid"] for d in r.json()] == ["uuid-405"]
+    r = client.put("/devices/remove_tag/uuid-405", params={"tag": "lab"})
+    assert r.status_code == 204
+    assert client.get("/devices/tag/lab").json() == []
+
+
 # endregion
 
 # region logging operations tests
@@ -515,4 +743,137 @@ def test_list_logs(client):
     assert len(logs) >= 1
 
 
+def test_list_logs_pages_with_cursor_header(client):
+    for i in range(3):
+        client.post("/logs/", params={"action": "act", "description": str(i)})
+    first = client.get("/logs/", params={"limit": 2})
+    assert len(first.json()) == 2
+    second = client.get(
+        "/logs/", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert second.status_code == 200
+    assert "X-Next-Cursor" not in second.headers
+    uuids = [log["uuid"] for log in first.json() + second.json()]
+    assert len(set(uuids)) == len(uuids) >= 3
+    assert client.get("/logs/", params={"limit": 5000}).status_code == 422
+    assert client.get("/logs/", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_list_logs_filters_by_action_and_description(client):
+    client.post("/logs/", params={"action": "calibrate", "description": "Zeroed A"})
+    client.post("/logs/", params={"action": "calibrate", "description": "Zeroed B"})
+    client.post("/logs/", params={"action": "other", "description": "Zeroed C"})
+    r = client.get("/logs/", params={"action": "calibrate", "description": "zeroed b"})
+    assert r.status_code == 200
+    assert [log["description"] for log in r.json()] == ["Zeroed B"]
+
+
+def test_export_logs_streams_ndjson_and_gzip_csv(client):
+    import csv
+    import gzip
+    import io
+    import json
+
+    for i in range(3):
+        client.post("/logs/", params={"action": "act", "description": str(i)})
+
+    r = client.get("/logs/export", params={"format": "ndjson"})
+    assert r.status_code == 200
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["description"] for row in rows][:3] == ["0", "1", "2"]
+
+    r = client.get("/logs/export", params={"format": "csv"})
+    assert r.headers["content-type"] == "application/gzip"
+    table = list(csv.reader(io.StringIO(gzip.decompress(r.content).decode())))
+    assert table[0][:2] == ["uuid", "timestamp"]
+    # Each export is logged before its body is streamed
+    assert len(table) == 1 + len(rows) + 1
+    assert client.get("/logs/export", params={"format": "xml"}).status_code == 400
+
+
+def test_one_audit_record_per_request(client, db_session):
+    from sim_device_control.audit import host_identity
+    from sim_device_control.drivers import db as db_driver
+
+    client.post("/devices/", json=make_device_payload("uuid-log"))
+    client.get("/devices/dc_motor/get_speed", params={"device_uuid": "uuid-log"})
+    client.get("/health")
+
+    logs = sorted(db_driver.get_logs(db_session), key=lambda log: log.timestamp)
+    assert [(log.action, log.status) for log in logs] == [
+        ("create_device", "ok"),
+        ("get_dc_motor_speed", "error"),
+    ]
+    assert logs[0].description == "Successfully created device uuid-log"
+    assert logs[1].description == "Device is not a dc motor"
+    assert logs[1].device_uuid == "uuid-log"
+    assert logs[1].parameters == '{"device_uuid": "uuid-log"}'
+    assert all(log.duration_ms >= 0 for log in logs)
+    assert {log.user for log in logs} == {host_identity()}
+
+
+def test_unexpected_failures_are_audited_with_the_error(
+    app_with_test_db, db_session, monkeypatch
+):
+    from sim_device_control.drivers import db as db_driver
+    from sim_device_control.drivers import temperature
+
+    def no_reply(self, mqtt):
+        raise TimeoutError("No reply received")
+
+    monkeypatch.setattr(
+        temperature.TemperatureSensorDriver, "read_temperature", no_reply
+    )
+    client = TestClient(app_with_test_db, raise_server_exceptions=False)
+    payload = make_device_payload(
+        "uuid-timeout", type_val=schemas.DeviceType.TEMPERATURE_SENSOR
+    )
+    client.post("/devices/", json=payload)
+    r = client.get(
+        "/devices/temperature_sensor/read_temperature",
+        params={"device_uuid": "uuid-timeout"},
+    )
+    assert r.status_code == 500
+
+    [log] = [
+        log
+        for log in db_driver.get_logs(db_session)
+        if log.action == "read_temperature"
+    ]
+    assert (log.status, log.device_uuid) == ("error", "uuid-timeout")
+    assert log.error == "TimeoutError: No reply received"
+
+
+def test_audit_policies_skip_reads_but_never_writes(client, db_session, monkeypatch):
+    from sim_device_control import audit
+    from sim_device_control.drivers import db as db_driver
+
+    monkeypatch.setattr(audit.settings, "audit_default_policy", "off")
+    monkeypatch.setattr(
+        audit.settings,
+        "audit_policies",
+        {"get_dc_motor_speed": "failures-only", "list_*": "sampled(1.0)"},
+    )
+    audit.audit_policy.cache_clear()
+    try:
+        client.post("/devices/", json=make_device_payload("uuid-policy"))
+        client.get("/devices/get_status", params={"device_uuid": "uuid-policy"})
+        client.get("/devices/dc_motor/get_speed", params={"device_uuid": "uuid-policy"})
+        client.get("/logs/")
+    finally:
+        audit.audit_policy.cache_clear()
+
+    logs = sorted(db_driver.get_logs(db_session), key=lambda log: log.timestamp)
+    assert [log.action for log in logs] == [
+        "create_device",
+        "get_dc_motor_speed",
+        "list_logs",
+    ]
+    assert audit.parse_audit_policy("sampled(0.25)") == ("sampled", 0.25)
+    assert audit.should_record(("sampled", 0.0), "error")
+    assert not audit.should_record(("sampled", 0.0), "ok")
+    with pytest.raises(ValueError):
+        audit.parse_audit_policy("sampled(2)")
+
+
 # endregion
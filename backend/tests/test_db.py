@@ -76,3 +76,199 @@ def test_get_db_generator_yields_session_and_closes():
     sess = next(gen)
     assert isinstance(sess, Session)
     gen.close()
+
+
+def test_session_scope_opens_independent_sessions():
+    with db.session_scope() as first, db.session_scope() as second:
+        assert isinstance(first, Session)
+        assert first is not second
+
+
+def test_device_manager_background_calls_use_own_session(db_session):
+    from sim_device_control.drivers.device_manager import DeviceManager
+
+    manager = DeviceManager(enable_mqtt=False)
+    try:
+        assert not hasattr(manager, "db")
+        manager.add_device(make_device("bg-1"))
+        assert [d.uuid for d in db.get_devices(db_session)] == ["bg-1"]
+        manager.remove_device("bg-1")
+        assert db.get_devices(db_session) == []
+    finally:
+        manager.stop()
+
+
+def test_startup_probing_holds_no_session_while_waiting(db_session, monkeypatch):
+    from contextlib import contextmanager
+    from sim_device_control.drivers.device_manager import DeviceManager
+    from sim_device_control.drivers.temperature import TemperatureSensorDriver
+
+    db.add_device(db_session, make_device("online-1"))
+    db.add_device(db_session, make_device("offline-1"))
+    open_sessions = []
+    session_scope = db.session_scope
+
+    @contextmanager
+    def counted_scope():
+        with session_scope() as session:
+            open_sessions.append(session)
+            try:
+                yield session
+            finally:
+                open_sessions.remove(session)
+
+    def probe(self, mqtt):
+        assert open_sessions == []
+        if self.uuid == "offline-1":
+            raise TimeoutError("No reply received")
+        return "online"
+
+    monkeypatch.setattr(db, "session_scope", counted_scope)
+    monkeypatch.setattr(TemperatureSensorDriver, "_get_status", probe)
+    manager = DeviceManager(enable_mqtt=False)
+    try:
+        assert manager.list_devices() == ["online-1"]
+        db_session.expire_all()
+        [device] = db.get_devices(db_session)
+        assert (device.uuid, device.status) == ("online-1", "online")
+    finally:
+        manager.stop()
+
+
+def test_legacy_log_table_is_converted_to_compact_rows():
+    engine = sqlalchemy.create_engine("sqlite+pysqlite:///:memory:")
+    record = uuid.uuid4()
+    with engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.text(
+                "CREATE TABLE log_records (uuid VARCHAR(225) PRIMARY KEY, "
+                "user VARCHAR(255) NOT NULL, device_uuid VARCHAR(225), "
+                "action VARCHAR(255) NOT NULL, description VARCHAR(1024), "
+                "timestamp DATETIME)"
+            )
+        )
+        connection.execute(
+            sqlalchemy.text(
+                "CREATE INDEX ix_log_records_timestamp_uuid "
+                "ON log_records (timestamp, uuid)"
+            )
+        )
+        connection.execute(
+            sqlalchemy.text(
+                "INSERT INTO log_records VALUES "
+                "(:uuid, 'host', NULL, 'read', NULL, '2025-01-01 12:00:00')"
+            ),
+            {"uuid": str(record)},
+        )
+    assert db._set_aside_legacy_logs(engine)
+    schemas.Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        assert db._copy_legacy_logs(session) == 1
+        [log] = db.get_logs(session)
+        assert (log.uuid, log.user, log.device_uuid, log.action) == (
+            str(record),
+            "host",
+            "",
+            "read",
+        )
+        assert log.description == "" and log.status is None
+        stored = session.execute(
+            sqlalchemy.text("SELECT length(uuid), typeof(action_id) FROM log_records")
+        ).one()
+        assert tuple(stored) == (16, "integer")
+    assert db.LEGACY_LOG_TABLE not in sqlalchemy.inspect(engine).get_table_names()
+    # Already compact, nothing to set aside on the next start
+    assert not db._set_aside_legacy_logs(engine)
+    db.clear_log_dictionaries()
+
+
+def test_log_names_are_stored_once(db_session):
+    for i in range(3):
+        db.add_log(
+            db_session,
+            schemas.LogRecord(
+                uuid=uuid.uuid4(),
+                user="host",
+                device_uuid="dev-1",
+                action="read" if i else "write",
+                description=str(i),
+                timestamp=datetime(2025, 1, 1, 12, i),
+            ),
+        )
+    actions = db_session.query(schemas.DatabaseLogAction.name).all()
+    assert sorted(name for (name,) in actions) == ["read", "write"]
+    assert db_session.query(schemas.DatabaseLogUser).count() == 1
+    # Names resolve from the database once the in-process cache is gone
+    db.clear_log_dictionaries()
+    db_session.expire_all()
+    page, _ = db.get_logs_page(db_session, limit=10, action="read")
+    assert [(log.user, log.device_uuid, log.action) for log in page] == [
+        ("host", "dev-1", "read")
+    ] * 2
+    assert db.get_logs_page(db_session, limit=10, user="nobody") == ([], None)
+
+
+def test_logs_page_walks_newest_first_with_ties(db_session):
+    stamp = datetime(2025, 1, 1, 12, 0, 0)
+    for i in range(5):
+        db.add_log(
+            db_session,
+            schemas.LogRecord(
+                uuid=uuid.UUID(int=i),
+                user="u",
+                device_uuid="dev-1" if i % 2 else "dev-2",
+                action="act",
+                description=str(i),
+                timestamp=stamp if i < 3 else stamp.replace(hour=13),
+            ),
+        )
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = db.get_logs_page(db_session, 2, cursor)
+        seen += [log.description for log in page]
+        if cursor is None:
+            break
+    assert seen == ["4", "3", "2", "1", "0"]
+
+    page, cursor = db.get_logs_page(db_session, 10, device_uuid="dev-1")
+    assert [log.description for log in page] == ["3", "1"]
+    assert cursor is None
+    with pytest.raises(ValueError):
+        db.get_logs_page(db_session, 2, "not-a-cursor")
+
+
+def test_logs_page_filters_by_action_user_and_description(db_session):
+    rows = [
+        ("dev-1", "read_temperature", "host-a", "Read temperature: 21.5"),
+        ("dev-1", "set_speed", "host-a", "Set speed to 100%"),
+        ("dev-2", "read_temperature", "host-b", "Read temperature: 19.0"),
+        ("dev-2", "set_speed", "host-b", "Set speed_limit to 5"),
+    ]
+    for i, (device_uuid, action, user, description) in enumerate(rows):
+        db.add_log(
+            db_session,
+            schemas.LogRecord(
+                uuid=uuid.UUID(int=i),
+                user=user,
+                device_uuid=device_uuid,
+                action=action,
+                description=description,
+                timestamp=datetime(2025, 1, 1, 12, i),
+            ),
+        )
+
+    def descriptions(**filters):
+        page, _ = db.get_logs_page(db_session, 10, **filters)
+        return [log.description for log in page]
+
+    assert descriptions(action="read_temperature", user="host-b") == [
+        "Read temperature: 19.0"
+    ]
+    assert descriptions(device_uuid="dev-1", description="speed") == [
+        "Set speed to 100%"
+    ]
+    # LIKE wildcards in the search are matched literally
+    assert descriptions(description="100%") == ["Set speed to 100%"]
+    assert descriptions(description="speed_") == ["Set speed_limit to 5"]
@@ -0,0 +1,53 @@
+from sim_device_control import schemas
+from sim_device_control.drivers import db
+from sim_device_control.drivers.device_state import DeviceStateWriter
+
+
+def make_device(u: str):
+    return schemas.SimDevice(
+        uuid=u,
+        type=schemas.DeviceType.DC_MOTOR,
+        name="motor",
+        status="offline",
+        description="desc",
+        version="1.0.0",
+    )
+
+
+def test_write_behind_coalesces_updates_until_flush(db_session):
+    db.add_device(db_session, make_device("ws-1"))
+    writer = DeviceStateWriter(write_behind=True, flush_interval=60)
+
+    writer.update("ws-1", status="online")
+    writer.update("ws-1", status="busy", name="renamed")
+
+    db_session.expire_all()
+    assert db.get_device_by_uuid(db_session, "ws-1").status == "offline"
+    overlaid = writer.apply(db.get_device_by_uuid(db_session, "ws-1"))
+    assert (overlaid.status, overlaid.name) == ("busy", "renamed")
+
+    assert writer.flush() == 1
+    db_session.expire_all()
+    stored = db.get_device_by_uuid(db_session, "ws-1")
+    assert (stored.status, stored.name) == ("busy", "renamed")
+    assert writer.pending("ws-1") == {}
+
+
+def test_write_through_updates_immediately(db_session):
+    db.add_device(db_session, make_device("ws-2"))
+    writer = DeviceStateWriter(write_behind=False)
+
+    writer.update("ws-2", db_session, version="2.0.0")
+
+    db_session.expire_all()
+    assert db.get_device_by_uuid(db_session, "ws-2").version == "2.0.0"
+
+
+def test_discarded_updates_are_not_flushed(db_session):
+    db.add_device(db_session, make_device("ws-3"))
+    writer = DeviceStateWriter(write_behind=True, flush_interval=60)
+
+    writer.update("ws-3", status="online")
+    writer.discard("ws-3")
+
+    assert writer.flush() == 0
@@ -0,0 +1,113 @@
+import pytest
+from fastapi.testclient import TestClient
+from sim_device_control import schemas
+from sim_device_control.schemas import MotorDirection
+from sim_device_control.drivers.temperature import TemperatureSensorDriver
+from sim_device_control.drivers.dc_motor import DcMotorDriver
+from sim_device_control.drivers.stepper_motor import StepperMotorDriver
+
+
+@pytest.fixture
+def client(app_with_test_db):
+    return TestClient(app_with_test_db)
+
+
+class RecordingSession:
+    def __init__(self, response="1.5"):
+        self.response = response
+        self.calls = []
+
+    def send_command_and_wait(
+        self, cmd_topic, reply_topic, command, parameter, timeout
+    ):
+        self.calls.append((cmd_topic, reply_topic, command, parameter))
+        return {"response": self.response}
+
+
+def test_topics_are_precomputed_per_device():
+    driver = TemperatureSensorDriver("t-1")
+    assert driver.cmd_topic == "sim-device-control/t-1/command"
+    assert driver.reply_topic == "sim-device-control/t-1/response"
+
+
+def test_sensor_read_goes_through_command_table():
+    session = RecordingSession("21.5")
+    driver = TemperatureSensorDriver("t-1")
+    assert driver.read_temperature(session) == 21.5
+    assert session.calls == [
+        (driver.cmd_topic, driver.reply_topic, "read_temperature", "")
+    ]
+
+
+def test_sensor_read_without_mqtt_is_simulated():
+    value = TemperatureSensorDriver("t-1").read_temperature()
+    assert -20.0 <= value <= 50.0
+
+
+def test_motor_writes_format_parameters_and_keep_local_state():
+    session = RecordingSession("backward")
+    driver = DcMotorDriver("m-1")
+    driver.set_direction(MotorDirection.BACKWARD, session)
+    assert session.calls[-1][2:] == ("set_direction", "backward")
+    assert driver.get_direction() == MotorDirection.BACKWARD
+
+
+def test_motor_write_validation():
+    with pytest.raises(ValueError):
+        DcMotorDriver("m-1").set_speed(120.0)
+
+
+def test_stepper_without_mqtt():
+    driver = StepperMotorDriver("s-1")
+    driver.move_absolute(50)
+    driver.move_relative(25)
+    assert driver.get_location() == 75.0
+
+
+def test_execute_parses_raw_commands():
+    driver = StepperMotorDriver("s-1")
+    driver.execute("set_speed", "12.5")
+    assert driver.execute("get_speed") == 12.5
+    assert driver.execute("get_status") == "Simulation"
+    with pytest.raises(ValueError):
+        driver.execute("read_temperature")
+
+
+def test_registry_imports_drivers_on_first_use():
+    from sim_device_control.drivers.registry import DriverRegistry
+
+    registry = DriverRegistry()
+    assert registry.loaded() == []
+    assert "dc_motor" in registry.available()
+    assert registry.get(schemas.DeviceType.DC_MOTOR) is DcMotorDriver
+    assert registry.loaded() == ["dc_motor"]
+    with pytest.raises(ValueError):
+        registry.get("no_such_type")
+
+
+def test_plugin_device_type_without_enum_entry(client, monkeypatch):
+    from sim_device_control.drivers.base.command_driver import (
+        DeviceCommand,
+        SensorCommandDriver,
+    )
+    from sim_device_control.drivers.device_manager import DeviceManager
+    from sim_device_control.drivers.registry import DriverRegistry
+
+    class Co2SensorDriver(SensorCommandDriver):
+        reads = {"co2": DeviceCommand("read_co2", simulate=lambda driver: 400.0)}
+
+    registry = DriverRegistry()
+    registry.register("co2_sensor", Co2SensorDriver)
+    monkeypatch.setattr(DeviceManager, "registry", registry)
+
+    payload = {
+        "uuid": "co2-1",
+        "type": "co2_sensor",
+        "name": "co2",
+        "status": "simulated",
+        "description": "plugin",
+        "version": "1.0.0",
+    }
+    assert client.post("/devices/", json=payload).status_code == 200
+    r = client.get("/devices/type/co2_sensor")
+    assert [d["uuid"] for d in r.json()] == ["co2-1"]
@@ -0,0 +1,78 @@
+import time
+import pytest
+from sim_device_control.drivers.fleet_emulator import FleetEmulator
+from sim_device_control.drivers.fleet_sim import FleetSimulator
+from sim_device_control.drivers.local_broker import LocalBroker
+from sim_device_control.drivers.mqtt import MqttDriver
+from sim_device_control.drivers.temperature import TemperatureSensorDriver
+from sim_device_control.schemas import DeviceType
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def fleet():
+    broker = LocalBroker()
+    broker.start()
+    backend = MqttDriver("local", client=broker.client())
+    backend.connect()
+    backend.start()
+    emulator = FleetEmulator(broker.client(), FleetSimulator(seed=1))
+    try:
+        yield backend, emulator
+    finally:
+        backend.stop()
+        broker.stop()
+
+
+def test_emulated_devices_announce_and_answer(fleet):
+    backend, emulator = fleet
+    sensors = emulator.add_many(DeviceType.TEMPERATURE_SENSOR, 50)
+    emulator.add_many(DeviceType.STEPPER_MOTOR, 50)
+    emulator.start()
+    _wait_for(lambda: len(backend.devices) == 100)
+    assert backend.devices[sensors[0]]["type"] == "temperature_sensor"
+
+    driver = TemperatureSensorDriver(sensors[0])
+    assert -20.0 <= driver.read_temperature(backend) <= 50.0
+
+    reply = backend.send_command_and_wait(
+        driver.cmd_topic, driver.reply_topic, "get_speed", "", timeout=1
+    )
+    assert set(reply) == {"id", "device_id", "response", "timestamp"}
+    assert reply["response"] == "Invalid command: get_speed"
+
+    emulator.stop()
+    _wait_for(lambda: not backend.devices)
+
+
+def test_group_commands_reach_joined_members(fleet):
+    backend, emulator = fleet
+    motors = emulator.add_many(DeviceType.DC_MOTOR, 3)
+    emulator.start()
+    for uuid in motors[:2]:
+        backend.send_command_and_wait(
+            f"sim-device-control/{uuid}/command",
+            f"sim-device-control/{uuid}/response",
+            "join_group",
+            "line",
+            timeout=1,
+        )
+    replies = backend.send_group_command_and_wait(
+        "sim-device-control/group/line/command",
+        [f"sim-device-control/{uuid}/response" for uuid in motors],
+        "get_direction",
+        "",
+        expected=motors[:2],
+        timeout=1,
+    )
+    assert {uuid: reply["response"] for uuid, reply in replies.items()} == {
+        motors[0]: "forward",
+        motors[1]: "forward",
+    }
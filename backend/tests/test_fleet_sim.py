@@ -0,0 +1,170 @@
+import pytest
+from sim_device_control.config import settings
+from sim_device_control.schemas import (
+    DeviceGroup,
+    DeviceType,
+    MotorDirection,
+    SimDevice,
+)
+from sim_device_control.drivers.fleet_sim import FleetSimulator
+from sim_device_control.drivers.dc_motor import DcMotorDriver
+from sim_device_control.drivers.stepper_motor import StepperMotorDriver
+from sim_device_control.drivers.temperature import TemperatureSensorDriver
+
+
+def _readings(seed):
+    simulator = FleetSimulator(seed=seed)
+    uuids = simulator.add_many(DeviceType.TEMPERATURE_SENSOR, 5)
+    readings = []
+    for _ in range(10):
+        simulator.step(0.5)
+        readings.append(
+            [
+                TemperatureSensorDriver(uuid).read_temperature(simulator)
+                for uuid in uuids
+            ]
+        )
+    return readings
+
+
+def test_seeded_runs_are_deterministic():
+    assert _readings(7) == _readings(7)
+    assert _readings(7) != _readings(8)
+    assert all(-20.0 <= value <= 50.0 for row in _readings(7) for value in row)
+
+
+def test_dc_motor_spins_up_and_reverses_through_zero():
+    simulator = FleetSimulator(seed=1)
+    simulator.add("m-1", DeviceType.DC_MOTOR)
+    motor = DcMotorDriver("m-1")
+    motor.set_speed(80.0, simulator)
+
+    speeds = []
+    for _ in range(30):
+        simulator.step(0.1)
+        speeds.append(motor.get_speed(simulator))
+    assert speeds == sorted(speeds)
+    assert 0.0 < speeds[0] < 80.0
+    assert speeds[-1] == pytest.approx(80.0, abs=1.0)
+
+    motor.set_direction(MotorDirection.BACKWARD, simulator)
+    simulator.step(0.1)
+    assert motor.get_speed(simulator) < speeds[-1]
+    assert motor.get_direction(simulator) == MotorDirection.BACKWARD
+
+
+def test_stepper_moves_with_speed_and_acceleration_limits():
+    simulator = FleetSimulator(seed=1)
+    simulator.add("s-1", DeviceType.STEPPER_MOTOR)
+    stepper = StepperMotorDriver("s-1")
+    stepper.set_speed(100.0, simulator)
+    stepper.set_acceleration(50.0, simulator)
+    stepper.move_absolute(200, simulator)
+
+    simulator.step(1.0)
+    # Accelerating from rest covers less than the full speed would
+    assert 0.0 < stepper.get_location(simulator) < 100.0
+    for _ in range(100):
+        simulator.step(0.1)
+    assert stepper.get_location(simulator) == 200.0
+
+    stepper.move_relative(-50, simulator)
+    simulator.step(100.0)
+    assert stepper.get_location(simulator) == 150.0
+
+
+def test_protocol_errors_match_devices():
+    simulator = FleetSimulator(seed=1)
+    simulator.add("t-1", DeviceType.TEMPERATURE_SENSOR)
+    reply = simulator.send_command_and_wait(
+        "sim-device-control/t-1/command",
+        "sim-device-control/t-1/response",
+        "set_speed",
+        "10",
+    )
+    assert reply["device_id"] == "t-1"
+    assert reply["response"] == "Invalid command: set_speed"
+    with pytest.raises(TimeoutError):
+        TemperatureSensorDriver("missing").read_temperature(simulator)
+    with pytest.raises(ValueError):
+        simulator.add("co2-1", "co2_sensor")
+
+
+def test_removed_slots_are_reused():
+    simulator = FleetSimulator(seed=1, capacity=2)
+    uuids = simulator.add_many(DeviceType.HUMIDITY_SENSOR, 3)
+    simulator.remove(uuids[1])
+    assert simulator.add("m-1", DeviceType.DC_MOTOR) == 1
+    assert len(simulator) == 3
+    assert uuids[1] not in simulator
+
+
+def test_device_manager_uses_simulator_without_mqtt(monkeypatch):
+    from sim_device_control.drivers.device_manager import DeviceManager
+
+    monkeypatch.setattr(settings, "fleet_simulation", True)
+    monkeypatch.setattr(settings, "fleet_simulation_seed", 3)
+    manager = DeviceManager(enable_mqtt=False)
+    try:
+        manager.add_device(
+            SimDevice(
+                uuid="m-1",
+                type=DeviceType.DC_MOTOR,
+                name="Motor",
+                status="ok",
+                description="",
+                version="1.0.0",
+            ),
+            use_db=False,
+        )
+        manager.set_dc_motor_speed("m-1", 50.0)
+        assert manager.get_status("m-1", db=None) == "Fleet Simulation"
+        manager.create_group(DeviceGroup(name="line", device_uuids=["m-1"]))
+        result = manager.send_group_command("line", "get_direction")
+        assert result.responses == {"m-1": "forward"}
+    finally:
+        manager.stop()
+    assert "m-1" in manager.simulator
+
+
+def test_location_endpoint_reports_whole_steps_mid_move(app_with_test_db, monkeypatch):
+    from fastapi.testclient import TestClient
+    from sim_device_control import app as app_module
+    from sim_device_control.drivers.device_manager import DeviceManager
+
+    monkeypatch.setattr(settings, "fleet_simulation", True)
+    monkeypatch.setattr(settings, "fleet_simulation_seed", 3)
+    manager = DeviceManager(enable_mqtt=False)
+    app_with_test_db.dependency_overrides[app_module.get_device_manager] = lambda: (
+        manager
+    )
+    client = TestClient(app_with_test_db)
+    try:
+        client.post(
+            "/devices/",
+            json={
+                "uuid": "s-1",
+                "type": DeviceType.STEPPER_MOTOR.value,
+                "name": "Stepper",
+                "status": "simulated",
+                "description": "",
+                "version": "1.0.0",
+            },
+        )
+        params = {"device_uuid": "s-1"}
+        client.put("/devices/stepper_motor/set_speed", params={**params, "speed": 10})
+        client.put(
+            "/devices/stepper_motor/set_acceleration",
+            params={**params, "acceleration": 7.3},
+        )
+        client.put(
+            "/devices/stepper_motor/set_absolute_location",
+            params={**params, "absolute_location": 100},
+        )
+        # Partway through accelerating the simulated position is fractional
+        manager.simulator.step(0.61)
+        r = client.get("/devices/stepper_motor/get_location", params=params)
+        assert r.status_code == 200
+        assert isinstance(r.json(), int) and 0 < r.json() < 100
+    finally:
+        manager.stop()
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sim_device_control.drivers import db as db_driver
+
+START = datetime(2025, 1, 1, 10, 0)
+
+
+def add_sample(db_session, make_record):
+    def record(minutes, device_uuid, status, duration_ms=None, action="read"):
+        return make_record(
+            "",
+            device_uuid,
+            action,
+            START + timedelta(minutes=minutes),
+            status=status,
+            duration_ms=duration_ms,
+        )
+
+    # Two batches, so the second one is merged into existing rollup rows
+    db_driver.add_logs(
+        db_session,
+        [
+            record(5, "dev-1", "ok", 2.0),
+            record(10, "dev-1", "error", 6.0),
+            record(20, "dev-2", "ok", 1.0),
+        ],
+    )
+    db_driver.add_logs(
+        db_session,
+        [
+            record(50, "dev-1", "error", 10.0),
+            record(70, "dev-1", "ok"),
+        ],
+    )
+    db_driver.add_log(db_session, record(80, "dev-2", None, 3.0, action="set"))
+
+
+def test_aggregate_counts_and_durations_per_hour_device_and_status(
+    db_session, make_record
+):
+    add_sample(db_session, make_record)
+    rows = db_driver.aggregate_logs(
+        db_session, "hour", ["device_uuid", "status"], action="read"
+    )
+    assert [
+        (row["bucket"].hour, row["device_uuid"], row["status"], row["records"])
+        for row in rows
+    ] == [
+        (10, "dev-1", "error", 2),
+        (10, "dev-1", "ok", 1),
+        (10, "dev-2", "ok", 1),
+        (11, "dev-1", "ok", 1),
+    ]
+    assert rows[0]["avg_duration_ms"] == 8.0
+    assert rows[0]["max_duration_ms"] == 10.0
+    # Records without a duration are counted but do not affect the average
+    assert rows[3]["avg_duration_ms"] is None
+
+
+def test_rollups_match_raw_aggregation(db_session, make_record):
+    add_sample(db_session, make_record)
+    for bucket, group_by in [
+        ("hour", ["device_uuid", "action", "status"]),
+        ("day", ["status"]),
+        ("hour", []),
+    ]:
+        raw = db_driver.aggregate_logs(db_session, bucket, group_by)
+        assert db_driver.aggregate_log_rollups(db_session, bucket, group_by) == raw
+
+    expected = db_driver.aggregate_log_rollups(db_session, "hour", ["device_uuid"])
+    assert db_driver.rebuild_log_rollups(db_session) == 5
+    assert db_driver.aggregate_log_rollups(db_session, "hour", ["device_uuid"]) == (
+        expected
+    )
+
+
+def test_aggregate_endpoint(app_with_test_db, db_session, make_record):
+    add_sample(db_session, make_record)
+    client = TestClient(app_with_test_db)
+    r = client.get(
+        "/logs/aggregate",
+        params={"bucket": "day", "group_by": "status", "source": "rollup"},
+    )
+    assert r.status_code == 200
+    assert [(row["status"], row["records"]) for row in r.json()] == [
+        (None, 1),
+        ("error", 2),
+        ("ok", 3),
+    ]
+    assert client.get("/logs/aggregate", params={"bucket": "week"}).status_code == 400
+    assert client.get("/logs/aggregate", params={"group_by": "user"}).status_code == 400
+    assert (
+        client.get(
+            "/logs/aggregate", params={"bucket": "minute", "source": "rollup"}
+        ).status_code
+        == 400
+    )
@@ -0,0 +1,151 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+import pytest
+from sim_device_control.drivers import db as db_driver
+from sim_device_control.drivers.log_journal import LogJournal
+from sim_device_control.drivers.log_sink import LogSink
+
+
+def descriptions(db_session):
+    db_session.expire_all()
+    return sorted(log.description for log in db_driver.get_logs(db_session))
+
+
+def test_records_survive_a_crash_and_a_torn_write(db_session, tmp_path, make_record):
+    crashed = LogJournal(str(tmp_path))
+    for i in range(5):
+        crashed.append(make_record(str(i)))
+    # The process dies halfway through writing a record: no stop(), no shipping
+    crashed._file.write(b'{"uuid": "torn')
+    crashed._file.flush()
+
+    journal = LogJournal(str(tmp_path))
+    journal.append(make_record("after restart"))
+    assert journal.ship(max_records=3) == 3
+    assert journal.ship() == 3
+    assert journal.ship() == 0
+    assert descriptions(db_session) == ["0", "1", "2", "3", "4", "after restart"]
+    assert journal.skipped_lines == 1
+    # Only the segment being appended to is left
+    assert journal.segments() == [2]
+    assert journal.pending_bytes() == 0
+
+
+def test_records_survive_a_killed_process(db_session, tmp_path):
+    # A separate process appends records and is killed without any cleanup
+    script = textwrap.dedent(
+        f"""
+        import os, signal, uuid
+        from datetime import datetime
+        from sim_device_control.drivers.log_journal import LogJournal
+        from sim_device_control.schemas import LogRecord
+
+        journal = LogJournal({str(tmp_path)!r}, segment_max_bytes=4096)
+        journal.start()
+        for i in range(200):
+            journal.append(LogRecord(
+                uuid=uuid.uuid4(), user="host", device_uuid="", action="act",
+                description=str(i), timestamp=datetime.now(),
+            ))
+        os.kill(os.getpid(), signal.SIGKILL)
+        """
+    )
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    result = subprocess.run(
+        [sys.executable, "-c", script], env={**os.environ, "PYTHONPATH": src}
+    )
+    assert result.returncode != 0
+
+    journal = LogJournal(str(tmp_path))
+    while journal.ship():
+        pass
+    assert descriptions(db_session) == sorted(str(i) for i in range(200))
+
+
+def test_crash_between_insert_and_checkpoint_ships_once(
+    db_session, tmp_path, monkeypatch, make_record
+):
+    journal = LogJournal(str(tmp_path))
+    for i in range(3):
+        journal.append(make_record(str(i)))
+
+    def crash(sequence, offset):
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(journal, "_write_checkpoint", crash)
+    with pytest.raises(OSError):
+        journal.ship()
+    monkeypatch.undo()
+
+    restarted = LogJournal(str(tmp_path))
+    assert restarted.ship() == 3
+    assert restarted.duplicates == 3
+    assert descriptions(db_session) == ["0", "1", "2"]
+
+
+def test_segments_rotate_by_size(db_session, tmp_path, make_record):
+    journal = LogJournal(str(tmp_path), segment_max_bytes=600)
+    for i in range(10):
+        journal.append(make_record(str(i)))
+    assert len(journal.segments()) > 2
+    while journal.ship(max_records=4):
+        pass
+    assert len(descriptions(db_session)) == 10
+    assert journal.segments() == [journal.segments()[-1]]
+    journal.stop()
+
+
+def test_journal_sink_accepts_records_while_database_is_down(
+    db_session, tmp_path, monkeypatch, make_record
+):
+    sink = LogSink(mode="journal", journal=LogJournal(str(tmp_path)))
+
+    def fail(db, logs, skip_existing=False):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(db_driver, "add_logs", fail)
+    sink.submit(make_record("while down"))
+    assert not sink.blocks()
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    stats = sink.stats()
+    assert (stats["failed_batches"], stats["queue_depth"]) == (1, 1)
+    monkeypatch.undo()
+
+    sink.stop()
+    assert descriptions(db_session) == ["while down"]
+    stats = sink.stats()
+    assert (stats["journal_pending_bytes"], stats["queue_depth"]) == (0, 0)
+
+
+def test_sink_ships_a_backlog_left_in_the_journal_on_start(
+    db_session, tmp_path, monkeypatch, make_record
+):
+    journal = LogJournal(str(tmp_path))
+    for i in range(3):
+        journal.append(make_record(str(i)))
+    journal.stop()
+    assert LogJournal(str(tmp_path)).pending_records() == 3
+
+    def fail(db, logs, skip_existing=False):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(db_driver, "add_logs", fail)
+    # Far fewer than batch_size records and a long interval: only the backlog
+    # found on start makes the writer ship
+    sink = LogSink(mode="journal", journal=LogJournal(str(tmp_path)), flush_interval=60)
+    sink.start()
+    deadline = time.monotonic() + 5
+    while sink.stats()["failed_batches"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = sink.stats()
+    assert stats["failed_batches"] >= 1
+    assert stats["queue_depth"] == 3
+    monkeypatch.undo()
+
+    sink.stop()
+    assert descriptions(db_session) == ["0", "1", "2"]
+    assert sink.stats()["queue_depth"] == 0
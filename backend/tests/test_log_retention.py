@@ -0,0 +1,82 @@
+import gzip
+import uuid
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from sim_device_control.drivers import db as db_driver
+from sim_device_control.drivers.log_retention import LogRetention
+from sim_device_control.schemas import DatabaseLogRecord, LogRecord
+
+TODAY = date(2025, 3, 10)
+
+
+def add_days(db_session, days_ago_counts):
+    records = []
+    for days_ago, count in days_ago_counts.items():
+        day = datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time())
+        for i in range(count):
+            records.append(
+                LogRecord(
+                    uuid=uuid.uuid4(),
+                    user="host",
+                    device_uuid="",
+                    action="act",
+                    description=f"{days_ago}-{i}",
+                    timestamp=day + timedelta(hours=i),
+                    status="error" if i == 0 else "ok",
+                )
+            )
+    db_driver.add_logs(db_session, records)
+
+
+def test_old_days_are_summarized_archived_and_purged(db_session, tmp_path):
+    add_days(db_session, {0: 2, 1: 3, 5: 4, 6: 1})
+    retention = LogRetention(retention_days=3, archive_dir=str(tmp_path))
+
+    result = retention.run_once(today=TODAY)
+    assert result["summarized"] == 3
+    assert result["purged_days"] == 2
+    assert result["purged_records"] == 5
+
+    db_session.expire_all()
+    remaining = sorted(log.description for log in db_driver.get_logs(db_session))
+    assert remaining == ["0-0", "0-1", "1-0", "1-1", "1-2"]
+
+    counts = {
+        summary.day: (summary.records, summary.errors, summary.purged_at is not None)
+        for summary in db_driver.get_log_daily_counts(db_session)
+    }
+    assert counts == {
+        TODAY - timedelta(days=6): (1, 1, True),
+        TODAY - timedelta(days=5): (4, 1, True),
+        TODAY - timedelta(days=1): (3, 1, False),
+    }
+
+    archive = tmp_path / f"logs-{TODAY - timedelta(days=5)}.csv.gz"
+    lines = gzip.decompress(archive.read_bytes()).decode().splitlines()
+    assert len(lines) == 1 + 4
+    assert retention.stats()["archived_days"] == 2
+
+
+def test_zero_retention_keeps_records_and_backfills_days(db_session):
+    add_days(db_session, {30: 2})
+    db_session.query(DatabaseLogRecord).update({DatabaseLogRecord.log_day: None})
+    db_session.commit()
+
+    result = LogRetention(retention_days=0).run_once(today=TODAY)
+    assert result["backfilled"] == 2
+    assert result["purged_days"] == 0
+    db_session.expire_all()
+    assert len(db_driver.get_logs(db_session)) == 2
+    [summary] = db_driver.get_log_daily_counts(db_session)
+    assert summary.day == TODAY - timedelta(days=30)
+    assert summary.records == 2
+
+
+def test_daily_counts_endpoint(app_with_test_db, db_session):
+    add_days(db_session, {2: 2, 4: 1})
+    LogRetention(retention_days=3).run_once(today=TODAY)
+    r = TestClient(app_with_test_db).get(
+        "/logs/daily", params={"start_day": str(TODAY - timedelta(days=4))}
+    )
+    assert r.status_code == 200
+    assert [(c["records"], c["purged"]) for c in r.json()] == [(1, True), (2, False)]
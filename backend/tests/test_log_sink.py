@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+from sim_device_control.drivers import db as db_driver
+from sim_device_control.drivers.log_sink import LogSink
+
+
+def descriptions(db_session):
+    db_session.expire_all()
+    return sorted(log.description for log in db_driver.get_logs(db_session))
+
+
+def test_batched_records_are_written_on_flush(db_session, make_record):
+    sink = LogSink(batch_size=2)
+    for i in range(5):
+        sink.submit(make_record(str(i)))
+    assert sink.queue_depth() == 5
+    assert descriptions(db_session) == []
+
+    assert sink.flush() == 2
+    assert sink.flush_all() == 3
+    assert descriptions(db_session) == ["0", "1", "2", "3", "4"]
+    assert sink.stats()["batches"] == 3
+
+
+def test_writer_thread_flushes_and_stop_drains(db_session, make_record):
+    sink = LogSink(batch_size=100, flush_interval=60)
+    sink.start()
+    sink.submit(make_record("queued"))
+    sink.stop()
+    assert descriptions(db_session) == ["queued"]
+    assert sink.queue_depth() == 0
+
+
+@pytest.mark.parametrize(
+    "overflow, kept", [("drop_oldest", ["1", "2"]), ("drop_newest", ["0", "1"])]
+)
+def test_overflow_policies(db_session, overflow, kept, make_record):
+    sink = LogSink(max_queue_size=2, overflow=overflow)
+    for i in range(3):
+        sink.submit(make_record(str(i)))
+    sink.flush_all()
+    assert descriptions(db_session) == kept
+    assert sink.stats()["dropped"] == 1
+
+
+def test_blocking_overflow_gives_up_after_timeout(make_record):
+    sink = LogSink(max_queue_size=1, block_timeout=0.01)
+    sink.submit(make_record())
+    with pytest.raises(ValueError):
+        sink.submit(make_record())
+
+
+def test_failed_batch_is_requeued(db_session, monkeypatch, make_record):
+    sink = LogSink()
+    sink.submit(make_record("retry"))
+
+    def fail(db, logs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(db_driver, "add_logs", fail)
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    assert sink.queue_depth() == 1
+    monkeypatch.undo()
+    sink.flush()
+    assert descriptions(db_session) == ["retry"]
+
+
+def test_log_stats_endpoint(app_with_test_db):
+    r = TestClient(app_with_test_db).get("/logs/stats")
+    assert r.status_code == 200
+    assert r.json()["mode"] == "direct"
+    assert r.json()["queue_depth"] == 0
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from fastapi.testclient import TestClient
+from sim_device_control.drivers.log_sink import LogSink
+from sim_device_control.drivers.log_tail import LogTail, get_log_tail, log_tail_events
+
+
+def test_records_fan_out_to_matching_subscribers(make_record):
+    async def scenario():
+        tail = LogTail(max_buffer=3)
+        everything = tail.subscribe()
+        device = tail.subscribe(device_uuid="dev-2")
+        action = tail.subscribe(action="write")
+
+        # Published from another thread, like the sink's callers
+        def publish():
+            for i in range(5):
+                tail.publish(make_record(str(i)))
+            tail.publish(make_record("dev-2", device_uuid="dev-2"))
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        thread.join()
+
+        records, dropped = await everything.get(timeout=1)
+        # Bounded: only the newest 3 are kept, the rest are counted
+        assert [r.description for r in records] == ["3", "4", "dev-2"]
+        assert dropped == 3
+        records, dropped = await device.get(timeout=1)
+        assert [r.description for r in records] == ["dev-2"]
+        assert await action.get(timeout=0.01) == ([], 0)
+
+    asyncio.run(scenario())
+
+
+def test_event_stream_ends_on_disconnect_and_unsubscribes(make_record):
+    async def scenario():
+        tail = LogTail()
+        subscription = tail.subscribe()
+        tail.publish(make_record("live"))
+
+        disconnected = asyncio.Event()
+        events = []
+
+        async def is_disconnected():
+            return disconnected.is_set()
+
+        async for event in log_tail_events(tail, subscription, is_disconnected):
+            events.append(event)
+            if len(events) == 2:
+                disconnected.set()
+        return tail, events
+
+    tail, events = asyncio.run(scenario())
+    assert events[0] == ": connected\n\n"
+    assert events[1].startswith("id: ")
+    assert '"description":"live"' in events[1]
+    assert tail.subscriber_count() == 0
+
+
+def test_sink_publishes_accepted_records(db_session, make_record):
+    async def scenario():
+        tail = LogTail()
+        subscription = tail.subscribe()
+        sink = LogSink(mode="direct", tail=tail)
+        sink.submit(make_record("written"))
+        dropped_sink = LogSink(max_queue_size=0, overflow="drop_newest", tail=tail)
+        dropped_sink.submit(make_record("dropped"))
+        return await subscription.get(timeout=1)
+
+    records, _ = asyncio.run(scenario())
+    assert [r.description for r in records] == ["written"]
+
+
+def test_tail_endpoint_limits_subscribers(app_with_test_db, monkeypatch):
+    monkeypatch.setattr(get_log_tail(), "max_subscribers", 0)
+    r = TestClient(app_with_test_db).get("/logs/tail")
+    assert r.status_code == 503
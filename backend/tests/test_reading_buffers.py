@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from sim_device_control.drivers.reading_buffers import SensorBuffers
+
+
+def test_ring_keeps_the_newest_readings_per_sensor():
+    buffers = SensorBuffers(capacity=4)
+    for i in range(6):
+        buffers.append("dev-1", "temperature", float(i), float(i))
+    buffers.append("dev-2", "temperature", 5.0, 100.0)
+
+    [device] = buffers.stats("temperature", "dev-1", now=10.0)
+    # Readings 0 and 1 were overwritten
+    assert (device["count"], device["min"], device["max"]) == (4, 2.0, 5.0)
+    [recent] = buffers.stats("temperature", "dev-1", window=6.5, now=10.0)
+    assert recent["count"] == 2 and recent["mean"] == 4.5
+    [pooled] = buffers.stats("temperature", now=10.0, percentiles=[50])
+    assert pooled["count"] == 5 and pooled["percentiles"] == {"50": 4.0}
+
+    buffers.remove("dev-1")
+    assert buffers.stats("temperature", "dev-1")[0]["count"] == 0
+    with pytest.raises(ValueError):
+        buffers.stats("temperature", percentiles=[101])
+
+
+def test_per_device_stats_match_numpy():
+    rng = np.random.default_rng(1)
+    buffers = SensorBuffers(capacity=50)
+    expected = {}
+    for device in range(20):
+        # Devices with fewer readings than the capacity, some with none in window
+        count = int(rng.integers(1, 80))
+        values = rng.normal(20, 3, count)
+        uuids = [f"dev-{device}"] * count
+        buffers.append_many("pressure", uuids, np.arange(count, dtype=float), values)
+        kept = values[-50:][np.arange(count)[-50:] >= 10]
+        if len(kept):
+            expected[f"dev-{device}"] = kept
+
+    results = buffers.stats(
+        "pressure", window=70, percentiles=[5, 50, 99.9], per_device=True, now=80.0
+    )
+    assert sorted(r["device_uuid"] for r in results) == sorted(expected)
+    for result in results:
+        values = expected[result["device_uuid"]]
+        assert result["count"] == len(values)
+        assert result["mean"] == pytest.approx(values.mean())
+        assert result["std"] == pytest.approx(values.std())
+        assert result["max"] == values.max()
+        assert list(result["percentiles"].values()) == pytest.approx(
+            np.percentile(values, [5, 50, 99.9])
+        )
@@ -0,0 +1,77 @@
+import numpy as np
+
+from sim_device_control.drivers.reading_chunks import (
+    ChunkedSeries,
+    ReadingArchive,
+    ReadingChunk,
+)
+
+
+def make_readings(count, seed=0):
+    # Readings about once a second with a few ms of jitter, as devices report
+    # them with 2 decimals
+    rng = np.random.default_rng(seed)
+    timestamps = 1.7e9 + np.arange(count) + np.round(rng.normal(0, 0.002, count), 3)
+    values = np.round(21.0 + np.cumsum(rng.normal(0, 0.05, count)), 2)
+    return timestamps, values
+
+
+def test_chunks_roundtrip_exactly_and_compress():
+    timestamps, values = make_readings(1024)
+    chunk = ReadingChunk(timestamps, values)
+    decoded_times, decoded_values = chunk.decode()
+    assert np.array_equal(decoded_values, values)
+    assert np.abs(decoded_times - timestamps).max() < 1e-6
+    assert chunk.nbytes() < 4 * len(values)
+
+    # Values with more decimals than can be kept as integers still roundtrip
+    noisy = values + np.random.default_rng(1).normal(0, 1e-9, len(values))
+    _, decoded_values = ReadingChunk(timestamps, noisy).decode()
+    assert np.array_equal(decoded_values, noisy)
+
+    # and a precision rounds them
+    chunk = ReadingChunk(timestamps, noisy, precision=1)
+    _, decoded_values = chunk.decode()
+    assert np.abs(decoded_values - noisy).max() <= 0.05 + 1e-9
+
+
+def test_values_that_do_not_fit_integers_are_kept_as_floats():
+    for values, precision in [
+        ([1e20, 2.0], None),
+        ([np.inf, 1.0], None),
+        ([3e15, 3e15 + 0.5], None),
+        ([np.nan, 1.5], 2),
+        ([-np.inf, 1e300], 2),
+    ]:
+        values = np.array(values)
+        chunk = ReadingChunk(np.array([0.0, 1.0]), values, precision)
+        assert chunk.precision is None
+        _, decoded_values = chunk.decode()
+        assert np.array_equal(decoded_values, values, equal_nan=True)
+
+
+def test_series_range_spans_chunks_and_drops_old_ones():
+    timestamps, values = make_readings(2500)
+    series = ChunkedSeries(chunk_size=1000, retention=900)
+    for timestamp, value in zip(timestamps.tolist(), values.tolist()):
+        series.append(timestamp, value)
+    # The first chunk ended more than retention before the second one did
+    assert len(series.chunks) == 1 and len(series) == 1500
+
+    start, end = timestamps[1500] - 0.5, timestamps[2100] - 0.5
+    range_times, range_values = series.range(start, end)
+    assert np.array_equal(range_values, values[1500:2100])
+    assert np.array_equal(np.round(range_times, 3), np.round(timestamps[1500:2100], 3))
+
+
+def test_archive_keeps_each_sensor_apart():
+    archive = ReadingArchive(chunk_size=4)
+    archive.append_many("temperature", ["a", "b"], [1.0, 1.0], [20.5, 30.0])
+    for second in range(2, 10):
+        archive.append("a", "temperature", float(second), 20.5)
+    assert archive.points() == 10
+    assert archive.range("a", "temperature", 3.0, 5.0)[1].tolist() == [20.5, 20.5]
+    assert archive.range("b", "temperature")[1].tolist() == [30.0]
+    archive.remove("a")
+    assert archive.points() == 1
+    assert len(archive.range("a", "temperature")[0]) == 0
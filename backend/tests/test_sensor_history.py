@@ -0,0 +1,152 @@
+import math
+from datetime import datetime, timedelta
+import pytest
+from sim_device_control.drivers import db as db_driver
+from sim_device_control.drivers.sensor_history import SensorHistory
+from sim_device_control.schemas import SensorReading
+
+
+def reading(seconds, value, device_uuid="dev-1", quantity="temperature"):
+    return SensorReading(
+        device_uuid=device_uuid,
+        quantity=quantity,
+        timestamp=datetime(2025, 1, 1, 12, 0, 0) + timedelta(seconds=seconds),
+        value=value,
+    )
+
+
+def test_readings_are_downsampled_per_bucket(db_session):
+    history = SensorHistory(batch_size=2)
+    history.submit(
+        [
+            reading(0, 1.0),
+            reading(30, 3.0),
+            reading(59, 5.0),
+            reading(60, 10.0),
+            reading(200, 7.0),
+            reading(10, 99.0, device_uuid="dev-2"),
+            reading(10, 99.0, quantity="pressure"),
+        ]
+    )
+    assert history.flush_all() == 7
+    assert history.stats()["batches"] == 4
+
+    # The start is aligned down to a whole bucket
+    buckets = db_driver.get_sensor_reading_buckets(
+        db_session,
+        "dev-1",
+        datetime(2025, 1, 1, 12, 0, 20),
+        datetime(2025, 1, 1, 13),
+        bucket_seconds=60,
+        quantity="temperature",
+    )
+    assert buckets == [
+        {
+            "bucket": datetime(2025, 1, 1, 12, 0),
+            "quantity": "temperature",
+            "count": 3,
+            "avg": 3.0,
+            "min": 1.0,
+            "max": 5.0,
+            "std": math.sqrt(35 / 3 - 9),
+        },
+        {
+            "bucket": datetime(2025, 1, 1, 12, 1),
+            "quantity": "temperature",
+            "count": 1,
+            "avg": 10.0,
+            "min": 10.0,
+            "max": 10.0,
+            "std": 0.0,
+        },
+        {
+            "bucket": datetime(2025, 1, 1, 12, 3),
+            "quantity": "temperature",
+            "count": 1,
+            "avg": 7.0,
+            "min": 7.0,
+            "max": 7.0,
+            "std": 0.0,
+        },
+    ]
+    with pytest.raises(ValueError):
+        db_driver.get_sensor_reading_buckets(
+            db_session, "dev-1", datetime(2025, 1, 1), datetime(2025, 1, 2), 0
+        )
+
+
+def test_full_queue_drops_oldest_readings(db_session):
+    history = SensorHistory(max_queue_size=3)
+    history.submit([reading(i, float(i)) for i in range(5)])
+    assert history.stats()["dropped"] == 2
+    history.flush_all()
+    [bucket] = db_driver.get_sensor_reading_buckets(
+        db_session, "dev-1", datetime(2025, 1, 1), datetime(2025, 1, 2), 3600
+    )
+    assert (bucket["count"], bucket["min"]) == (3, 2.0)
+
+
+def test_rollups_take_late_readings_and_match_raw(db_session):
+    history = SensorHistory(batch_size=100)
+    history.submit([reading(i * 7, float(i % 13)) for i in range(600)])
+    history.flush_all()
+    # A late batch for minutes and hours that were already rolled up
+    history.submit([reading(90, 50.0), reading(3700, -5.0), reading(5, 1.5)])
+    history.flush_all()
+
+    def buckets(source, bucket_seconds):
+        return db_driver.get_sensor_reading_buckets(
+            db_session,
+            "dev-1",
+            datetime(2025, 1, 1),
+            datetime(2025, 1, 2),
+            bucket_seconds,
+            "temperature",
+            source,
+        )
+
+    for bucket_seconds in (60, 300, 3600, 86400):
+        raw, rollup = buckets("raw", bucket_seconds), buckets("rollup", bucket_seconds)
+        assert [b["bucket"] for b in rollup] == [b["bucket"] for b in raw]
+        for r, expected in zip(rollup, raw):
+            assert (r["count"], r["min"], r["max"]) == (
+                expected["count"],
+                expected["min"],
+                expected["max"],
+            )
+            assert r["avg"] == pytest.approx(expected["avg"])
+            assert r["std"] == pytest.approx(expected["std"], abs=1e-9)
+    [day] = buckets("rollup", 86400)
+    assert (day["count"], day["min"], day["max"]) == (603, -5.0, 50.0)
+
+    # Rebuilding from sensor_readings gives the same rows
+    before = buckets("rollup", 3600)
+    db_driver.rebuild_reading_rollups(db_session)
+    assert buckets("rollup", 3600) == pytest.approx(before)
+    with pytest.raises(ValueError):
+        buckets("rollup", 90)
+
+
+def test_quantities_of_one_device_get_their_own_buckets(db_session):
+    history = SensorHistory()
+    history.submit(
+        [
+            reading(0, 10.0, quantity="speed"),
+            reading(30, 20.0, quantity="speed"),
+            reading(10, 400.0, quantity="location"),
+        ]
+    )
+    history.flush_all()
+    for source in ("raw", "rollup"):
+        buckets = db_driver.get_sensor_reading_buckets(
+            db_session,
+            "dev-1",
+            datetime(2025, 1, 1),
+            datetime(2025, 1, 2),
+            3600,
+            source=source,
+        )
+        assert [(b["quantity"], b["count"], b["avg"]) for b in buckets] == [
+            ("location", 1, 400.0),
+            ("speed", 2, 15.0),
+        ]
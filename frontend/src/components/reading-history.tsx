@@ -0,0 +1,101 @@
+import {
+    useState
+} from "react";
+
+interface ReadingBucket {
+    bucket: string;
+    quantity: string;
+    count: number;
+    avg: number;
+    min: number;
+    max: number;
+}
+
+interface ReadingHistoryProps {
+    deviceUuid: string | null;
+    quantity: string;
+    unit: string;
+}
+
+// Buckets requested from the backend, about one per horizontal pixel
+const POINTS = 300;
+const WIDTH = 600;
+const HEIGHT = 160;
+const RANGES: Array<[string, number]> = [
+    ["Last hour", 60 * 60],
+    ["Last day", 24 * 60 * 60],
+    ["Last week", 7 * 24 * 60 * 60],
+];
+
+// The backend stores naive local timestamps
+function localIso(date: Date) {
+    return new Date(date.getTime() - date.getTimezoneOffset() * 60000).toISOString().slice(0, 19);
+}
+
+export default function ReadingHistory({ deviceUuid, quantity, unit }: ReadingHistoryProps) {
+    const [range, setRange] = useState<number>(RANGES[0][1]);
+    const [buckets, setBuckets] = useState<Array<ReadingBucket>>([]);
+    const [error, setError] = useState<string | null>(null);
+
+    async function loadHistory(seconds: number) {
+        setError(null);
+        try {
+            // Downsampled by the backend: at most POINTS buckets with avg/min/max
+            const end = new Date();
+            const start = new Date(end.getTime() - seconds * 1000);
+            const params = new URLSearchParams({
+                device_uuid: deviceUuid ?? "",
+                quantity,
+                start_time: localIso(start),
+                end_time: localIso(end),
+                points: String(POINTS),
+            });
+            const response = await fetch(`/devices/readings?${params.toString()}`);
+            if (!response.ok) {
+                const body = await response.json();
+                throw new Error(`HTTP error! status: ${response.status}, description: ${body.detail}`);
+            }
+            setBuckets(await response.json());
+        } catch (err: unknown) {
+            setError(err instanceof Error ? err.message : "Unknown error");
+        }
+    }
+
+    const low = Math.min(...buckets.map((b) => b.min));
+    const high = Math.max(...buckets.map((b) => b.max));
+    const first = buckets.length ? Date.parse(buckets[0].bucket) : 0;
+    const last = buckets.length ? Date.parse(buckets[buckets.length - 1].bucket) : 0;
+    const x = (b: ReadingBucket) => last > first ? (Date.parse(b.bucket) - first) / (last - first) * WIDTH : WIDTH / 2;
+    const y = (value: number) => high > low ? HEIGHT - (value - low) / (high - low) * HEIGHT : HEIGHT / 2;
+    const band = [
+        ...buckets.map((b) => `${x(b)},${y(b.max)}`),
+        ...[...buckets].reverse().map((b) => `${x(b)},${y(b.min)}`),
+    ].join(" ");
+
+    return (
+        <div style={{ margin: "16px 0" }}>
+            <div style={{ display: "flex", gap: "8px", alignItems: "center" }}>
+                <select value={range} onChange={(e) => setRange(Number(e.target.value))}>
+                    {RANGES.map(([label, seconds]) => (
+                        <option key={seconds} value={seconds}>{label}</option>
+                    ))}
+                </select>
+                <button onClick={() => loadHistory(range)} disabled={!deviceUuid}>
+                    Show History
+                </button>
+                {buckets.length > 0 && <span>{low} to {high} {unit}</span>}
+            </div>
+            {buckets.length > 0 && (
+                <svg width={WIDTH} height={HEIGHT} style={{ border: "1px solid #ccc", marginTop: "8px" }}>
+                    <polygon points={band} fill="#cde" />
+                    <polyline
+                        points={buckets.map((b) => `${x(b)},${y(b.avg)}`).join(" ")}
+                        fill="none"
+                        stroke="#36c"
+                    />
+                </svg>
+            )}
+            {error && <div style={{ color: "red" }}>Error: {error}</div>}
+        </div>
+    );
+}
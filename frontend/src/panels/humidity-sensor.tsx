@@ -12,6 +12,7 @@ import {
 import DeviceSelector from "../components/device-selector";
 import DeviceDetails from "../components/device-details";
 import DeviceReadAction from "../components/device-read-action";
+import ReadingHistory from "../components/reading-history";
 
 export default function HumiditySensor() {
     const [humidity, setHumidity] = useState<number | null>(null);
@@ -122,6 +123,12 @@ export default function HumiditySensor() {
                 spinnerChar={spinnerChar}
             />
 
+            <ReadingHistory
+                deviceUuid={selectedDevice?.uuid ?? null}
+                quantity="humidity"
+                unit="%"
+            />
+
             <p>{error && <div style={{ color: "red" }}>Error: {error}</div>}</p>
         </div>
     );
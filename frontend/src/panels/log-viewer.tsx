@@ -1,4 +1,5 @@
 import {
+    useEffect,
     useState
 } from "react";
 import {
@@ -7,13 +8,45 @@ import {
     type LogEntry,
 } from "../utils/device-dependancies";
 
+// Entries kept on screen while following the live tail
+const LIVE_MAX_ENTRIES = 500;
+
 export default function LogViewer() {
     const [error, setError] = useState<string | null>(null);
     const [logEntries, setLogEntries] = useState<Array<LogEntry>>([]);
     const [start_time, setStartTime] = useState<string>("");
     const [end_time, setEndTime] = useState<string>("");
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [filters, setFilters] = useState({
+        device_uuid: "",
+        action: "",
+        user: "",
+        description: "",
+    });
+    const [live, setLive] = useState<boolean>(false);
     const { loading, setLoading, spinnerChar } = useLoadingSpinner();
 
+    // New records are pushed by the backend over Server-Sent Events while live
+    useEffect(() => {
+        if (!live) {
+            return;
+        }
+        const params = new URLSearchParams(
+            Object.fromEntries(
+                Object.entries({ device_uuid: filters.device_uuid, action: filters.action })
+                    .filter(([, value]) => value.trim() !== "")
+            )
+        );
+        const source = new EventSource(`/logs/tail?${params.toString()}`);
+        source.onmessage = (event) => {
+            const entry: LogEntry = JSON.parse(event.data);
+            setLogEntries((entries) => [entry, ...entries].slice(0, LIVE_MAX_ENTRIES));
+        };
+        source.onerror = () => setError("Live log stream interrupted, reconnecting");
+        source.onopen = () => setError(null);
+        return () => source.close();
+    }, [live, filters.device_uuid, filters.action]);
+
     const [newLogEntry, setNewLogEntry] = useState<LogEntry>({
         uuid: "",
         user: "",
@@ -52,23 +85,36 @@ export default function LogViewer() {
         }
     }
 
+    // Filters are applied by the backend, empty ones are left out
+    function filterParams(): Record<string, string> {
+        return Object.fromEntries(
+            Object.entries(filters).filter(([, value]) => value.trim() !== "")
+        );
+    }
+
     async function fetchLogEntries(
         setLoading: (loading: LoadingSection) => void,
         setError: (error: string | null) => void,
         setLogEntries: (entries: Array<LogEntry>) => void,
+        cursor?: string,
     ) {
         setLoading(LoadingSection.FetchingDevices);
         setError(null);
         try {
+            const params = new URLSearchParams({
+                ...filterParams(),
+                ...(cursor ? { cursor } : {}),
+            });
             const response = await fetch(
-                `/logs/`
+                `/logs/?${params.toString()}`
             );
             if (!response.ok) {
                 const body = await response.json();
                 throw new Error(`HTTP error! status: ${response.status}, description: ${body.detail}`);
             }
             const data = await response.json();
-            setLogEntries(data);
+            setLogEntries(cursor ? [...logEntries, ...data] : data);
+            setNextCursor(response.headers.get("X-Next-Cursor"));
         } catch (err: unknown) {
             const message = err instanceof Error ? err.message : "Unknown error";
             setError(message);
@@ -81,6 +127,7 @@ export default function LogViewer() {
         setLoading: (loading: LoadingSection) => void,
         setError: (error: string | null) => void,
         setLogEntries: (entries: Array<LogEntry>) => void,
+        cursor?: string,
     ) {
         setLoading(LoadingSection.FetchingDevices);
         setError(null);
@@ -88,6 +135,8 @@ export default function LogViewer() {
             const params = new URLSearchParams({
                 start_time: start_time.replace('T', 'T').slice(0, 19),
                 end_time: end_time.replace('T', 'T').slice(0, 19),
+                ...filterParams(),
+                ...(cursor ? { cursor } : {}),
             });
             const response = await fetch(
                 `/logs/filtered?${params.toString()}`
@@ -97,7 +146,8 @@ export default function LogViewer() {
                 throw new Error(`HTTP error! status: ${response.status}, description: ${body.detail}`);
             }
             const data = await response.json();
-            setLogEntries(data);
+            setLogEntries(cursor ? [...logEntries, ...data] : data);
+            setNextCursor(response.headers.get("X-Next-Cursor"));
         } catch (err: unknown) {
             const message = err instanceof Error ? err.message : "Unknown error";
             setError(message);
@@ -173,6 +223,14 @@ export default function LogViewer() {
                     style={{ width: "40px", display: "flex", alignItems: "center", justifyContent: "center" }}>
                     {loading === LoadingSection.FetchingDevices ? spinnerChar : "⟳"}
                 </button>
+                <label style={{ marginLeft: "16px" }}>
+                    <input
+                        type="checkbox"
+                        checked={live}
+                        onChange={(e) => setLive(e.target.checked)}
+                    />
+                    live
+                </label>
             </div>
 
             <div style={{
@@ -196,6 +254,34 @@ export default function LogViewer() {
                     onChange={(e) => setEndTime(e.target.value)}
                     disabled={loading !== LoadingSection.None}
                 />
+                <span>device uuid:</span>
+                <input
+                    type="text"
+                    value={filters.device_uuid}
+                    onChange={(e) => setFilters({ ...filters, device_uuid: e.target.value })}
+                    disabled={loading !== LoadingSection.None}
+                />
+                <span>action:</span>
+                <input
+                    type="text"
+                    value={filters.action}
+                    onChange={(e) => setFilters({ ...filters, action: e.target.value })}
+                    disabled={loading !== LoadingSection.None}
+                />
+                <span>user:</span>
+                <input
+                    type="text"
+                    value={filters.user}
+                    onChange={(e) => setFilters({ ...filters, user: e.target.value })}
+                    disabled={loading !== LoadingSection.None}
+                />
+                <span>description contains:</span>
+                <input
+                    type="text"
+                    value={filters.description}
+                    onChange={(e) => setFilters({ ...filters, description: e.target.value })}
+                    disabled={loading !== LoadingSection.None}
+                />
             </div>
 
             <div>
@@ -259,6 +345,27 @@ export default function LogViewer() {
 
             </div>
 
+            {nextCursor && (
+                <div
+                    style={{
+                        display: "flex",
+                        justifyContent: "center",
+                        alignItems: "center",
+                        marginTop: "16px",
+                    }}>
+                    <button onClick={() => {
+                        if (start_time === "" && end_time === "") {
+                            fetchLogEntries(setLoading, setError, setLogEntries, nextCursor);
+                        } else {
+                            fetchFilteredLogEntries(setLoading, setError, setLogEntries, nextCursor);
+                        }
+                    }}
+                        disabled={loading === LoadingSection.FetchingDevices}>
+                        {loading === LoadingSection.FetchingDevices ? spinnerChar : "Load more"}
+                    </button>
+                </div>
+            )}
+
             <p>{error && <div style={{ color: "red" }}>Error: {error}</div>}</p>
         </div>
     );
@@ -12,6 +12,7 @@ import {
 import DeviceSelector from "../components/device-selector";
 import DeviceDetails from "../components/device-details";
 import DeviceReadAction from "../components/device-read-action";
+import ReadingHistory from "../components/reading-history";
 
 export default function PressureSensor() {
     const [pressure, setPressure] = useState<number | null>(null);
@@ -123,6 +124,12 @@ export default function PressureSensor() {
                 spinnerChar={spinnerChar}
             />
 
+            <ReadingHistory
+                deviceUuid={selectedDevice?.uuid ?? null}
+                quantity="pressure"
+                unit="hPa"
+            />
+
             <p>{error && <div style={{ color: "red" }}>Error: {error}</div>}</p>
         </div>
     );
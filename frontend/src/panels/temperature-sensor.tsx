@@ -12,6 +12,7 @@ import {
 import DeviceSelector from "../components/device-selector";
 import DeviceDetails from "../components/device-details";
 import DeviceReadAction from "../components/device-read-action";
+import ReadingHistory from "../components/reading-history";
 
 export default function TemperatureSensor() {
     const [temperature, setTemperature] = useState<number | null>(null);
@@ -123,6 +124,12 @@ export default function TemperatureSensor() {
                 spinnerChar={spinnerChar}
             />
 
+            <ReadingHistory
+                deviceUuid={selectedDevice?.uuid ?? null}
+                quantity="temperature"
+                unit="°C"
+            />
+
             <p>{error && <div style={{ color: "red" }}>Error: {error}</div>}</p>
         </div>
     );
@@ -15,6 +15,11 @@ export default defineConfig(({ mode }) => {
           changeOrigin: true,
           rewrite: (p) => p.replace(/^\/devices/, '/devices'),
         },
+        '/groups': {
+          target: proxyTarget,
+          changeOrigin: true,
+          rewrite: (p) => p.replace(/^\/groups/, '/groups'),
+        },
         '/logs': {
           target: proxyTarget,
           changeOrigin: true,
@@ -17,6 +17,32 @@ pub fn connect(device_id: &str, broker: &str, port: u16) -> (rumqttc::Client, ru
     return (client, connection);
 }
 
+pub fn group_topic(group: &str) -> String {
+    format!("sim-device-control/group/{}/command", group)
+}
+
+pub fn join_group(client: &Client, group: &str) -> Option<String> {
+    let topic = group_topic(group);
+    match client.subscribe(&topic, QoS::AtLeastOnce) {
+        Ok(_) => {
+            println!("Listening for group messages on topic: {}", topic);
+            Some(group.to_string())
+        }
+        Err(e) => Some(format!("Failed to join group {}: {}", group, e)),
+    }
+}
+
+pub fn leave_group(client: &Client, group: &str) -> Option<String> {
+    let topic = group_topic(group);
+    match client.unsubscribe(&topic) {
+        Ok(_) => {
+            println!("Stopped listening on topic: {}", topic);
+            Some(group.to_string())
+        }
+        Err(e) => Some(format!("Failed to leave group {}: {}", group, e)),
+    }
+}
+
 pub fn read_payload(event: Result<rumqttc::Event, rumqttc::ConnectionError>) -> Option<String> {
     if let Ok(Event::Incoming(Incoming::Publish(message))) = event {
         let payload = String::from_utf8_lossy(&message.payload);
@@ -7,7 +7,7 @@ use std::sync::Arc;
 use std::sync::atomic::{AtomicBool, Ordering};
 use serde::Deserialize;
 
-use crate::drivers::mqtt::{connect, read_payload};
+use crate::drivers::mqtt::{connect, join_group, leave_group, read_payload};
 use crate::drivers::device::{Device, DevicePayload, DeviceType};
 
 #[derive(Debug, Deserialize)]
@@ -87,7 +87,15 @@ fn main() {
             };
             if let Some(message) = serde_json::from_str::<MqttCommand>(&message).ok() {
                 payload.id = message.id;
-                if let Some(response) = device.operate(&message.command, &message.parameter) {
+                // Group membership is handled here since it needs the MQTT client
+                let group_response = match message.command.as_str() {
+                    "join_group" => join_group(&client, &message.parameter),
+                    "leave_group" => leave_group(&client, &message.parameter),
+                    _ => None,
+                };
+                if let Some(response) = group_response {
+                    payload.response = Some(response);
+                } else if let Some(response) = device.operate(&message.command, &message.parameter) {
                     payload.response = Some(response);
                 } else {
                     payload.response = Some(format!("Invalid command: {}", message.command));